@@ -223,12 +223,38 @@ def cmd_line():
                         help='force override of existing files')
     parser.add_argument('--version', action='store_true', dest='show_version',
                         help='print version information and exit')
+    parser.add_argument('-j', '--jobs', type=int, default=1, dest='jobs',
+                        help='number of processes used to generate scans')
+    parser.add_argument('--columnar', action='store_true', dest='columnar',
+                        help='write subscans through a compact columnar table')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        dest='incremental',
+                        help='reuse scans cached by previous runs in the output directory')
+    parser.add_argument('-s', '--store', dest='store', default=None,
+                        help='save the schedule in this project database and write it reusing the scans stored there')
+    parser.add_argument('-b', '--batch', nargs='+', dest='batch',
+                        metavar='CONFIGURATION_FILE',
+                        help='generate a schedule for each configuration file in one process')
+    parser.add_argument('-m', '--manifest', action='append', dest='manifest',
+                        help='generate the schedules listed in a manifest file, one configuration file and optional output directory per line')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        dest='workers',
+                        help='number of processes generating batch schedules')
+    parser.add_argument('--profile', dest='profile', metavar='REPORT',
+                        help='write a JSON report with time and peak memory of each generation phase and scan')
+    parser.add_argument('--profile-stats', dest='profile_stats',
+                        metavar='STATS_FILE',
+                        help='write cProfile statistics of the schedule generation, readable with pstats')
     parser.add_argument('directory', default=".", nargs='?',
                         help="directory for schedule files or user templates")
 
 
     #parsing command line arguments
     ns = parser.parse_args()
+    if (ns.profile or ns.profile_stats) and (ns.batch or ns.manifest):
+        parser.error("profiling applies to a single schedule")
+    if ns.store and ns.workers > 1 and (ns.batch or ns.manifest):
+        parser.error("a project store can be opened by one process at a time, use --workers 1 with --store")
     if ns.show_version:
         print("basie version: %s" % (VERSION,))
         sys.exit()
@@ -245,8 +271,7 @@ def cmd_line():
         logger.debug("\t%s:\t%s" % (k, str(v),))
 
     #imports are here as logging has already been configured
-    from . import schedule, rich_validator, utils, target_parser, receiver
-    from .radiotelescopes import radiotelescopes
+    from . import utils, batch
 
     try:
         if ns.get_templates:
@@ -258,39 +283,48 @@ def cmd_line():
             else:
                 dst_directory = os.path.abspath(ns.directory)
             utils.get_user_templates(dst_directory, ns.force)
+        elif ns.batch or ns.manifest:
+            #generating many schedules, failures do not stop the batch
+            entries = [(f, ns.directory) for f in ns.batch or []]
+            for manifest in ns.manifest or []:
+                entries.extend(batch.read_manifest(manifest, ns.directory))
+            failures = 0
+            for result in batch.run_batch(entries, ns.workers,
+                                          jobs=ns.jobs,
+                                          columnar=ns.columnar,
+                                          incremental=ns.incremental,
+                                          store=ns.store):
+                if result.ok:
+                    logger.info(str(result))
+                else:
+                    logger.error(str(result))
+                    failures += 1
+            logger.info("%d schedules generated, %d failed" %
+                        (len(entries) - failures, failures))
+            if failures:
+                sys.exit(1)
         else:
             #generating schedule from user file
-            configuration_file = os.path.abspath(ns.configuration_file)
-            if not os.path.exists(configuration_file):
-                raise IOError("cannot find file %s" % configuration_file)
-            logger.info("generating schedule from user input file: {0}".format(ns.configuration_file))
-            src_directory = os.path.dirname(configuration_file)
-            dst_directory = os.path.abspath(ns.directory)
-            conf = rich_validator.validate_configuration(configuration_file)
-            #setting target file in the same directory as schedule file
-            targetsFile = os.path.join(src_directory, conf.pop('targetsFile'))
-            parsed_targets = target_parser.parse_file(targetsFile)
-            logger.debug("parsed targets: %s" % (parsed_targets,))
-            #prepare Schedule contructor arguments
-            schedule_params = conf
-            radiotelescope_name = conf.pop("radiotelescope").upper()
-            radiotelescope = radiotelescopes[radiotelescope_name]
+            if ns.profile or ns.profile_stats:
+                from . import profiling
+                profiler = profiling.Profiler(
+                               cprofile=bool(ns.profile_stats))
+            else:
+                profiler = None
             try:
-                receiver = radiotelescope.receivers[conf["receiver"]]
-            except:
-                raise ScheduleError("radiotelescope does not have specified receiver")
-            schedule_params["radiotelescope"] = radiotelescope_name
-            schedule_params.receiver = receiver
-            backends = schedule_params.pop("backends")
-            scantypes = schedule_params.pop("scantypes")
-            logger.debug(schedule_params)
-            _schedule = schedule.Schedule(**schedule_params)
-            _schedule.backends = backends
-            _schedule.scantypes = scantypes
-            for _target, _scanmode, _backend, _  in parsed_targets:
-                _schedule.add_scan(_target, _scanmode, _backend)
-            _schedule.set_base_dir(dst_directory)
-            _schedule._write_schedule_files()
+                if profiler is not None:
+                    profiler.start()
+                batch.generate_schedule(ns.configuration_file, ns.directory,
+                                        ns.jobs, ns.columnar, ns.incremental,
+                                        ns.store, profiler=profiler)
+            finally:
+                if profiler is not None:
+                    profiler.stop()
+                    logger.info("profile:\n" + profiler.summary())
+                    if ns.profile:
+                        profiler.write_report(ns.profile)
+                    if ns.profile_stats:
+                        profiler.dump_stats(ns.profile_stats)
         logger.info('closing gently')
     except Exception as e:
         logger.info("exiting with error")
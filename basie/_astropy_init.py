@@ -19,9 +19,13 @@ except ImportError:
 if not _ASTROPY_SETUP_:  # noqa
     import os
 
-    # Create the test function for self test
-    from astropy.tests.runner import TestRunner
+    # Create the test function for self test, astropy is imported on the
+    # first call so that importing the package stays fast
+    def test(*args, **kwargs):
+        from astropy.tests.runner import TestRunner
+
+        runner = TestRunner.make_test_runner_in(os.path.dirname(__file__))
+        return runner(*args, **kwargs)
 
-    test = TestRunner.make_test_runner_in(os.path.dirname(__file__))
     test.__test__ = False
     __all__ += ["test"]
@@ -0,0 +1,98 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Pure python angle string formatting.
+Produces the same strings as astropy.coordinates.Angle.to_string for scalar
+values without its per call overhead. Results are memoized as schedules
+repeat the same values (null offsets above all) many times.
+
+functions:
+    - format_dec: decimal representation
+    - format_sexagesimal: sexagesimal representation
+"""
+
+import math
+from functools import lru_cache
+
+CACHE_SIZE = 2**16
+"""
+CONSTANT. Number of strings memoized by each formatting function
+"""
+
+def _zero_key(value):
+    #-0.0 and 0.0 are equal dictionary keys but have different strings
+    return math.copysign(1.0, value) if value == 0.0 else 0.0
+
+def format_dec(value, precision):
+    """
+    Decimal string representation of a number
+    @param value: the value
+    @type value: float
+    @param precision: number of decimal digits
+    """
+    return _format_dec(value, precision, _zero_key(value))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _format_dec(value, precision, zero_key):
+    if math.isnan(value):
+        return "nan"
+    return "{0:0.{1}f}".format(value, precision)
+
+def format_sexagesimal(value, precision, sep, pad=True):
+    """
+    Sexagesimal string representation of a number. Seconds are rounded to
+    precision digits and carried to minutes and degrees (or hours) when
+    needed.
+    @param value: the value in degrees or hours
+    @type value: float
+    @param precision: number of decimal digits of the seconds field
+    @param sep: fields separator
+    @param pad: if True pad the first field to two digits
+    """
+    return _format_sexagesimal(value, precision, sep, pad, _zero_key(value))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _format_sexagesimal(value, precision, sep, pad, zero_key):
+    if math.isnan(value):
+        return "nan"
+    sign = math.copysign(1.0, value)
+    df, d = math.modf(math.fabs(value))
+    mf, m = math.modf(df * 60.0)
+    s = mf * 60.0
+    #d and m are integral, sign * d keeps the sign of zero
+    d = math.fabs(sign * d)
+    m = math.fabs(sign * m)
+    s = math.fabs(sign * s)
+    if s >= 60.0 - 10.0 ** (-precision):
+        s = 0.0
+        m += 1.0
+    if m >= 60.0:
+        m = 0.0
+        d += 1.0
+    if pad:
+        width = 3 if sign == -1 else 2
+    else:
+        width = 0
+    seconds = "{0:.{1}f}".format(s, precision)
+    if len(seconds) == 1 or seconds[1] == ".":
+        seconds = "0" + seconds
+    return "{0:0{1}.0f}{2}{3:02d}{2}{4}".format(math.copysign(d, sign), width,
+                                                sep, int(m), seconds)
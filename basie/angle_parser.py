@@ -4,6 +4,7 @@ from builtins import str
 import re
 import logging
 logger = logging.getLogger(__name__)
+from functools import lru_cache
 from .configobj import validate
 
 from astropy import units as u
@@ -33,6 +34,24 @@ hms_angle_re = re.compile(hms_angle_pattern)
 Regular espression matching angle valid sexagesimal representation in hour units
 """
 
+angle_pattern = r"^(?:(?P<dec>[+-]?\d+(?:.\d+)?)d" +\
+                r"|(?P<deg>[+-]?\d{1,3}):" +\
+                r"(?P<min>\d{2}):" +\
+                r"(?P<sec>\d{2}(?:.\d+)?)" +\
+                r"|(?P<hour>[0-2]?\d)" +\
+                r":(?P<hour_min>\d{2})" +\
+                r":(?P<hour_sec>\d{2}(?:.\d+)?)h)$"
+angle_re = re.compile(angle_pattern)
+"""
+Regular espression matching any valid angle representation, the matching
+group tells decimal, sexagesimal degrees or hours apart
+"""
+
+ANGLE_CACHE_SIZE = 4096
+"""
+CONSTANT. Number of angle strings whose parsing results are memoized
+"""
+
 class VdtAngleError(validate.ValidateError):
     """
     Raised when trying to parse a wrongly formatted angle
@@ -112,26 +131,46 @@ def check_hms_angle(value):
         raise VdtAngleError("not a valid hour angle: %s" % value)
     return hms_to_angle(match.groups())
 
+@lru_cache(maxsize=ANGLE_CACHE_SIZE)
+def _parse_angle(value):
+    """
+    Parse an angle string in a single match.
+    Failures give the errors of the hours representation, the last one tried
+    by the former sequence of parsers.
+    @return: (degrees, original unit, sexa) of the parsed angle
+    @raise VdtAngleError: if value is not valid
+    """
+    match = angle_re.match(value)
+    if match is None:
+        raise VdtAngleError("not a valid hour angle: %s" % value)
+    groups = match.groupdict()
+    if groups["hour"] is not None:
+        a = hms_to_angle((groups["hour"], groups["hour_min"],
+                          groups["hour_sec"]))
+    else:
+        try:
+            if groups["dec"] is not None:
+                a = VAngle(float(groups["dec"]))
+            else:
+                a = dms_to_angle((groups["deg"], groups["min"],
+                                  groups["sec"]))
+        except Exception:
+            raise VdtAngleError("not a valid hour angle: %s" % value)
+    return a.deg, a.original_unit, a.sexa
+
 def check_angle(value):
     """
     validate a string to create an angles.Angle object
-    tries in order: decimal, sexagesimal degrees and hours
+    accepts decimal, sexagesimal degrees and hours representations.
+    Results are memoized, each call returns a new angle.
     @return: the Angle object created
     @raise VdtAngleError: if value is not valid
     """
-    try:
-        a = check_dec_angle(value)
-        logger.debug("got dec angle %s" % (a.fmt(),))
-    except:
-        try:
-            a = check_dms_angle(value)
-            logger.debug("got dms angle %s" % (a.fmt(),))
-        except:
-            try:
-                a = check_hms_angle(value)
-                logger.debug("got hms angle %s" % (a.fmt(),))
-            except:
-                raise
+    if isinstance(value, list):
+        raise validate.ValidateError("expected value angle, found list")
+    a = VAngle._from_deg(*_parse_angle(value))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("got angle %s" % (a.fmt(),))
     return a
 
 validate_options = {
@@ -0,0 +1,233 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Schedule generation from configuration files, one at a time or in batch.
+Batches run in a single process, or in a pool of worker processes, so that
+imports, radiotelescopes and scan results are shared among schedules. A
+failing schedule is reported in its L{BatchResult} and does not stop the
+others.
+
+A manifest is a text file listing one configuration file per line, optionally
+followed by the output directory of that schedule. Relative paths refer to the
+manifest directory, empty lines and lines starting with # are ignored.
+
+functions:
+    - generate_schedule
+    - read_manifest
+    - run_batch
+classes:
+    - BatchResult
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from .errors import ScheduleError
+
+class BatchResult(object):
+    """
+    The outcome of a schedule generation
+    """
+    def __init__(self, configuration_file, directory, label=None,
+                 error=None, elapsed=0.0):
+        """
+        Constructor
+        @param label: the schedule label, None if generation failed
+        @param error: the error message, None on success
+        @param elapsed: generation time (sec.)
+        """
+        self.configuration_file = configuration_file
+        self.directory = directory
+        self.label = label
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __str__(self):
+        if self.ok:
+            return "OK %s -> %s (%.2fs)" % (self.configuration_file,
+                                           os.path.join(self.directory,
+                                                        self.label),
+                                           self.elapsed)
+        return "FAILED %s: %s" % (self.configuration_file, self.error)
+
+def generate_schedule(configuration_file, directory, jobs=1, columnar=False,
+                      incremental=False, store=None, scan_cache=None,
+                      profiler=None):
+    """
+    Validate a configuration file with its targets file and write the
+    schedule files
+    @param configuration_file: the user configuration file
+    @param directory: output directory of the schedule files
+    @param jobs: number of processes parsing targets and generating scans
+    @param columnar: write through a columnar subscan table
+    @param incremental: reuse the scans cached in the output directory
+    @param store: project database file, if not None the schedule is saved
+    in it and written reusing the stored scans
+    @param scan_cache: scan cache shared with other schedules
+    @type scan_cache: L{scanmode.cache.ScanCache}
+    @param profiler: if not None, measures the generation phases and scans
+    @type profiler: L{profiling.Profiler}
+    @return: the schedule
+    @raise IOError: if the configuration file does not exist
+    """
+    with _phase(profiler, "imports"):
+        from . import schedule, rich_validator, target_parser, target_table
+        from . import fragment_cache, project_store
+        from .radiotelescopes import radiotelescopes
+
+    configuration_file = os.path.abspath(configuration_file)
+    if not os.path.exists(configuration_file):
+        raise IOError("cannot find file %s" % configuration_file)
+    logger.info("generating schedule from user input file: {0}".format(configuration_file))
+    src_directory = os.path.dirname(configuration_file)
+    dst_directory = os.path.abspath(directory)
+    with _phase(profiler, "validation"):
+        conf = rich_validator.validate_configuration(configuration_file)
+    #setting target file in the same directory as schedule file
+    targetsFile = os.path.join(src_directory, conf.pop('targetsFile'))
+    with _phase(profiler, "parsing"):
+        if target_table.is_table_file(targetsFile):
+            parsed_targets = target_table.parse_table(targetsFile)
+        else:
+            parsed_targets = target_parser.parse_file(targetsFile, jobs=jobs)
+    logger.debug("parsed targets: %s" % (parsed_targets,))
+    #prepare Schedule contructor arguments
+    schedule_params = conf
+    radiotelescope_name = conf.pop("radiotelescope").upper()
+    radiotelescope = radiotelescopes[radiotelescope_name]
+    try:
+        receiver = radiotelescope.receivers[conf["receiver"]]
+    except:
+        raise ScheduleError("radiotelescope does not have specified receiver")
+    schedule_params["radiotelescope"] = radiotelescope_name
+    schedule_params.receiver = receiver
+    backends = schedule_params.pop("backends")
+    scantypes = schedule_params.pop("scantypes")
+    logger.debug(schedule_params)
+    with _phase(profiler, "scans"):
+        _schedule = schedule.Schedule(**schedule_params)
+        _schedule.backends = backends
+        _schedule.scantypes = scantypes
+        for _target, _scanmode, _backend, _  in parsed_targets:
+            _schedule.add_scan(_target, _scanmode, _backend)
+    _schedule.set_base_dir(dst_directory)
+    _schedule.set_profiler(profiler)
+    if scan_cache is not None:
+        _schedule.set_scan_cache(scan_cache)
+    if incremental:
+        _schedule.set_fragment_cache(fragment_cache.FragmentCache(
+            os.path.join(dst_directory,
+                         fragment_cache.FRAGMENT_CACHE_DIR)))
+    with _phase(profiler, "writing"):
+        if store:
+            with project_store.ProjectStore(store) as _store:
+                _store.save(_schedule.label, _schedule, dict(conf))
+                _store.write(_schedule.label, jobs)
+        else:
+            _schedule._write_schedule_files(jobs, columnar)
+    _schedule.set_profiler(None)
+    return _schedule
+
+def _phase(profiler, name):
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
+
+def read_manifest(filename, directory="."):
+    """
+    @param directory: default output directory
+    @return: list of (configuration file, output directory) couples
+    @raise ScheduleError: if a line has more than two fields
+    """
+    base = os.path.dirname(os.path.abspath(filename))
+    entries = []
+    with open(filename, "rt") as manifest:
+        for number, line in enumerate(manifest, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split()
+            if len(fields) > 2:
+                raise ScheduleError("%s line %d: expected configuration file and output directory" %
+                                    (filename, number))
+            configuration_file = os.path.join(base, fields[0])
+            if len(fields) == 2:
+                entries.append((configuration_file,
+                                os.path.join(base, fields[1])))
+            else:
+                entries.append((configuration_file, directory))
+    return entries
+
+def _run_entry(entry, options):
+    """
+    Generate one schedule, errors are returned in the result
+    @return: a L{BatchResult}
+    """
+    from .scanmode.cache import PROCESS_CACHE
+    configuration_file, directory = entry
+    start = time.time()
+    try:
+        _schedule = generate_schedule(configuration_file, directory,
+                                      scan_cache=PROCESS_CACHE, **options)
+    except Exception as e:
+        logger.debug("schedule %s failed" % (configuration_file,),
+                     exc_info=True)
+        return BatchResult(configuration_file, directory,
+                           error="%s: %s" % (e.__class__.__name__, e),
+                           elapsed=time.time() - start)
+    return BatchResult(configuration_file, directory, _schedule.label,
+                       elapsed=time.time() - start)
+
+def run_batch(entries, workers=1, **options):
+    """
+    Generate many schedules, keyword options are passed to
+    L{generate_schedule}
+    @param entries: (configuration file, output directory) couples
+    @param workers: number of processes generating schedules
+    @return: iterator of L{BatchResult}, in entries order
+    @raise ScheduleError: if a project store is used by many workers, it can
+    be opened by one process at a time
+    """
+    if workers > 1 and options.get("store"):
+        raise ScheduleError("a project store cannot be shared by %d workers" %
+                            (workers,))
+    if workers <= 1:
+        for entry in entries:
+            yield _run_entry(entry, options)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_entry, entry, options)
+                   for entry in entries]
+        for entry, future in zip(entries, futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                #the worker process died
+                yield BatchResult(entry[0], entry[1],
+                                  error="%s: %s" % (e.__class__.__name__, e))
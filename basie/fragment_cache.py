@@ -0,0 +1,199 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+On disk cache of rendered scans, used for incremental schedule generation.
+A L{ScanFragment} contains the .scd and .lis lines of a scan with subscan IDs
+stored relative to the first ID of the scan, so that it can be written again
+at any position of a schedule. Fragments are stored in a L{FragmentCache}
+directory, keyed by a digest of the scan contents: target, scan mode
+configuration, receiver, backend, frequencies and the schedule parameters
+adding scan procedures.
+
+exported classes:
+    - ScanFragment
+    - FragmentCache
+exported constants:
+    - FRAGMENT_CACHE_DIR
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+
+from persistent import Persistent
+
+from . import VERSION
+from .scanmode.cache import key_state
+
+FRAGMENT_CACHE_DIR = ".basie_cache"
+"""
+CONSTANT. Default name of the fragments directory
+"""
+
+FRAGMENT_FORMAT = 3
+"""
+CONSTANT. Version of the fragment format, part of the cache keys
+"""
+
+def _class_name(obj):
+    return "%s.%s" % (obj.__class__.__module__, obj.__class__.__qualname__)
+
+class ScanFragment(Persistent):
+    """
+    The rendered subscans of a scan
+    """
+    def __init__(self, first_id):
+        """
+        Constructor
+        @param first_id: the first subscan ID allocated for the scan
+        """
+        self.first_id = first_id
+        self.id_count = 0
+        self.scd_lines = [] #(subscan number, duration, ID, procedures)
+        self.lis_lines = [] #(ID, skydip target ID or None, line tail)
+        self.procedures = set()
+
+    def add_scd(self, subscan_number, _subscan):
+        """
+        Add a subscan line of the .scd file
+        """
+        self.procedures.add(_subscan.pre_procedure)
+        self.procedures.add(_subscan.post_procedure)
+        self.scd_lines.append((subscan_number,
+                               "%f" % (_subscan.duration,),
+                               _subscan.ID - self.first_id,
+                               "%s\t%s" % (_subscan.pre_procedure.execute(),
+                                           _subscan.post_procedure.execute())))
+
+    def add_lis(self, _subscan, line):
+        """
+        Add a subscan line of the .lis file
+        @param line: the subscan representation
+        """
+        _, tail = line.split("\t", 1)
+        if tail.startswith("SKYDIP\t"):
+            _, _, tail = tail.split("\t", 2)
+            self.lis_lines.append((_subscan.ID - self.first_id,
+                                   _subscan.target - self.first_id,
+                                   tail))
+        else:
+            self.lis_lines.append((_subscan.ID - self.first_id, None, tail))
+
+    def close(self, next_id):
+        """
+        Complete the fragment once all its subscans are added
+        @param next_id: the next ID of the allocator used for the scan
+        """
+        self.id_count = next_id - self.first_id
+
+    def write(self, scdfile, lisfile, scan_number, label, first_id):
+        """
+        Write the fragment as the scan_number scan, with subscan IDs starting
+        from first_id
+        """
+        scdfile.writelines("%d_%d\t%s\t%d\t%s\n" %
+                           (scan_number, subscan_number, duration,
+                            first_id + _id, procs)
+                           for subscan_number, duration, _id, procs
+                           in self.scd_lines)
+        lisfile.write("#%s\n" % (label,))
+        for _id, target_id, tail in self.lis_lines:
+            if target_id is None:
+                lisfile.write("%d\t%s\n" % (first_id + _id, tail))
+            else:
+                lisfile.write("%d\tSKYDIP\t%d\t%s\n" % (first_id + _id,
+                                                        first_id + target_id,
+                                                        tail))
+
+class FragmentCache(object):
+    """
+    Directory of L{ScanFragment} files
+    """
+    def __init__(self, directory):
+        """
+        Constructor
+        @param directory: the cache directory, created when needed
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(_scan, *params):
+        """
+        Content digest of a scan
+        @param params: schedule parameters affecting the scan rendering
+        @return: the cache key
+        @rtype: str
+        """
+        digest = hashlib.sha1()
+        #components are pickled one by one, so that objects shared among
+        #them do not change the digest
+        #scan modes are keyed on their class and configuration, see
+        #L{key_state}
+        for item in ((FRAGMENT_FORMAT, VERSION, params),) + \
+                    tuple(sorted((name, _class_name(value), key_state(value))
+                                 for name, value in key_state(_scan).items())):
+            digest.update(pickle.dumps(item, protocol=4))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def get(self, key):
+        """
+        @return: the cached fragment, None if key is not cached or its file
+        cannot be read
+        """
+        try:
+            with open(self._path(key), "rb") as _file:
+                fragment = pickle.load(_file)
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning("discarding fragment %s: %s" % (key, e))
+            self.misses += 1
+            return None
+        self.hits += 1
+        return fragment
+
+    def put(self, key, fragment):
+        """
+        Store a fragment, files are replaced atomically
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as _file:
+            pickle.dump(fragment, _file, protocol=4)
+        os.replace(tmp, self._path(key))
+
+    def clear(self):
+        """
+        Remove all the cached fragments
+        """
+        for path in glob.glob(os.path.join(self.directory, "*.pkl")):
+            os.remove(path)
@@ -25,6 +25,9 @@ systems.
 exported classes:
     - Frame - a coordinate frame
     - Coord - coordinates with a frame
+exported functions:
+    - transform_arrays - vectorized EQ/GAL conversion of angle arrays
+    - transform_coords - batch conversion of Coord objects
 exported constants:
     - frames
     - EQ, GAL, HOR
@@ -34,9 +37,10 @@ exported constants:
 from builtins import object
 import logging
 logger = logging.getLogger(__name__)
-import copy
 
+import numpy as np
 from astropy import coordinates as coord
+from astropy import units as u
 
 from .valid_angles import VAngle, ZERO_ANGLE
 from .errors import *
@@ -173,6 +177,22 @@ class Coord(object):
     def __repr__(self):
         return self.__str__()
 
+    def _operand(self, other):
+        """
+        Frame of the sum with other and components of other in that frame,
+        other is not modified. Celestial frames are converted with the
+        rotation matrix of L{transform_arrays}.
+        @return: (frame, lon, lat)
+        @raise CoordinateError: if frames cannot be converted
+        """
+        if self.frame == NULL:
+            return other.frame, other.lon, other.lat
+        if other.frame == NULL or other.frame == self.frame:
+            return self.frame, other.lon, other.lat
+        _lon, _lat = transform_arrays([other.lon.deg], [other.lat.deg],
+                                      other.frame, self.frame, fast=True)
+        return self.frame, VAngle(_lon[0]), VAngle(_lat[0])
+
     def __add__(self, other):
         if not isinstance(other, Coord):
             raise CoordinateError("cannot sum Coord with object of type: %s" %
@@ -181,16 +201,10 @@ class Coord(object):
             return other
         if other.is_null():
             return self
-        _other = copy.deepcopy(other)
-        if self.frame == NULL:
-            dest_frame = other.frame
-        else:
-            dest_frame = self.frame
-            if not _other.frame == NULL:
-                _other.transform(self.frame)
+        dest_frame, _lon, _lat = self._operand(other)
         return Coord(dest_frame, 
-                     self.lon + _other.lon,
-                     self.lat + _other.lat)
+                     self.lon + _lon,
+                     self.lat + _lat)
 
     def __sub__(self, other):
         if not isinstance(other, Coord):
@@ -200,16 +214,10 @@ class Coord(object):
             return other
         if other.is_null():
             return self
-        _other = copy.deepcopy(other)
-        if self.frame == NULL:
-            dest_frame = other.frame
-        else:
-            dest_frame = self.frame
-            if not _other.frame == NULL:
-                _other.transform(self.frame)
+        dest_frame, _lon, _lat = self._operand(other)
         return Coord(dest_frame, 
-                     self.lon - _other.lon,
-                     self.lat - _other.lat)
+                     self.lon - _lon,
+                     self.lat - _lat)
 
     def is_null(self):
         """
@@ -233,27 +241,98 @@ class Coord(object):
                                                               dest_frame.name))
         if dest_frame == self.frame:
             return #nothing to do 
-        legal = True
-        #astro_coord = self.frame.allocator(self.lon, self.lat)
-        astro_coord = coord.SkyCoord(self.lon, self.lat, frame=self.frame.allocator)
-        if self.frame == EQ:
-            if dest_frame == GAL:
-                self.lon = VAngle(astro_coord.galactic.data.lon)
-                self.lat = VAngle(astro_coord.galactic.data.lat)
-                self.frame = GAL
-            else:
-                legal = False
-        elif self.frame == GAL:
-            if dest_frame == EQ:
-                self.lon = VAngle(astro_coord.icrs.data.lon)
-                self.lat = VAngle(astro_coord.icrs.data.lat)
-                self.frame = EQ
-            else:
-                legal = False
-        else: #self.frame == frame.HOR
-            legal = False #cannot convert to celestial coordinates without date
-        if not legal:
-            msg = "inconsistent coordinate or offset frame pairing: %s and %s" % (self.frame.name, dest_frame.name,)
-            raise CoordinateError(msg)
+        _lon, _lat = transform_arrays([self.lon.deg], [self.lat.deg],
+                                      self.frame, dest_frame)
+        self.lon = VAngle(_lon[0])
+        self.lat = VAngle(_lat[0])
+        self.frame = dest_frame
+
+def _check_celestial(src_frame, dest_frame):
+    if not (src_frame in (EQ, GAL) and dest_frame in (EQ, GAL)):
+        #cannot convert horizontal coordinates without date
+        msg = "inconsistent coordinate or offset frame pairing: %s and %s" % (src_frame.name, dest_frame.name,)
+        raise CoordinateError(msg)
+
+_ICRS_TO_GALACTIC = None
+
+def _rotation_matrix(src_frame, dest_frame):
+    """
+    Get the fixed rotation matrix between celestial frames, the matrix is
+    computed by astropy the first time it is needed.
+    """
+    global _ICRS_TO_GALACTIC
+    if _ICRS_TO_GALACTIC is None:
+        _basis = coord.SkyCoord(coord.CartesianRepresentation(np.eye(3)),
+                                frame=coord.ICRS)
+        _ICRS_TO_GALACTIC = _basis.galactic.cartesian.xyz.value
+    if src_frame == EQ:
+        return _ICRS_TO_GALACTIC
+    else:
+        return _ICRS_TO_GALACTIC.T
+
+def transform_arrays(lon, lat, src_frame, dest_frame, fast=False):
+    """
+    Conversion of arrays of coordinates between EQ and GAL frames with a
+    single vectorized call.
+    @param lon: longitudes (deg)
+    @param lat: latitudes (deg)
+    @param src_frame: the input frame system
+    @param dest_frame: the output frame system
+    @param fast: if True apply directly the fixed ICRS-Galactic rotation matrix
+    with numpy, results agree with astropy well below formatting precision
+    @return: (lon, lat) arrays (deg)
+    @raise CoordinateError: if frames cannot be converted
+    """
+    lon = np.array(lon, dtype=float, ndmin=1)
+    lat = np.array(lat, dtype=float, ndmin=1)
+    if dest_frame == src_frame:
+        return lon, lat
+    _check_celestial(src_frame, dest_frame)
+    if fast:
+        _lon = np.radians(lon)
+        _lat = np.radians(lat)
+        _cos_lat = np.cos(_lat)
+        x, y, z = np.dot(_rotation_matrix(src_frame, dest_frame),
+                         [_cos_lat * np.cos(_lon),
+                          _cos_lat * np.sin(_lon),
+                          np.sin(_lat)])
+        lon = np.degrees(np.arctan2(y, x)) % 360.0
+        lon[lon >= 360.0] -= 360.0
+        lat = np.degrees(np.arctan2(z, np.hypot(x, y)))
+        return lon, lat
+    astro_coord = coord.SkyCoord(coord.Angle(lon, unit=u.deg),
+                                 coord.Angle(lat, unit=u.deg),
+                                 frame=src_frame.allocator)
+    if dest_frame == GAL:
+        data = astro_coord.galactic.data
+    else:
+        data = astro_coord.icrs.data
+    return data.lon.to_value(u.deg), data.lat.to_value(u.deg)
+
+def transform_coords(coords, dest_frame, fast=False):
+    """
+    Batch version of L{Coord.transform}: coordinates are converted in place,
+    grouped by frame, with one vectorized call per group.
+    @param coords: Coord instances
+    @param dest_frame: the output frame system
+    @param fast: use the numpy rotation matrix, see L{transform_arrays}
+    @return: the list of transformed coordinates
+    @raise CoordinateError: if some coordinate cannot be converted
+    """
+    coords = list(coords)
+    groups = {}
+    for c in coords:
+        if not c.frame == dest_frame:
+            _check_celestial(c.frame, dest_frame)
+            groups.setdefault(c.frame.name, []).append(c)
+    for name, group in groups.items():
+        _lon, _lat = transform_arrays([c.lon.deg for c in group],
+                                      [c.lat.deg for c in group],
+                                      frames[name], dest_frame, fast)
+        for c, lon, lat in zip(group, _lon.tolist(), _lat.tolist()):
+            c.lon = VAngle(lon)
+            c.lat = VAngle(lat)
+            c.frame = dest_frame
+    return coords
 
 NULL_COORD = Coord(NULL, ZERO_ANGLE, ZERO_ANGLE)
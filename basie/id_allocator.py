@@ -0,0 +1,85 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Deterministic allocation of the subscan IDs written in schedule files.
+Each schedule owns its allocator and passes it down to scans and subscans,
+so that IDs do not depend on objects created elsewhere in the process.
+
+exported classes:
+    - IDAllocator
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+from .errors import ScheduleError
+
+class IDAllocator(object):
+    """
+    Generates consecutive integer IDs. A range of IDs can be reserved in
+    advance and handed to a different allocator with L{reserve}.
+    """
+    def __init__(self, first=1, stop=None):
+        """
+        Constructor
+        @param first: the first ID returned
+        @param stop: if not None, IDs are limited to the range [first, stop)
+        """
+        self.next_id = first
+        self.stop = stop
+
+    def __repr__(self):
+        return "IDAllocator(%d, %s)" % (self.next_id, self.stop)
+
+    @property
+    def remaining(self):
+        """
+        Number of IDs still available, None if the allocator is unbounded
+        """
+        if self.stop is None:
+            return None
+        return self.stop - self.next_id
+
+    def allocate(self):
+        """
+        @return: the next ID
+        @raise ScheduleError: if the reserved range is exhausted
+        """
+        if self.stop is not None and self.next_id >= self.stop:
+            raise ScheduleError("ID range exhausted: %r" % (self,))
+        _id = self.next_id
+        self.next_id += 1
+        return _id
+
+    def reserve(self, count):
+        """
+        Reserve the next count IDs
+        @param count: number of reserved IDs
+        @return: a new IDAllocator limited to the reserved range
+        @raise ScheduleError: if the range does not fit into this allocator
+        """
+        if count < 0:
+            raise ScheduleError("cannot reserve a negative number of IDs")
+        first = self.next_id
+        if self.stop is not None and first + count > self.stop:
+            raise ScheduleError("cannot reserve %d IDs from %r" % (count, self))
+        self.next_id += count
+        return IDAllocator(first, first + count)
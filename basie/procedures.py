@@ -22,8 +22,6 @@ from __future__ import absolute_import
 from builtins import str
 from builtins import object
 import re
-import copy
-import functools
 
 from .errors import *
 
@@ -59,7 +57,9 @@ class Procedure(object):
         >>> myproc(10)  
         \'MYP=10\'
 
-
+    Procedures are immutable. Sums and specializations are interned, see
+    L{get_procedure}, so that equal results are the same object, and their
+    execute() string is rendered once.
     """
     def __init__(self, name, nparams, body, spec=False):
         """
@@ -74,25 +74,40 @@ class Procedure(object):
         self.nparams = nparams
         self.body = body
         self._spec = spec
+        self.args = None #specialization arguments
+        self._init_cache()
 
-    def execute(self, *args):
-        """
-        Used to get the procedure syntax as it has to be called from within the
-        .scd schedule file
-        """
+    def _init_cache(self):
+        self._key = (self.name, self.nparams, self.body, self._spec)
+        self._hash = hash(self._key[:3])
+        self._null = (self.nparams == 0) and (self.body == "")
+        if self.args is not None:
+            self._rendered = self._render(self.args)
+        elif self.nparams == 0:
+            self._rendered = self._render(())
+        else:
+            self._rendered = None
+
+    def _render(self, args):
         if not len(args) == self.nparams:
             raise TypeError("Procedure %s takes exactly %d params (%d given)" %
                             (self.name, self.nparams, len(args)))
         res = PROC_PREFIX + self.name
         if self.nparams > 0:
-            res += '=' 
-            for _arg in args:
-                res += str(_arg) + ","
-            res = res[:-1]
+            res += '=' + ",".join(str(_arg) for _arg in args)
         return res
 
+    def execute(self, *args):
+        """
+        Used to get the procedure syntax as it has to be called from within the
+        .scd schedule file
+        """
+        if not args and self._rendered is not None:
+            return self._rendered
+        return self._render(args)
+
     def is_null(self):
-        return ((self.nparams == 0) and (self.body == ""))
+        return self._null
 
     def __str__(self):
         """
@@ -108,10 +123,16 @@ class Procedure(object):
         return res
 
     def __add__(self, other):
-        if other.is_null(): #caso degenere
+        if other._null: #caso degenere
             return self
-        if self.is_null():
+        if self._null:
             return other
+        #specialization arguments do not take part in sums
+        key = (self._key, other._key)
+        try:
+            return _SUMS[key]
+        except KeyError:
+            pass
         res_name = "%s_%s" % (self.name, other.name)
         res_nparams = self.nparams + other.nparams
         if self.nparams > 0 and other.nparams > 0:
@@ -123,79 +144,128 @@ class Procedure(object):
             res_spec = True
         else:
             res_spec = False
-        return Procedure(res_name, res_nparams, res_body, res_spec)
+        res = get_procedure(res_name, res_nparams, res_body, res_spec)
+        _SUMS[key] = res
+        return res
 
     def __eq__(self, other):
-        return type(self) == type(other) and self.body == other.body and self.nparams == other.nparams and self.name == other.name
+        return self is other or (type(self) == type(other) and
+                                 self._hash == other._hash and
+                                 self._key[:3] == other._key[:3])
 
     def __hash__(self):
         """
         Redefined for correct inclusion into set objects.
         """
-        return hash((self.name, self.nparams, self.body))
+        return self._hash
 
     def __call__(self, *args):
         if self._spec:
-            res = copy.deepcopy(self)
-            if not hasattr(res.execute, "args"):
-                res.execute = functools.partial(self.execute, *args)
+            key = (self._key, args)
+            try:
+                return _SPECIALIZED[key]
+            except KeyError:
+                pass
+            except TypeError: #unhashable arguments
+                key = None
+            res = Procedure.__new__(type(self))
+            res.__dict__.update(self.__dict__)
             res._spec = False
+            res.args = args
+            res._init_cache()
+            if key is not None:
+                _SPECIALIZED[key] = res
             return res
         else:
             raise ProcedureError("Procedure %s cannot be specialized" % self.name)
 
-ZEROOFF = Procedure("ZEROOFF", 0, "\tazelOffsets=0.0d,0.0d\n\tradecOffsets=0.0d,0.0d\n\tlonlatOffsets=0.0d,0.0d\n", True)
+    def __reduce__(self):
+        #unpickled procedures are interned too
+        return (_restore_procedure,
+                (self.name, self.nparams, self.body, self._spec, self.args))
+
+    def __setstate__(self, state):
+        #procedures pickled by previous versions store a partial execute
+        state = dict(state)
+        execute = state.pop("execute", None)
+        state.setdefault("args", getattr(execute, "args", None))
+        self.__dict__.update(state)
+        self._init_cache()
+
+_PROCEDURES = {} #(name, nparams, body, spec) -> procedure
+_SUMS = {} #(key, key) -> procedure
+_SPECIALIZED = {} #(key, args) -> procedure
+
+def get_procedure(name, nparams, body, spec=False):
+    """
+    Get the interned procedure with these contents, creating it if needed.
+    Parameters are the ones of the L{Procedure} constructor.
+    @return: the L{Procedure}
+    """
+    key = (name.upper(), nparams, body, spec)
+    try:
+        return _PROCEDURES[key]
+    except KeyError:
+        return _PROCEDURES.setdefault(key,
+                                      Procedure(name, nparams, body, spec))
+
+def _restore_procedure(name, nparams, body, spec, args):
+    if args is None:
+        return get_procedure(name, nparams, body, spec)
+    return get_procedure(name, nparams, body, True)(*args)
+
+ZEROOFF = get_procedure("ZEROOFF", 0, "\tazelOffsets=0.0d,0.0d\n\tradecOffsets=0.0d,0.0d\n\tlonlatOffsets=0.0d,0.0d\n", True)
 """
 Standard procedure used to put offsets to zero
 """
-FTRACK = Procedure("FTRACK", 1, "\tfTrack=$1\n", True)
+FTRACK = get_procedure("FTRACK", 1, "\tfTrack=$1\n", True)
 """
 Standard B{ftrack} procedure
 """
-FTRACKLO = Procedure("FTRACKLO", 0, "\tfTrack=LO\n", True)
-FTRACKALL = Procedure("FTRACKALL", 0, "\tfTrack=ALL\n", True)
+FTRACKLO = get_procedure("FTRACKLO", 0, "\tfTrack=LO\n", True)
+FTRACKALL = get_procedure("FTRACKALL", 0, "\tfTrack=ALL\n", True)
 
-RSTFREQ = Procedure("restFrequency", 1, "\trestFrequency=$1\n", True)
+RSTFREQ = get_procedure("restFrequency", 1, "\trestFrequency=$1\n", True)
 """
 Standard B{restFrequency} procedure
 """
 
-DEROTATOR = Procedure("DEROTATOR", 1, "\tderotatorSetConfiguration=$1\n", True)
+DEROTATOR = get_procedure("DEROTATOR", 1, "\tderotatorSetConfiguration=$1\n", True)
 """
 Standard B{derotator} procedure for configuration setup
 """
 
 #TODO: correct procedure sum and remove these two
 #TODO: should we set derotator position to 0?
-DEROTATORFIXED = Procedure("DEROTATORFIXED", 0, "\tderotatorSetConfiguration=FIXED\n\tderotatorSetPosition=0d\n", True)
-DEROTATORBSC = Procedure("DEROTATORBSC", 0, "\tderotatorSetConfiguration=BSC\n", True)
+DEROTATORFIXED = get_procedure("DEROTATORFIXED", 0, "\tderotatorSetConfiguration=FIXED\n\tderotatorSetPosition=0d\n", True)
+DEROTATORBSC = get_procedure("DEROTATORBSC", 0, "\tderotatorSetConfiguration=BSC\n", True)
 
-WAIT = Procedure("WAIT", 1, "\twait=$1\n", True)
+WAIT = get_procedure("WAIT", 1, "\twait=$1\n", True)
 """
 Standard B{wait} procedure
 """
 
-TSYS = Procedure("TSYS", 0, "\twait=%f\n\ttsys\n\twait=1\n" % (TSYS_WAIT_TIME,))
+TSYS = get_procedure("TSYS", 0, "\twait=%f\n\ttsys\n\twait=1\n" % (TSYS_WAIT_TIME,))
 """
 Standard B{tsys} procedure
 """
 
-INIT = Procedure("INIT", 0, "\tnop\n")
+INIT = get_procedure("INIT", 0, "\tnop\n")
 """
 Standard B{init} procedure
 """
 
-CALON = Procedure("CALON", 0, "\tcalOn\n")
+CALON = get_procedure("CALON", 0, "\tcalOn\n")
 """
 Standard B{calon} procedure
 """
 
-CALOFF = Procedure("CALOFF", 0, "\tcalOff\n")
+CALOFF = get_procedure("CALOFF", 0, "\tcalOff\n")
 """
 Standard B{caloff} procedure
 """
 
-NULL = Procedure("NULL", 0, "")
+NULL = get_procedure("NULL", 0, "")
 """
 Standard B{null} procedure
 """
@@ -0,0 +1,270 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Profiling of schedule generation. A L{Profiler} records wall time, CPU time
+and peak memory of each generation phase (configuration validation, target
+parsing, scan creation, file writing) and of each scan, splitting the time
+spent expanding subscans in L{ScanMode.do_scan<scanmode.ScanMode.do_scan>}
+from the time spent formatting them. The report is written as JSON, the
+optional cProfile statistics can be read with the pstats module.
+
+Memory is measured with tracemalloc: peaks are the maximum memory allocated
+by python during a measure, above the memory allocated when it started.
+Tracing allocations slows down generation, times are meant to be compared
+among each other.
+
+exported classes:
+    - Measure
+    - Profiler
+exported constants:
+    - REPORT_SLOWEST
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+REPORT_SLOWEST = 10
+"""
+CONSTANT. Number of slowest scans listed in the report
+"""
+
+class Measure(object):
+    """
+    Wall time, CPU time and peak memory of a block of code
+    """
+    def __init__(self, wall=0.0, cpu=0.0, peak_memory=None):
+        """
+        Constructor
+        @param wall: wall clock time (sec.)
+        @param cpu: CPU time of the process (sec.)
+        @param peak_memory: bytes, None if memory is not traced
+        """
+        self.wall = wall
+        self.cpu = cpu
+        self.peak_memory = peak_memory
+        self._start_memory = None
+        self._peak = None
+
+    def as_dict(self):
+        return dict(wall=self.wall, cpu=self.cpu,
+                    peak_memory=self.peak_memory)
+
+
+class Profiler(object):
+    """
+    Collects the measures of a schedule generation. Measures can be nested,
+    the peak memory of a measure includes the one of its inner measures.
+    Use it as a context manager or call L{start} and L{stop}.
+    """
+    def __init__(self, memory=True, cprofile=False):
+        """
+        Constructor
+        @param memory: trace memory allocations
+        @param cprofile: collect cProfile statistics of the profiled process
+        """
+        self.memory = memory
+        self.phases = [] #(name, measure)
+        self.scans = [] #scan records
+        self._expansions = {} #id(scan) -> (measure, source)
+        self._open = [] #stack of running measures
+        self._scan = None #(record, formatting measure) of the current scan
+        self._tracing = False
+        if cprofile:
+            self.cprofile = cProfile.Profile()
+        else:
+            self.cprofile = None
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _traced(self):
+        return self.memory and tracemalloc.is_tracing()
+
+    def _start(self):
+        measure = Measure()
+        if self._traced():
+            #the traced peak is shared, it is reset for each inner measure
+            #after passing it to the outer ones
+            current, peak = tracemalloc.get_traced_memory()
+            for outer in self._open:
+                outer._peak = max(outer._peak, peak)
+            tracemalloc.reset_peak()
+            measure._start_memory = measure._peak = current
+        self._open.append(measure)
+        measure.wall = time.perf_counter()
+        measure.cpu = time.process_time()
+        return measure
+
+    def _stop(self, measure):
+        measure.wall = time.perf_counter() - measure.wall
+        measure.cpu = time.process_time() - measure.cpu
+        self._open.remove(measure)
+        if measure._start_memory is not None and self._traced():
+            measure._peak = max(measure._peak,
+                                tracemalloc.get_traced_memory()[1])
+            measure.peak_memory = measure._peak - measure._start_memory
+            for outer in self._open:
+                outer._peak = max(outer._peak, measure._peak)
+        return measure
+
+    @contextmanager
+    def measure(self):
+        """
+        Measure the enclosed block
+        @return: the L{Measure}, filled in at the end of the block
+        """
+        measure = self._start()
+        try:
+            yield measure
+        finally:
+            self._stop(measure)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measure a generation phase
+        """
+        with self.measure() as measure:
+            yield measure
+        self.phases.append((name, measure))
+
+    @contextmanager
+    def expansion(self, _scan):
+        """
+        Measure the subscans expansion of a scan in this process
+        """
+        with self.measure() as measure:
+            yield measure
+        self._expansions[id(_scan)] = (measure, "do_scan")
+
+    def add_expansion(self, _scan, wall, cpu, source="worker"):
+        """
+        Record the subscans expansion of a scan measured elsewhere
+        """
+        self._expansions[id(_scan)] = (Measure(wall, cpu), source)
+
+    def start_scan(self, scan_number, _scan, fragment=False):
+        """
+        Start measuring the formatting of a scan, the previous scan must be
+        stopped
+        @param fragment: True if the scan is copied from a cached fragment
+        """
+        if self._scan is not None:
+            raise RuntimeError("scan %d is still being measured" %
+                               (self._scan[0]["number"],))
+        expansion, source = self._expansions.pop(id(_scan),
+                                                 (Measure(), "scan cache"))
+        if fragment:
+            source = "fragment cache"
+        record = dict(number=scan_number,
+                      target=_scan.target.label,
+                      scanmode=_scan.scanmode.name,
+                      type=_scan.scanmode.__class__.__name__,
+                      source=source,
+                      do_scan=expansion.as_dict())
+        self._scan = (record, self._start())
+
+    def stop_scan(self, subscans):
+        """
+        Stop measuring the current scan
+        @param subscans: number of written subscans
+        """
+        record, formatting = self._scan
+        self._scan = None
+        record["subscans"] = subscans
+        record["formatting"] = self._stop(formatting).as_dict()
+        self.scans.append(record)
+
+    def slowest(self, count=REPORT_SLOWEST):
+        """
+        @return: the scan records taking the longest wall time
+        """
+        return sorted(self.scans,
+                      key=lambda s: s["do_scan"]["wall"] +
+                                    s["formatting"]["wall"],
+                      reverse=True)[:count]
+
+    def report(self):
+        """
+        @return: the profiling report as a dictionary
+        """
+        totals = dict(scans=len(self.scans),
+                      subscans=sum(s["subscans"] for s in self.scans))
+        for part in ("do_scan", "formatting"):
+            totals[part] = dict(wall=sum(s[part]["wall"] for s in self.scans),
+                                cpu=sum(s[part]["cpu"] for s in self.scans))
+        return dict(phases=[dict(name=name, **measure.as_dict())
+                            for name, measure in self.phases],
+                    totals=totals,
+                    slowest=[s["number"] for s in self.slowest()],
+                    scans=self.scans)
+
+    def write_report(self, filename):
+        with open(filename, "wt") as report:
+            json.dump(self.report(), report, indent=2)
+            report.write("\n")
+        logger.info("profiling report written to %s" % (filename,))
+
+    def dump_stats(self, filename):
+        """
+        Write the cProfile statistics
+        """
+        if self.cprofile is None:
+            raise ValueError("cProfile statistics were not collected")
+        self.cprofile.dump_stats(filename)
+        logger.info("profiling statistics written to %s" % (filename,))
+
+    def summary(self, count=5):
+        """
+        @return: a text summary of phases and slowest scans
+        """
+        lines = []
+        for name, measure in self.phases:
+            lines.append("%-12s wall %8.3fs cpu %8.3fs" %
+                         (name, measure.wall, measure.cpu))
+        for s in self.slowest(count):
+            lines.append("scan %d %s (%s, %d subscans): do_scan %.3fs, formatting %.3fs" %
+                         (s["number"], s["target"], s["type"], s["subscans"],
+                          s["do_scan"]["wall"], s["formatting"]["wall"]))
+        return "\n".join(lines)
@@ -0,0 +1,226 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+ZODB project store.
+Projects are kept in a FileStorage database and contain the validated
+configuration, the schedule with its scans and the rendered scans generated
+by previous writes. Stored schedules can be loaded, edited in a transaction
+and written again, regenerating only the scans changed since the last write.
+
+    >>> with ProjectStore("campaign.fs") as store:
+    ...     store.save("myproject", _schedule, configuration)
+    ...     with store.edit("myproject") as _schedule:
+    ...         _schedule.scans[0].target.label = "NEW"
+    ...     store.write("myproject")
+
+exported classes:
+    - Project
+    - ProjectFragmentCache
+    - ProjectStore
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+import contextlib
+import copy
+import datetime
+
+import transaction
+import ZODB
+import ZODB.FileStorage
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+from persistent.mapping import PersistentMapping
+
+from .errors import ScheduleError
+from .fragment_cache import FragmentCache
+
+class Project(Persistent):
+    """
+    A stored schedule
+    """
+    def __init__(self, name, _schedule, configuration=None):
+        """
+        Constructor
+        @param _schedule: the schedule
+        @type _schedule: L{schedule.Schedule}
+        @param configuration: the validated configuration
+        """
+        self.name = name
+        self.schedule = _schedule
+        self.configuration = PersistentMapping(configuration or {})
+        self.fragments = OOBTree() #rendered scans by content digest
+        self.last_written = None
+
+class ProjectFragmentCache(FragmentCache):
+    """
+    L{FragmentCache} storing fragments in a project
+    """
+    def __init__(self, fragments):
+        """
+        Constructor
+        @param fragments: the project fragments mapping
+        """
+        FragmentCache.__init__(self, None)
+        self.fragments = fragments
+        self.used = set()
+
+    def get(self, key):
+        fragment = self.fragments.get(key)
+        if fragment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.used.add(key)
+        return fragment
+
+    def put(self, key, fragment):
+        self.fragments[key] = fragment
+        self.used.add(key)
+
+    def prune(self):
+        """
+        Remove the fragments not used since the cache creation
+        """
+        for key in [k for k in self.fragments.keys() if not k in self.used]:
+            del self.fragments[key]
+
+    def clear(self):
+        self.fragments.clear()
+
+class ProjectStore(object):
+    """
+    A FileStorage database of projects
+    """
+    def __init__(self, filename):
+        """
+        Constructor. Opens the database, creating it if needed.
+        @param filename: the FileStorage file
+        """
+        self.filename = filename
+        self.transaction_manager = transaction.TransactionManager()
+        self.db = ZODB.DB(ZODB.FileStorage.FileStorage(filename))
+        self.connection = self.db.open(self.transaction_manager)
+        root = self.connection.root()
+        if not "projects" in root:
+            root["projects"] = OOBTree()
+            self.transaction_manager.commit()
+        self.projects = root["projects"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Abort pending changes and close the database
+        """
+        self.transaction_manager.abort()
+        self.connection.close()
+        self.db.close()
+
+    def __contains__(self, name):
+        return name in self.projects
+
+    def names(self):
+        """
+        @return: the sorted project names
+        """
+        return list(self.projects.keys())
+
+    def save(self, name, _schedule, configuration=None):
+        """
+        Store a copy of a schedule, replacing any project with the same name.
+        Radiotelescopes and receivers are module objects shared by every
+        schedule, the copy gives the project its own instances.
+        @param configuration: the validated configuration
+        @return: the stored L{Project}
+        """
+        project = Project(name, copy.deepcopy(_schedule), configuration)
+        if name in self.projects:
+            #fragments are keyed by content and still valid
+            project.fragments = self.projects[name].fragments
+        self.projects[name] = project
+        self.transaction_manager.commit()
+        logger.info("saved project %s" % (name,))
+        return project
+
+    def load(self, name):
+        """
+        @return: the stored L{Project}
+        @raise ScheduleError: if the project does not exist
+        """
+        try:
+            return self.projects[name]
+        except KeyError:
+            raise ScheduleError("project %s not found in %s" %
+                                (name, self.filename))
+
+    def remove(self, name):
+        """
+        Remove a project
+        @raise ScheduleError: if the project does not exist
+        """
+        self.load(name)
+        del self.projects[name]
+        self.transaction_manager.commit()
+
+    @contextlib.contextmanager
+    def edit(self, name):
+        """
+        Context manager yielding the schedule of a project. Changes are
+        committed when the block exits, and aborted if it raises.
+        """
+        _schedule = self.load(name).schedule
+        try:
+            yield _schedule
+        except:
+            self.transaction_manager.abort()
+            raise
+        _schedule.last_modified = datetime.datetime.now()
+        self.transaction_manager.commit()
+
+    def write(self, name, jobs=1):
+        """
+        Write the schedule files of a project. Scans unchanged since a
+        previous write are copied from the stored fragments, fragments of
+        scans no longer in the schedule are discarded.
+        @param jobs: number of processes generating scans
+        @return: the L{ProjectFragmentCache} used, reporting hits and misses
+        """
+        project = self.load(name)
+        fragments = ProjectFragmentCache(project.fragments)
+        project.schedule.set_fragment_cache(fragments)
+        try:
+            project.schedule._write_schedule_files(jobs)
+        except:
+            self.transaction_manager.abort()
+            raise
+        finally:
+            project.schedule.set_fragment_cache(None)
+        fragments.prune()
+        project.last_written = datetime.datetime.now()
+        self.transaction_manager.commit()
+        logger.info("written project %s: %d scans regenerated" %
+                    (name, fragments.misses))
+        return fragments
@@ -25,6 +25,7 @@ from builtins import range
 import logging
 logger = logging.getLogger(__name__)
 import math
+import numpy
 from numpy import interp
 from astropy import units as u
 from persistent import Persistent
@@ -35,6 +36,11 @@ from .errors import *
 from .frame import Coord, HOR
 from .procedures import *
 
+BEAMSIZE_CACHE_SIZE = 256
+"""
+CONSTANT. Maximum number of beamsizes cached by each receiver
+"""
+
 class Receiver(Persistent):
     """
     represents a receiver and its characteristics
@@ -76,6 +82,7 @@ class Receiver(Persistent):
                            (self.name,))
             for i in range(self.nfeed - len(self.feed_offsets)):
                 self.feed_offsets.append(Coord(HOR, VAngle(0.0), VAngle(0.0)))
+        self._beamsize_interpolation()
 
     @property
     def nifs(self):
@@ -96,6 +103,7 @@ class Receiver(Persistent):
         self.feed_offsets[feed_number] = Coord(frame,
                                                VAngle(offsets[0]),
                                                VAngle(offsets[1]))
+        self._v_feed_pairs = None
     #   Methods for Nodding mode
     def set_valid_pairs(self, pairs_table):
         """
@@ -112,74 +120,121 @@ class Receiver(Persistent):
             raise ReceiverError("Cannot define valid pairs for nodding with single feed.")
 
         self.feeds_valid_pairs = pairs_table
+        self._v_feed_pairs = None
 
     def get_valid_pairs(self):
         return self.feeds_valid_pairs
 
+    def _feed_pairs(self):
+        """
+        Index of the valid pairs table, built once and rebuilt when the
+        receiver is loaded, the table is replaced or feed offsets change.
+        Offsets are rotated by -angle for each derotator angle, as the
+        feeds are seen on sky.
+        @return: (table, pairs, angles, offsets), pairs maps each valid pair,
+        in ascending feed order, to its derotator angle index; angles lists
+        the derotator angles (deg) in the table order, None if invalid;
+        offsets is an array of rotated feed offsets (deg) indexed by
+        [angle index, feed, lon/lat]
+        @raise ReceiverError: if the valid pairs are not defined
+        """
+        index = getattr(self, "_v_feed_pairs", None)
+        if index is not None and index[0] is self.feeds_valid_pairs:
+            return index
+        if self.feeds_valid_pairs is None:
+            raise ReceiverError("Feed table not properly setted. None is found.")
+        pairs = {}
+        angles = []
+        try:
+            for angle_index, (p, valid_pairs) in enumerate(
+                    self.feeds_valid_pairs.items()):
+                for vp in valid_pairs:
+                    #later angles override previous ones as in a linear search
+                    pairs[tuple(sorted(vp))] = angle_index
+                try:
+                    angles.append(float(p))
+                except (TypeError, ValueError):
+                    angles.append(None)
+        except Exception as e:
+            raise ReceiverError("Invalid feed pairs table: %s" % (e,))
+        lon = numpy.array([o.lon.deg for o in self.feed_offsets])
+        lat = numpy.array([o.lat.deg for o in self.feed_offsets])
+        offsets = numpy.empty((len(angles), len(self.feed_offsets), 2))
+        for angle_index, angle in enumerate(angles):
+            if angle is None:
+                offsets[angle_index] = numpy.nan
+                continue
+            cos = math.cos(-angle * math.pi / 180)
+            sin = math.sin(-angle * math.pi / 180)
+            offsets[angle_index, :, 0] = lon * cos - lat * sin
+            offsets[angle_index, :, 1] = lon * sin + lat * cos
+        index = (self.feeds_valid_pairs, pairs, angles, offsets)
+        self._v_feed_pairs = index
+        return index
+
+    def _pair_angle(self, pair):
+        """
+        @return: index and value of the derotator angle of a valid pair
+        @raise ReceiverError: if the pair is not valid
+        """
+        _, pairs, angles, _ = self._feed_pairs()
+        try:
+            angle_index = pairs[tuple(pair)]
+        except (KeyError, TypeError):
+            raise ReceiverError('Invalid configuration of the feeds pair')
+        return angle_index, angles[angle_index]
 
     def is_valid_pair(self, pair):
         """
         This function checks if a pair is valid w.r.t derotator angle.
-        @param pair. A tuple containing a feed pair (3,2)
-        @param derotator. A String containing the derotator angle
+        @param pair. A tuple containing a feed pair (3,2), feeds must be in
+        ascending order
         """
         try:
-           # p = self.feeds_valid_pairs[derotator.strip()]
-            for p in self.feeds_valid_pairs:
-                #print(p)
-                for vp in self.feeds_valid_pairs[p]:
-                    if sorted(list(vp)) == (list(pair)):
-                        return True
-
-            #Exiting for means no equal pairs found
-
+            self._pair_angle(pair)
+            return True
+        except ReceiverError:
             return False
 
-        except Exception as e:
-            print('Error :' + str(e))
-            return False
-
-
     def get_feed_offset(self, feed_number, feed_pair, frame=HOR):
-        derotator_angle = 0.0
-        valid_pair = False
+        """
+        Offset of a feed when the derotator is set for a feed pair
+        @param feed_number: one of the pair feeds
+        @param feed_pair: a valid pair, in ascending feed order
+        @return: the rotated offset
+        @rtype: L{frame.Coord}
+        @raise ReceiverError: if the pair is not valid
+        """
         if self.nfeed < 2:
             raise ReceiverError("Cannot get offset for single feed recevier.")
-
-        if self.feeds_valid_pairs is None:
-            raise ReceiverError("Feed table not properly setted. None is found.")
-
         if feed_number not in feed_pair:
             raise ReceiverError("Data mismatch between pair and feed")
-        #Getting the feed and the derotator angle
-
-
-        try:
-           # p = self.feeds_valid_pairs[derotator.strip()]
-            for p in self.feeds_valid_pairs:
-                #print(p)
-                for vp in self.feeds_valid_pairs[p]:
-                    if sorted(list(vp)) == (list(feed_pair)):
-                        derotator_angle = p
-                        valid_pair = True
-
-        except Exception as e:
-            print('Error :' + str(e))
-            return False
-
-        if valid_pair == False:
-            raise ReceiverError('Invalid configuration of the feeds pair')
-        print('Derotator: ' + str(derotator_angle))
+        angle_index, derotator_angle = self._pair_angle(feed_pair)
+        logger.debug("Derotator: %s" % (derotator_angle,))
+        if derotator_angle is None:
+            raise ReceiverError("Invalid configuration or invalid derotator angle provided.")
         try:
-            derotator_angle = float(derotator_angle)
+            lon, lat = self._feed_pairs()[3][angle_index, feed_number]
             coord = self.feed_offsets[feed_number]
-            return Coord(frame,
-            coord.lon*math.cos(-derotator_angle*math.pi/180) - coord.lat*math.sin(-derotator_angle*math.pi/180),
-            coord.lon*math.sin(-derotator_angle*math.pi/180) + coord.lat*math.cos(-derotator_angle*math.pi/180))
-
-        except:
+        except IndexError:
             raise ReceiverError("Invalid configuration or invalid derotator angle provided.")
-        pass
+        #angles keep the formatting of the feed offset longitude
+        return Coord(frame, coord.lon.with_value(lon),
+                     coord.lon.with_value(lat))
+
+    def getDerotatorProcedure(self, feed_pair):
+        """
+        The procedure setting the derotator angle of a feed pair
+        @raise ReceiverError: if the pair is not valid
+        """
+        try:
+            _, derotator_angle = self._pair_angle(feed_pair)
+        except ReceiverError:
+            raise ReceiverError('Error while getting derotator angle')
+        if derotator_angle is None:
+            raise ReceiverError('Error while getting derotator angle')
+        #cambia il nome!!! Perchè potrebbe aver bisogno di avere la stessa proc con stesso nome
+        return get_procedure("DEROTATORFIXED_%s"%str(derotator_angle).replace('.',''), 0, "\tderotatorSetConfiguration=FIXED\n\tderotatorSetPosition=%sd\n"%str(derotator_angle), True)
 
     @property
     def beamsize(self):
@@ -188,51 +243,73 @@ class Receiver(Persistent):
         """
         return self.get_beamsize()
 
+    def _beamsize_interpolation(self):
+        """
+        The beamsize table as arrays, with the frequency range (MHz) and the
+        cache of computed beamsizes. Not persistent, it is rebuilt when the
+        receiver is loaded or its beamsize_table is replaced.
+        @return: (table, frequencies, beamsizes, fmin, fmax, cache)
+        """
+        try:
+            interpolation = self._v_beamsize_interpolation
+            if interpolation[0] is self.beamsize_table:
+                return interpolation
+        except AttributeError:
+            pass
+        interpolation = (self.beamsize_table,
+                         numpy.array(self.beamsize_table[0], dtype=float),
+                         numpy.array(self.beamsize_table[1], dtype=float),
+                         self.fmin.to_value(u.MHz),
+                         self.fmax.to_value(u.MHz),
+                         {})
+        self._v_beamsize_interpolation = interpolation
+        return interpolation
+
     def get_beamsize(self, freq=None):
         """
-        Get the beamsize for this receiver at a given frequency.
-        Read from beamsize_table the nearest frequency value.
+        Get the beamsize for this receiver at a given frequency, linearly
+        interpolated from beamsize_table. Beamsizes of scalar frequencies
+        are cached.
         If freq is None defauls to self.fmin
-        @param freq: frequency (MHz)
+        @param freq: frequency or array of frequencies (MHz)
         @type freq: Quantity
-        @return: beamsize at given frequency
+        @return: beamsize at given frequency, an array for an array of
+        frequencies
         """
         if freq is None:
             logger.warning("RECEIVER %s using default beamsize at min frequency" %
                            (self.name,))
             freq = self.fmin
-        if((not self.fmin <= freq <= self.fmax) and (freq > 0 * u.MHz)):
-            logger.warning("RECEIVER %s beamsize at frequency %f out of range" %
-                           (self.name, freq.value,))
-        logger.debug("Getting beamsize\nfreq: %s\nt0: %s\nt1: %s" % \
-                     (freq.value, self.beamsize_table[0], self.beamsize_table[1]))
-        return interp(freq.value,
-                      self.beamsize_table[0],
-                      self.beamsize_table[1])
+        table, frequencies, beamsizes, fmin, fmax, cache = \
+            self._beamsize_interpolation()
+        if isinstance(freq, u.Quantity) and freq.isscalar:
+            value = freq.to_value(u.MHz)
+            try:
+                return cache[value]
+            except KeyError:
+                pass
+        else:
+            value = u.Quantity(freq, u.MHz).value
+        out_of_range = ((value < fmin) | (value > fmax)) & (value > 0)
+        if numpy.ndim(value) == 0:
+            if out_of_range:
+                logger.warning("RECEIVER %s beamsize at frequency %f out of range" %
+                               (self.name, value,))
+        elif numpy.any(out_of_range):
+            logger.warning("RECEIVER %s beamsize at frequencies %s out of range" %
+                           (self.name, numpy.extract(out_of_range, value),))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Getting beamsize\nfreq: %s\nt0: %s\nt1: %s" % \
+                         (value, table[0], table[1]))
+        beamsize = interp(value, frequencies, beamsizes)
+        if numpy.ndim(value) == 0:
+            if len(cache) >= BEAMSIZE_CACHE_SIZE:
+                cache.clear()
+            cache[value] = beamsize
+        return beamsize
 
     def is_multifeed(self):
         """
         True if the receiver has multiple feeds, False otherwise.
         """
         return self.nfeed > 1
-
-    def getDerotatorProcedure(self,feed_pair):
-
-        #Getting the derotator angle and put it in the procedure
-        valid_pair = False
-        try:
-           # p = self.feeds_valid_pairs[derotator.strip()]
-            for p in self.feeds_valid_pairs:
-                #print(p)
-                for vp in self.feeds_valid_pairs[p]:
-                    if sorted(list(vp)) == (list(feed_pair)):
-                        derotator_angle = p
-                        valid_pair = True
-
-        except Exception as e:
-            raise ReceiverError('Error while getting derotator angle')
-
-        if valid_pair == False:
-            raise ReceiverError('Error while getting derotator angle')
-        #cambia il nome!!! Perchè potrebbe aver bisogno di avere la stessa proc con stesso nome
-        return Procedure("DEROTATORFIXED_%s"%str(float(derotator_angle)).replace('.',''), 0, "\tderotatorSetConfiguration=FIXED\n\tderotatorSetPosition=%sd\n"%str(float(derotator_angle)), True)
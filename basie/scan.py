@@ -9,7 +9,6 @@ from persistent import Persistent
 from astropy import units as u
 
 from . import frame
-import copy
 
 class Scan(Persistent):
     """
@@ -41,18 +40,23 @@ class Scan(Persistent):
                             (self.target.label, self.backend.backend_type))
             self.tsys = -1
 
-    @property
-    def subscans(self):
+    def iter_subscans(self, allocator=None, base_subscans=None):
         """
-        return the correct subscans sequence for this scan based on tsys and
-        repetitions parameters
-        @param receiver: the receiver used in the observation
-        @type receiver: receiver.Receiver
+        Generate the correct subscans sequence for this scan based on tsys and
+        repetitions parameters. Repetitions and tsys subscans are expanded
+        lazily, so that only the base subscans of the scan are kept in memory.
+        Repetitions yield the same subscan objects, which must be copied
+        before being modified.
+        @param allocator: subscan ID allocator
+        @type allocator: L{id_allocator.IDAllocator}
+        @param base_subscans: the result of the scanmode do_scan, if already
+        computed
         """
-        subscans = []
-        base_subscans = self.scanmode.do_scan(self.target, 
-                                              self.receiver, 
-                                              self.frequency)
+        if base_subscans is None:
+            base_subscans = self.scanmode.do_scan(self.target, 
+                                                  self.receiver, 
+                                                  self.frequency,
+                                                  allocator)
         counter = 0
         for rep in range(self.repetitions):
             for sn, ss in enumerate(base_subscans):
@@ -65,8 +69,14 @@ class Scan(Persistent):
                 elif self.tsys > 0 and not(counter % self.tsys):
                     yield_tsys = True
                 if yield_tsys:
-                    subscans.append(copy.deepcopy(ss[1]))
-                subscans.append(copy.deepcopy(ss[0]))
+                    yield ss[1]
+                yield ss[0]
                 counter += 1
-        return subscans
 
+    @property
+    def subscans(self):
+        """
+        return the correct subscans sequence for this scan as a list, see
+        L{iter_subscans}
+        """
+        return list(self.iter_subscans())
@@ -1,5 +1,5 @@
 from __future__ import absolute_import
-from .scanmode import ScanMode
+from .scanmode import ScanMode, ScanResult
 from .cross import CrossScan, PointScan
 from .maps import MapScan, OTFMapScan, RasterMapScan
 from .nodding import NoddingScan
@@ -15,5 +15,5 @@ BL = Bottom Left
 BR = Bottom Right
 """
 
-__all__ = ["ScanMode", "CrossScan", "MapScan", "OTFMapScan", "RasterMapScan",
+__all__ = ["ScanMode", "ScanResult", "CrossScan", "MapScan", "OTFMapScan", "RasterMapScan",
            "NoddingScan", "OnOffScan", "START_POINTS", "PointScan", "SkydipScan"]
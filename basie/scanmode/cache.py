@@ -0,0 +1,155 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Memoization of L{ScanMode.do_scan<scanmode.ScanMode.do_scan>} results.
+Base subscans are cached by a digest of the scan mode, target, receiver and
+frequency contents. On a cache hit subscans are shallow copied and only
+their IDs are reassigned.
+
+exported classes:
+    - ScanCache
+exported functions:
+    - key_state
+exported constants:
+    - PROCESS_CACHE
+    - SCANMODE_IDENTITY
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+import collections
+import copy
+import hashlib
+import pickle
+
+from .scanmode import ScanMode, ScanResult
+
+SCANMODE_IDENTITY = ("ID", "name")
+"""
+CONSTANT. Scan mode attributes left out of cache keys, they depend on the
+scan types created earlier in the process and not on the scan configuration
+"""
+
+def key_state(obj):
+    """
+    State of an object as used in cache keys. Scan modes are keyed on their
+    configuration only, so that identical scan types of different schedules
+    share their keys.
+    """
+    try:
+        state = obj.__getstate__()
+    except AttributeError:
+        return obj
+    if state is None:
+        #builtin values, since python 3.11 they have a __getstate__
+        return obj
+    if isinstance(obj, ScanMode):
+        state = dict((name, value) for name, value in state.items()
+                     if not name in SCANMODE_IDENTITY)
+    return state
+
+class ScanCache(object):
+    """
+    LRU cache of base subscan sequences
+    """
+    def __init__(self, maxsize=128):
+        """
+        Constructor
+        @param maxsize: maximum number of cached scans
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def key(scanmode, target, receiver, frequency):
+        """
+        Content digest of the do_scan arguments
+        @return: the cache key
+        @rtype: str
+        """
+        digest = hashlib.sha1()
+        #components are pickled one by one, so that objects shared among
+        #them do not change the digest
+        for item in (scanmode.__class__.__name__,
+                     key_state(scanmode),
+                     key_state(target),
+                     key_state(receiver),
+                     [f.value for f in frequency]):
+            digest.update(pickle.dumps(item, protocol=4))
+        return digest.hexdigest()
+
+    def clear(self):
+        self._entries.clear()
+
+    def put(self, key, base_subscans, first_id, id_count):
+        """
+        Store the result of a do_scan call
+        @param base_subscans: do_scan result
+        @type base_subscans: L{ScanResult<scanmode.ScanResult>}
+        @param first_id: first ID allocated by the do_scan call
+        @param id_count: number of IDs allocated by the do_scan call
+        """
+        if not isinstance(base_subscans, ScanResult):
+            base_subscans = ScanResult(base_subscans)
+        self._entries[key] = (base_subscans, first_id, id_count)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key, allocator):
+        """
+        Get a copy of cached base subscans numbered with new IDs from
+        allocator. The geometry of the result is shared with the cached one.
+        @return: the base subscans, None if key is not cached
+        @rtype: L{ScanResult<scanmode.ScanResult>}
+        """
+        try:
+            base_subscans, first_id, id_count = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        delta = allocator.reserve(id_count).next_id - first_id
+        copies = {}
+        result = []
+        for couple in base_subscans:
+            _couple = []
+            for _subscan in couple:
+                if not id(_subscan) in copies:
+                    copies[id(_subscan)] = copy.copy(_subscan)
+                    copies[id(_subscan)].shift_id(delta)
+                _couple.append(copies[id(_subscan)])
+            result.append(tuple(_couple))
+        return base_subscans.with_subscans(result)
+
+PROCESS_CACHE = ScanCache()
+"""
+Cache which can be shared by all the schedules of a process
+"""
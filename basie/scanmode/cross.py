@@ -30,7 +30,7 @@ class CrossScan(ScanMode):
         # to form a cross over the source in both directions
         self.unit_subscans = 4
 
-    def _do_scan(self, _target, _receiver, _frequency):
+    def _do_scan(self, _target, _receiver, _frequency, allocator=None):
         beamsize = VAngle(_receiver.get_beamsize(max(_frequency)))
         _subscans = []
         #Fill informations for each OTF subscan in the 4 directions
@@ -47,7 +47,8 @@ class CrossScan(ScanMode):
                                                       _const_axis,
                                                       _direction,
                                                       self.frame,
-                                                      beamsize))
+                                                      beamsize,
+                                                      allocator))
         return _subscans
 
 class PointScan(CrossScan):
@@ -57,7 +58,7 @@ class PointScan(CrossScan):
                  speed):
         super(PointScan, self).__init__(frame, length, speed)
         
-    def _do_scan(self, _target, _receiver, _frequency):
+    def _do_scan(self, _target, _receiver, _frequency, allocator=None):
         beamsize = VAngle(_receiver.get_beamsize(max(_frequency)))
         _subscans = []
         #Fill informations for each OTF subscan in the 4 directions
@@ -72,5 +73,6 @@ class PointScan(CrossScan):
                                                       _const_axis,
                                                       _direction,
                                                       self.frame,
-                                                      beamsize))
+                                                      beamsize,
+                                                      allocator))
         return _subscans
@@ -0,0 +1,139 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Vectorized offset grids used by map scan modes.
+Every function works on plain floats expressed in decimal degrees and returns
+numpy arrays, angles are created only when subscans are built.
+
+functions:
+    - centered_axis: single feed axis, odd number of points around 0
+    - interleaved_axis: multifeed derotator axis for OTF maps
+    - stepped_axis: evenly spaced axis for raster maps
+    - interleaved_stepped_axis: multifeed derotator axis for raster maps
+    - raster_order: boustrophedon ordering of a raster map
+"""
+
+import numpy as np
+
+from basie import utils
+from basie.errors import ScanError
+
+def _walk(start, stop, steps):
+    """
+    Reproduce the accumulation C{value = value + step} over the periodic
+    sequence of steps, checking C{value <= stop} at the beginning of each
+    period. np.cumsum adds sequentially so that values are exactly the same
+    obtained by a python loop.
+    @param start: first value
+    @param stop: last admitted value at the beginning of a period
+    @param steps: sequence of increments composing one period
+    @return: 2D array (periods, len(steps)) of the values before each step
+    """
+    steps = np.asarray(steps, dtype=float)
+    period = steps.sum()
+    if not period > 0:
+        raise ScanError("map spacing must be positive")
+    if stop < start:
+        return np.empty((0, len(steps)))
+    nperiods = int(np.floor((stop - start) / period)) + 2
+    while True:
+        values = np.cumsum(np.concatenate(([start], np.tile(steps, nperiods))))
+        values = values[:-1].reshape(nperiods, len(steps))
+        valid = values[:, 0] <= stop
+        if not valid[-1]:
+            break
+        nperiods *= 2
+    return values[:np.argmin(valid)]
+
+def centered_axis(length, spacing):
+    """
+    Offsets of a single feed map axis. The number of points is the smallest
+    odd number covering the whole length, the central point is 0.
+    @param length: axis length (deg)
+    @param spacing: distance between points (deg)
+    @return: array of offsets (deg)
+    """
+    dimension = int(utils.ceil_to_odd(length / spacing + 1))
+    half = dimension // 2
+    return np.arange(-half, half + 1) * spacing
+
+def interleaved_axis(length, feed_extent, spacing, major_spacing,
+                     scans_per_interleave):
+    """
+    Offsets of a multifeed map axis exploiting the derotator. Groups of
+    scans_per_interleave points separated by spacing are repeated every
+    major_spacing across the map.
+    @param length: axis length (deg)
+    @param feed_extent: receiver feed extent (deg)
+    @return: array of offsets (deg)
+    """
+    starts = _walk(-1 * (length / 2) + feed_extent,
+                   length / 2 + feed_extent,
+                   [major_spacing])[:, 0]
+    steps = np.arange(int(scans_per_interleave)) * spacing
+    return (starts[:, np.newaxis] + steps[np.newaxis, :]).ravel()
+
+def stepped_axis(length, feed_extent, spacing):
+    """
+    Evenly spaced offsets along the scan axis of a multifeed raster map
+    @return: array of offsets (deg)
+    """
+    return _walk(-1 * (length / 2) - feed_extent,
+                 length / 2 + feed_extent,
+                 [spacing]).ravel()
+
+def interleaved_stepped_axis(length, feed_extent, spacing, major_spacing,
+                             scans_per_interleave):
+    """
+    Offsets of the constant axis of a multifeed raster map: groups of
+    scans_per_interleave points separated by spacing, with an additional
+    major_spacing jump after each group.
+    @return: array of offsets (deg)
+    """
+    scans_per_interleave = int(scans_per_interleave)
+    steps = [spacing] * scans_per_interleave + [major_spacing]
+    values = _walk(-1 * (length / 2) + feed_extent,
+                   length / 2 + feed_extent,
+                   steps)
+    return values[:, :scans_per_interleave].ravel()
+
+def raster_order(xoffsets, yoffsets, along_x):
+    """
+    Get the boustrophedon ordering of a raster map, the first row is
+    traversed following the given offsets order and each following row is
+    traversed backwards w.r.t. the previous one.
+    @param xoffsets: longitude offsets, already in starting order (deg)
+    @param yoffsets: latitude offsets, already in starting order (deg)
+    @param along_x: True if each row moves along the longitude axis
+    @return: array of shape (npoints, 2) of (lon, lat) offsets (deg)
+    """
+    xoffsets = np.asarray(xoffsets, dtype=float)
+    yoffsets = np.asarray(yoffsets, dtype=float)
+    if along_x:
+        rows = np.tile(xoffsets, (len(yoffsets), 1))
+        rows[1::2] = rows[1::2, ::-1]
+        return np.column_stack((rows.ravel(),
+                                np.repeat(yoffsets, len(xoffsets))))
+    else:
+        rows = np.tile(yoffsets, (len(xoffsets), 1))
+        rows[1::2] = rows[1::2, ::-1]
+        return np.column_stack((np.repeat(xoffsets, len(yoffsets)),
+                                rows.ravel()))
@@ -1,17 +1,81 @@
 from __future__ import absolute_import
-from builtins import range
 import logging
 logger = logging.getLogger(__name__)
 import itertools
+import numpy as np
 from numpy import ceil, floor
 
-from basie import utils, frame
+from basie import frame, utils
 from basie.valid_angles import VAngle
 from basie.errors import *
 
-from .scanmode import ScanMode
+from .scanmode import ScanMode, ScanResult
 from ..frame import Coord
-from . import subscan
+from . import subscan, grid
+
+GEOMETRY_CACHE_SIZE = 64
+"""
+CONSTANT. Maximum number of geometries cached by each map scan mode
+"""
+
+def _angle_key(angle):
+    if isinstance(angle, VAngle):
+        return ("deg", angle.deg)
+    return angle
+
+class MapGeometry(object):
+    """
+    The grid of a map for a receiver and frequency. Instances are shared by
+    all the targets of a scan mode and must be treated as immutable values.
+    """
+    def __init__(self, beamsize, spacing, offset_x, offset_y, offset_formats,
+                 points=None, tsys_points=None):
+        """
+        Constructor
+        @param beamsize: beamsize used for tsys and offsets
+        @type beamsize: VAngle
+        @param spacing: separation between subsequent subscans
+        @type spacing: VAngle
+        @param offset_x: subscan offsets along the longitude axis (deg)
+        @param offset_y: subscan offsets along the latitude axis (deg)
+        @param offset_formats: (longitude, latitude) angles whose
+        representation is kept by the offsets
+        @param points: ordered (lon, lat) offsets of raster points (deg),
+        None for OTF maps
+        @param tsys_points: (lon, lat) offsets of the tsys subscans of raster
+        points (deg), None for OTF maps
+        """
+        self.beamsize = beamsize
+        self.spacing = spacing
+        self.offset_x = np.asarray(offset_x, dtype=float)
+        self.offset_x.setflags(write=False)
+        self.offset_y = np.asarray(offset_y, dtype=float)
+        self.offset_y.setflags(write=False)
+        self.offset_formats = offset_formats
+        #corners of the map, used for tsys subscans
+        self.extremes = list(itertools.product(
+                                [self.offset_x[0], self.offset_x[-1]],
+                                [self.offset_y[0], self.offset_y[-1]]))
+        self.points = points
+        self.tsys_points = tsys_points
+
+    @property
+    def dimension_x(self):
+        return len(self.offset_x)
+
+    @property
+    def dimension_y(self):
+        return len(self.offset_y)
+
+    def offset_angle(self, value, axis):
+        """
+        Get the angle for one offset of the map grid.
+        The angle keeps the representation of the map parameter it derives
+        from so that schedule files do not change their format.
+        @param value: the offset (deg)
+        @param axis: 0 for longitude, 1 for latitude
+        """
+        return self.offset_formats[axis].with_value(value)
 
 class MapScan(ScanMode):
     """
@@ -41,61 +105,88 @@ class MapScan(ScanMode):
         self.length_y = length_y
         self.spacing = spacing
 
-    def _get_spacing(self, receiver, frequency):
-        self.beamsize = VAngle(receiver.get_beamsize(max(frequency)))
+    def get_geometry(self, receiver, frequency):
+        """
+        Get the map grid. Grids only depend on the scan mode parameters, on
+        the receiver geometry and on the beamsize at the maximum frequency,
+        they are computed once and shared by all the targets using them.
+        The cache is not persistent and is discarded when the map parameters
+        are replaced.
+        @param frequency: observed frequencies
+        @return: the L{MapGeometry}
+        """
+        beamsize = receiver.get_beamsize(max(frequency))
+        parameters = (self.frame, self.start_point, self.scan_axis,
+                      self.length_x, self.length_y, self.spacing)
+        try:
+            cached_parameters, geometries = self._v_geometries
+            if not all(a is b for a, b in zip(parameters, cached_parameters)):
+                raise AttributeError
+        except AttributeError:
+            geometries = {}
+            self._v_geometries = (parameters, geometries)
+        key = (receiver.name, float(beamsize),
+               receiver.is_multifeed() and receiver.has_derotator,
+               _angle_key(receiver.feed_extent),
+               _angle_key(receiver.interleave))
+        try:
+            return geometries[key]
+        except KeyError:
+            pass
+        geometry = self._get_geometry(receiver, VAngle(beamsize))
+        logger.debug("Scan %d dim_x %d dim_y %d", self.ID,
+                     geometry.dimension_x, geometry.dimension_y)
+        if len(geometries) >= GEOMETRY_CACHE_SIZE:
+            geometries.clear()
+        geometries[key] = geometry
+        return geometry
+
+    def _get_geometry(self, receiver, beamsize):
+        """
+        Compute the map grid
+        @param beamsize: beamsize at the maximum observed frequency
+        @type beamsize: VAngle
+        @return: the L{MapGeometry}
+        """
+        spacing = self.spacing
         if receiver.is_multifeed() and receiver.has_derotator:
             #we can exploit multifeed derotator optimization
             logger.info("applying multifeed derotator optimization for map generation")
-            if not isinstance(self.spacing, VAngle):
-                approx_spacing = self.beamsize / self.spacing
+            if not isinstance(spacing, VAngle):
+                approx_spacing = beamsize / spacing
                 scans_per_interleave = ceil(receiver.interleave / approx_spacing)
-                if not scans_per_interleave == self.spacing:
-                    #logger.warning("Rounding to {0} scans per interleave".format(scans_per_interleave))
-                    pass
-                self.spacing = receiver.interleave / scans_per_interleave
-                logger.info("Spacing subscans by {0}".format(self.spacing))
+                spacing = receiver.interleave / scans_per_interleave
+                logger.info("Spacing subscans by {0}".format(spacing))
             else:
-                if (self.spacing > (receiver.interleave / 2)):
+                if (spacing > (receiver.interleave / 2)):
                     logger.warning("Spacing is too high, map will be undersampled")
-                scans_per_interleave = floor(receiver.interleave / self.spacing)
+                scans_per_interleave = floor(receiver.interleave / spacing)
             #this is necessary for tsys and offsets
-            self.beamsize = receiver.feed_extent * 2
+            beamsize = receiver.feed_extent * 2
             if scans_per_interleave == 0:
                 logger.warning("Spacing is too high for this receiver")
                 scans_per_interleave = 1
-                self.spacing = 0
-            major_spacing = receiver.feed_extent * 2 + receiver.interleave + self.spacing
-            _offset_x = (-1 * (self.length_x / 2)) + receiver.feed_extent
-            self.dimension_x = 0
-            self.offset_x = []
-            while _offset_x <= (self.length_x / 2 + receiver.feed_extent):
-                for i in range(int(scans_per_interleave)):
-                    self.offset_x.append(_offset_x + i * self.spacing)
-                _offset_x = _offset_x + major_spacing
-            self.dimension_x = len(self.offset_x)
-            _offset_y = (-1 * (self.length_y / 2)) + receiver.feed_extent
-            self.dimension_y = 0
-            self.offset_y = []
-            while _offset_y <= (self.length_y / 2 + receiver.feed_extent):
-                for i in range(int(scans_per_interleave)):
-                    self.offset_y.append(_offset_y + i * self.spacing)
-                _offset_y = _offset_y + major_spacing
-            self.dimension_y = len(self.offset_y)
+                spacing = VAngle(0.0)
+            major_spacing = receiver.feed_extent * 2 + receiver.interleave + spacing
+            offset_x = grid.interleaved_axis(self.length_x.deg,
+                                             receiver.feed_extent.deg,
+                                             spacing.deg,
+                                             major_spacing.deg,
+                                             scans_per_interleave)
+            offset_y = grid.interleaved_axis(self.length_y.deg,
+                                             receiver.feed_extent.deg,
+                                             spacing.deg,
+                                             major_spacing.deg,
+                                             scans_per_interleave)
+            offset_formats = (self.length_x, self.length_y)
         else:
-            if not isinstance(self.spacing, VAngle):
-                self.spacing = self.beamsize / self.spacing
-            self.dimension_x = utils.ceil_to_odd(self.length_x.deg /
-                                                 self.spacing.deg + 1)
-            self.dimension_y = utils.ceil_to_odd(self.length_y.deg /
-                                                 self.spacing.deg + 1)
-            logger.debug("Scan {0:d} dim_x {1:f} dim_y {2:f}".format(self.ID, self.dimension_x,
-                                               self.dimension_x))
-            self.offset_x = [i * self.spacing
-                             for i in range(int(-1 * (self.dimension_x // 2)),
-                                            int((self.dimension_x // 2) + 1))]
-            self.offset_y = [i * self.spacing
-                             for i in range(int(-1 * (self.dimension_y // 2)),
-                                            int((self.dimension_y // 2) + 1))]
+            if not isinstance(spacing, VAngle):
+                spacing = beamsize / spacing
+            offset_x = grid.centered_axis(self.length_x.deg, spacing.deg)
+            offset_y = grid.centered_axis(self.length_y.deg, spacing.deg)
+            offset_formats = (spacing, spacing)
+        return MapGeometry(beamsize, spacing, offset_x, offset_y,
+                           offset_formats)
 
 
 class OTFMapScan(MapScan):
@@ -107,21 +198,22 @@ class OTFMapScan(MapScan):
         self.duration_x = length_x.deg / speed * 60
         self.duration_y = length_y.deg / speed * 60
 
-    def _do_scan(self, _target, _receiver, _frequency):
-        self._get_spacing(_receiver, _frequency)
+    def _do_scan(self, _target, _receiver, _frequency, allocator=None):
+        geometry = self.get_geometry(_receiver, _frequency)
+        unit_subscans = self.unit_subscans
         if self.scan_axis == "LON":
-            self.unit_subscans = self.dimension_y
+            unit_subscans = geometry.dimension_y
         elif self.scan_axis == "LAT":
-            self.unit_subscans = self.dimension_x
+            unit_subscans = geometry.dimension_x
         _subscans = []
         logger.debug("scan axis: %s" % (self.scan_axis,))
 
         if self.scan_axis == self.frame.lon_name or self.scan_axis == "LON":
             _const_axis = 'LAT'
             if self.start_point == "TL" or self.start_point == "TR":
-                _offsets = reversed(self.offset_y)
+                _offsets = geometry.offset_y[::-1]
             else:
-                _offsets = self.offset_y
+                _offsets = geometry.offset_y
             if self.start_point == "TL" or self.start_point == "BL":
                 if self.frame == frame.EQ or self.frame == frame.GAL: #RA and GAL-LON are reversed!!
                     _directions = ("DEC", "INC")
@@ -133,48 +225,48 @@ class OTFMapScan(MapScan):
                 else:
                     _directions = ("DEC", "INC")
             for _offset, _direction in zip(_offsets,
-                                                      itertools.cycle(_directions)):
-                logger.debug("OTF: %d offset %s direction %s" % (self.ID,
-                                                                 _offset,
-                                                                 _direction))
+                                           itertools.cycle(_directions)):
+                logger.debug("OTF: %d offset %f direction %s", self.ID,
+                             _offset, _direction)
                 _subscans.append(subscan.get_cen_otf_tsys(_target,
                                                           self.duration_x,
                                                           self.length_x,
-                                                          _offset,
+                                                          geometry.offset_angle(_offset, 1),
                                                           _const_axis,
                                                           _direction,
                                                           self.frame,
-                                                          self.beamsize))
+                                                          geometry.beamsize,
+                                                          allocator))
         elif self.scan_axis == self.frame.lat_name or self.scan_axis == "LAT":
             _const_axis = 'LON'
             if self.start_point == "TR" or self.start_point == "BR":
                 if self.frame == frame.EQ or self.frame == frame.GAL:
-                    _offsets = self.offset_x
+                    _offsets = geometry.offset_x
                 else:
-                    _offsets = reversed(self.offset_x)
+                    _offsets = geometry.offset_x[::-1]
             else:
                 if self.frame == frame.EQ or self.frame == frame.GAL:
-                    _offsets = reversed(self.offset_x)
+                    _offsets = geometry.offset_x[::-1]
                 else:
-                    _offsets = self.offset_x
+                    _offsets = geometry.offset_x
             if self.start_point == "BL" or self.start_point == "BR":
                 _directions = ("INC", "DEC")
             else:
                 _directions = ("DEC", "INC")
             for _offset, _direction in zip(_offsets,
-                                                      itertools.cycle(_directions)):
-                logger.debug("OTF: %d offset %s direction %s" % (self.ID,
-                                                                 _offset,
-                                                                 _direction))
+                                           itertools.cycle(_directions)):
+                logger.debug("OTF: %d offset %f direction %s", self.ID,
+                             _offset, _direction)
                 _subscans.append(subscan.get_cen_otf_tsys(_target,
                                                           self.duration_y,
                                                           self.length_y,
-                                                          _offset,
+                                                          geometry.offset_angle(_offset, 0),
                                                           _const_axis,
                                                           _direction,
                                                           self.frame,
-                                                          self.beamsize))
-        return _subscans
+                                                          geometry.beamsize,
+                                                          allocator))
+        return ScanResult(_subscans, geometry, unit_subscans)
 
 class RasterMapScan(MapScan):
     def __init__(self, frame, start_point, scan_axis,
@@ -184,130 +276,131 @@ class RasterMapScan(MapScan):
         self.duration = duration
         self.offset_interleave = offset
 
-    def _get_spacing(self, receiver, frequency):
-        self.beamsize = VAngle(receiver.get_beamsize(max(frequency)))
-        if receiver.is_multifeed() and receiver.has_derotator:
-            #we can exploit multifeed derotator optimization
-            logger.info("applying multifeed derotator optimization for map generation")
-            if not isinstance(self.spacing, VAngle):
-                approx_spacing = self.beamsize / self.spacing
-                scans_per_interleave = ceil(receiver.interleave / approx_spacing)
-                if not scans_per_interleave == self.spacing:
-                    #logger.warning("Rounding to {0} scans per interleave".format(scans_per_interleave))
-                    pass
-                self.spacing = receiver.interleave / scans_per_interleave
-                logger.info("Spacing subscans by {0}".format(self.spacing))
-            else:
-                if (self.spacing > (receiver.interleave / 2)):
-                    logger.warning("Spacing is too high, map will be undersampled")
-                scans_per_interleave = floor(receiver.interleave / self.spacing)
-            #this is necessary for tsys and offsets
-            self.beamsize = receiver.feed_extent * 2
-            if scans_per_interleave == 0:
-                #logger.warning("Spacing is too high for this receiver")
-                raise ScanError("Spacing is too high for this receiver")
-                #scans_per_interleave = 1
-                #self.spacing = 0
-            major_spacing = receiver.feed_extent * 2
-            self.dimension_x = 0
-            self.offset_x = []
-            self.dimension_y = 0
-            self.offset_y = []
-            if self.scan_axis == "LON":
-                _offset_x = (-1 * (self.length_x / 2)) - receiver.feed_extent
-                while _offset_x <= (self.length_x / 2 + receiver.feed_extent):
-                    self.offset_x.append(_offset_x)
-                    _offset_x = _offset_x + self.spacing
-                _offset_y = (-1 * (self.length_y / 2)) + receiver.feed_extent
-                while _offset_y <= (self.length_y / 2 + receiver.feed_extent):
-                    for i in range(int(scans_per_interleave)):
-                        self.offset_y.append(_offset_y)
-                        _offset_y = _offset_y + self.spacing
-                        #self.offset_y.append(_offset_y + i * self.spacing)
-                    _offset_y = _offset_y + major_spacing
-            else: #self.scan_axis == "LAT"
-                _offset_x = (-1 * (self.length_x / 2)) + receiver.feed_extent
-                while _offset_x <= (self.length_x / 2 + receiver.feed_extent):
-                    for i in range(int(scans_per_interleave)):
-                        self.offset_x.append(_offset_x)
-                        _offset_x = _offset_x + self.spacing
-                        #self.offset_x.append(_offset_x + i * self.spacing)
-                    _offset_x = _offset_x + major_spacing
-                _offset_y = (-1 * (self.length_y / 2)) - receiver.feed_extent
-                while _offset_y <= (self.length_y / 2 + receiver.feed_extent):
-                    self.offset_y.append(_offset_y)
-                    _offset_y = _offset_y + self.spacing
-            self.dimension_x = len(self.offset_x)
-            self.dimension_y = len(self.offset_y)
+    def _get_geometry(self, receiver, beamsize):
+        """
+        Compute the raster grid and the ordered raster points, on multifeed
+        receivers with derotator the grid is stepped along the scan axis
+        @return: the L{MapGeometry}
+        @raise ScanError: if spacing is too high for the receiver
+        """
+        if not (receiver.is_multifeed() and receiver.has_derotator):
+            geometry = super(RasterMapScan, self)._get_geometry(receiver,
+                                                                beamsize)
         else:
-            super(RasterMapScan, self)._get_spacing(receiver, frequency)
+            geometry = self._get_stepped_geometry(receiver, beamsize)
+        geometry.points = self._get_offsets(geometry)
+        geometry.points.setflags(write=False)
+        tsys_x, tsys_y = utils.extrude_from_rectangle_array(
+                                geometry.points[:, 0],
+                                geometry.points[:, 1],
+                                geometry.extremes,
+                                geometry.beamsize.deg * subscan.TSYS_SIGMA)
+        geometry.tsys_points = np.column_stack((tsys_x, tsys_y))
+        geometry.tsys_points.setflags(write=False)
+        return geometry
 
-    def _get_offsets(self):
+    def _get_stepped_geometry(self, receiver, beamsize):
+        spacing = self.spacing
+        #we can exploit multifeed derotator optimization
+        logger.info("applying multifeed derotator optimization for map generation")
+        if not isinstance(spacing, VAngle):
+            approx_spacing = beamsize / spacing
+            scans_per_interleave = ceil(receiver.interleave / approx_spacing)
+            if not scans_per_interleave == spacing:
+                #logger.warning("Rounding to {0} scans per interleave".format(scans_per_interleave))
+                pass
+            spacing = receiver.interleave / scans_per_interleave
+            logger.info("Spacing subscans by {0}".format(spacing))
+        else:
+            if (spacing > (receiver.interleave / 2)):
+                logger.warning("Spacing is too high, map will be undersampled")
+            scans_per_interleave = floor(receiver.interleave / spacing)
+        #this is necessary for tsys and offsets
+        beamsize = receiver.feed_extent * 2
+        if scans_per_interleave == 0:
+            #logger.warning("Spacing is too high for this receiver")
+            raise ScanError("Spacing is too high for this receiver")
+            #scans_per_interleave = 1
+            #spacing = 0
+        major_spacing = receiver.feed_extent * 2
+        if self.scan_axis == "LON":
+            offset_x = grid.stepped_axis(self.length_x.deg,
+                                         receiver.feed_extent.deg,
+                                         spacing.deg)
+            offset_y = grid.interleaved_stepped_axis(self.length_y.deg,
+                                                     receiver.feed_extent.deg,
+                                                     spacing.deg,
+                                                     major_spacing.deg,
+                                                     scans_per_interleave)
+        else: #self.scan_axis == "LAT"
+            offset_x = grid.interleaved_stepped_axis(self.length_x.deg,
+                                                     receiver.feed_extent.deg,
+                                                     spacing.deg,
+                                                     major_spacing.deg,
+                                                     scans_per_interleave)
+            offset_y = grid.stepped_axis(self.length_y.deg,
+                                         receiver.feed_extent.deg,
+                                         spacing.deg)
+        return MapGeometry(beamsize, spacing, offset_x, offset_y,
+                           (self.length_x, self.length_y))
+
+    def _get_offsets(self, geometry):
         """
         Get ordered offsets for each point of the raster scan
-        @return: [(X0, Y0), (X1, Y1) .... (Xdim, Ydim)]
+        @param geometry: the map grid
+        @type geometry: L{MapGeometry}
+        @return: array [[X0, Y0], [X1, Y1] .... [Xdim, Ydim]] in degrees
         """
-        res = [] #resulting offsets
         if self.start_point == "TL" or self.start_point == "BL":
             if self.frame == frame.EQ or self.frame == frame.GAL:
-                xoffsets = list(reversed(self.offset_x))
+                xoffsets = geometry.offset_x[::-1]
             else:
-                xoffsets = self.offset_x
+                xoffsets = geometry.offset_x
         else:
             if self.frame == frame.EQ or self.frame == frame.GAL:
-                xoffsets = self.offset_x
+                xoffsets = geometry.offset_x
             else:
-                xoffsets = list(reversed(self.offset_x))
+                xoffsets = geometry.offset_x[::-1]
         if self.start_point == "TL" or self.start_point == "TR":
-            yoffsets = list(reversed(self.offset_y))
+            yoffsets = geometry.offset_y[::-1]
         else:
-            yoffsets = self.offset_y
+            yoffsets = geometry.offset_y
 
         if self.scan_axis == "LON" or self.scan_axis == self.frame.lon_name:
-            for i, _y in enumerate(yoffsets):
-                if i % 2 == 0:
-                    _xoffsets = xoffsets
-                else:
-                    _xoffsets = reversed(xoffsets)
-                for _x in _xoffsets:
-                    res.append((_x, _y))
+            res = grid.raster_order(xoffsets, yoffsets, True)
         elif self.scan_axis == "LAT" or self.scan_axis == self.frame.lat_name:
-            for i, _x in enumerate(xoffsets):
-                if i % 2 == 0:
-                    _yoffsets = yoffsets
-                else:
-                    _yoffsets = reversed(yoffsets)
-                for _y in _yoffsets:
-                    res.append((_x, _y))
-        for _x, _y in res:
-            logger.debug("\toffset\t %f\t%f" % (_x.deg, _y.deg))
+            res = grid.raster_order(xoffsets, yoffsets, False)
+        else:
+            res = np.empty((0, 2))
+        if logger.isEnabledFor(logging.DEBUG):
+            for _x, _y in res:
+                logger.debug("\toffset\t %f\t%f" % (_x, _y))
         return res
 
-    def _do_scan(self, _target, _receiver, _frequency):
-        self._get_spacing(_receiver, _frequency)
-        self.extremes = list(itertools.product(
-                                               [self.offset_x[0].deg,
-                                                self.offset_x[-1].deg],
-                                               [self.offset_y[0].deg,
-                                                self.offset_y[-1].deg]
-                                              ))
-        self._offsets = self._get_offsets()
+    def _do_scan(self, _target, _receiver, _frequency, allocator=None):
+        geometry = self.get_geometry(_receiver, _frequency)
+        extremes = geometry.extremes
         _subscans = []
-        for i, (offset_lon, offset_lat) in enumerate(self._offsets):
-            logger.debug("OFFSETS: %f %f" % (offset_lon.deg, offset_lat.deg))
-            _offset = Coord(self.frame, offset_lon, offset_lat)
+        for i, ((offset_lon, offset_lat), tsys_offset) in enumerate(
+                zip(geometry.points, geometry.tsys_points)):
+            logger.debug("OFFSETS: %f %f", offset_lon, offset_lat)
+            _offset = Coord(self.frame,
+                            geometry.offset_angle(offset_lon, 0),
+                            geometry.offset_angle(offset_lat, 1))
             _subscans.append(subscan.get_sid_tsys(_target,
                                                   _offset,
-                                                  self.extremes,
+                                                  extremes,
                                                   self.duration,
-                                                  self.beamsize))
+                                                  geometry.beamsize,
+                                                  allocator,
+                                                  tsys_offset))
             if not self.offset_interleave == 0:
                 if i % self.offset_interleave == 0:
                     _subscans.append(subscan.get_off_tsys(_target,
                                                           _offset,
-                                                          self.extremes,
+                                                          extremes,
                                                           self.duration,
-                                                          self.beamsize))
-        return _subscans
-
-
+                                                          geometry.beamsize,
+                                                          allocator,
+                                                          tsys_offset))
+        return ScanResult(_subscans, geometry)
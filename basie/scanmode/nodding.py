@@ -1,7 +1,9 @@
 from __future__ import absolute_import
 
+import logging
+logger = logging.getLogger(__name__)
 from builtins import range
-from .scanmode import ScanMode
+from .scanmode import ScanMode, ScanResult
 from . import subscan
 from .. import frame
 from ..errors import ScanError
@@ -16,42 +18,41 @@ class NoddingScan(ScanMode):
         self.unit_subscans = sum(el[0] for el in self.sequence)
         self.frame = frame.NULL
         self.derotator_angle = derotator_angle
-    def _do_scan(self, _target, _receiver, _frequency):
+    def _do_scan(self, _target, _receiver, _frequency, allocator=None):
         if not _target.offset_coord.is_null():
             if not _target.offset_coord.frame == frame.HOR:
                 raise ScanError("cannot perform nodding on target with offsets")
         if not _receiver.is_multifeed():
             raise ScanError("cannot execute nodding scan with single feed receiver")
 
-        #MLA: Here you should get the derotator angle and check that the pair is valid!!!!!
-        print('Feed_a ' + str(self.feed_a) + ' Feed_b' + str(self.feed_b))
-
-        
         #offset_a = _receiver.feed_offsets[self.feed_a]
         #offset_b = _receiver.feed_offsets[self.feed_b]
         
+        #offsets are looked up in the receiver feed pairs table, which also
+        #checks that the pair is valid
         offset_a = _receiver.get_feed_offset(self.feed_a,(self.feed_a,self.feed_b))
         offset_b = _receiver.get_feed_offset(self.feed_b,(self.feed_a,self.feed_b))
-        print(offset_a)
-        print(offset_b)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("nodding feeds %d, %d offsets: %s, %s" %
+                         (self.feed_a, self.feed_b, offset_a, offset_b))
         
-        #MLA: Here you should get the derotator angle and check that the pair is valid!!!!!
         _subscans = []
         for element in self.sequence:
             if element[1] == "a":
                 offset = -offset_a #the sign must be opposite to the feed displacement  
             else:
                 offset = -offset_b #the sign must be opposite to the feed displacement
-            self.offset=offset
             ss = subscan.get_sidereal(_target,
                                       offset,
                                       self.duration,
-                                      is_cal=element[2])
+                                      is_cal=element[2],
+                                      allocator=allocator)
             st = subscan.get_tsys(_target,
-                                  offset)
+                                  offset,
+                                  allocator=allocator)
             for repetitions in range(element[0]):
                 _subscans.append((ss, st))
-        return _subscans
+        return ScanResult(_subscans, (offset_a, offset_b))
     def _getProcedure(self,receiver, feed_pair):
         return receiver.getDerotatorProcedure(feed_pair)
         pass
@@ -21,7 +21,7 @@ class OnOffScan(ScanMode):
         self.duration = duration
         self.frame = NULL
 
-    def _do_scan(self, _target, _receiver, _frequency):
+    def _do_scan(self, _target, _receiver, _frequency, allocator=None):
         _subscans = []
         for element in self.sequence:
             if element[1] == "on": #ON SOURCE
@@ -31,7 +31,8 @@ class OnOffScan(ScanMode):
                               VAngle(0.0),
                               VAngle(0.0)),
                         self.duration,
-                        is_cal = element[2])
+                        is_cal = element[2],
+                        allocator=allocator)
             elif element[1] == "off": #OFF SOURCE
                 ss = subscan.get_sidereal(
                         _target, 
@@ -39,14 +40,16 @@ class OnOffScan(ScanMode):
                               self.offset_lon,
                               self.offset_lat),
                         self.duration,
-                        is_cal=element[2])
+                        is_cal=element[2],
+                        allocator=allocator)
             else:
                 raise ScheduleError("unknown onoff position: %s" % (element[1],))
             #TSYS is calculated at off position
             st = subscan.get_tsys(_target,
                     Coord(self.offset_frame,
                           self.offset_lon,
-                          self.offset_lat))
+                          self.offset_lat),
+                    allocator=allocator)
             for repetitions in range(element[0]):
                 _subscans.append((ss, st))
         return _subscans
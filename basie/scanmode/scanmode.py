@@ -21,7 +21,11 @@
 
 """
 Module implementing scan geometries and their methods to get subscans for
-specific targets
+specific targets.
+Scan modes are configurations: L{ScanMode.do_scan} does not change them and
+returns a L{ScanResult} holding everything computed for the target, so that
+the same scan mode can be used for many targets, in any order and at the
+same time.
 """
 
 import logging
@@ -30,6 +34,31 @@ from persistent import Persistent
 
 from basie.errors import ScanError
 
+class ScanResult(list):
+    """
+    The base subscans of a scan, a list of (subscan, tsys subscan) couples,
+    with the geometry computed for the target.
+    """
+    def __init__(self, subscans=(), geometry=None, unit_subscans=None):
+        """
+        Constructor
+        @param subscans: (subscan, tsys subscan) couples
+        @param geometry: scan mode specific geometry, None if the scan mode
+        has none
+        @param unit_subscans: number of logically grouped subscans, if it
+        depends on the target
+        """
+        list.__init__(self, subscans)
+        self.geometry = geometry
+        self.unit_subscans = unit_subscans
+
+    def with_subscans(self, subscans):
+        """
+        @return: a result with the same geometry and different subscans
+        """
+        return ScanResult(subscans, self.geometry, self.unit_subscans)
+
+
 class ScanMode(Persistent):
     """
     Base class for all Scan types. Gives a unique ID to the scan and implements
@@ -57,7 +86,7 @@ class ScanMode(Persistent):
     def __str__(self):
         return "Scan {0:d}: {1}".format(self.ID, self.__class__.__name__)
 
-    def do_scan(self, _target, _receiver, _frequency):
+    def do_scan(self, _target, _receiver, _frequency, allocator=None):
         """
         Set the current taraget and calls the L{_do_scan} implementation of the
         specific subclass
@@ -65,23 +94,35 @@ class ScanMode(Persistent):
         @type _target: L{target.Target}
         @param _receiver: the selected receiver
         @param _frequency: the selected frequency
+        @param allocator: subscan ID allocator, defaults to the process wide
+        L{subscan.DEFAULT_ALLOCATOR}
+        @type allocator: L{id_allocator.IDAllocator}
+        @return: the base subscans
+        @rtype: L{ScanResult}
         @raise ScanError: if frequency is not within receiver range
         """
         logger.debug("scheduling %s on target %s" % (self.name, _target.label))
         try:
-            return self._do_scan(_target, _receiver, _frequency)
+            result = self._do_scan(_target, _receiver, _frequency, allocator)
         except Exception as e:
             message = "Scan %s on target %s\n\t%s" %\
                     (self.name,
                      _target.label,
-                     e.message)
+                     e)
             raise ScanError(message)
+        if not isinstance(result, ScanResult):
+            result = ScanResult(result)
+        if result.unit_subscans is None:
+            result.unit_subscans = self.unit_subscans
+        return result
 
-    def _do_scan(self, _target, _receiver, _frequency):
+    def _do_scan(self, _target, _receiver, _frequency, allocator=None):
         """
         This is meant to be overridden by subclasses
         Implements logics used to get all the subscans starting from scan and
-        target specifications.
+        target specifications. Subscans must get their IDs from allocator.
+        It must not modify the scan mode, the target or the receiver.
+        @return: a L{ScanResult} or a list of subscan couples
         """
         raise NotImplementedError
 
@@ -38,7 +38,7 @@ class SkydipScan(ScanMode):
         # the skydip acquisition
         self.unit_subscans = 2
 
-    def _do_scan(self, _target, _receiver, _frequency):
+    def _do_scan(self, _target, _receiver, _frequency, allocator=None):
         beamsize = VAngle(_receiver.get_beamsize(max(_frequency)))
         _subscans = []
         null_offset = Coord(_target.coord.frame,
@@ -47,14 +47,17 @@ class SkydipScan(ScanMode):
         _subscans.append((subscan.get_sidereal(_target, 
                                               null_offset,
                                               0,
-                                              is_cal = False),
+                                              is_cal = False,
+                                              allocator = allocator),
                           subscan.get_tsys(_target,
-                                           null_offset)))
+                                           null_offset,
+                                           allocator = allocator)))
         _subscans.append(subscan.get_skydip_tsys(_subscans[0][0].ID,
                                                  _target,
                                                  self.duration,
                                                  self.start,
                                                  self.stop,
-                                                 self.offset))
+                                                 self.offset,
+                                                 allocator))
         return _subscans
 
@@ -40,13 +40,13 @@ from past.builtins import cmp
 from builtins import str
 import logging
 logger = logging.getLogger(__name__)
-import copy
 
 from persistent import Persistent
 
 from ..valid_angles import VAngle
 from .. import templates, frame, utils, procedures
 from ..errors import ScheduleError, ScanError
+from ..id_allocator import IDAllocator
 from ..frame import NULL_COORD, Coord, EQ, GAL, HOR, NULL
 
 
@@ -55,20 +55,27 @@ TSYS_SIGMA = 5
 Used for calculating TSYS subscans coordinate offsets as TSYS_SIGMA * beamsize
 """
 
+DEFAULT_ALLOCATOR = IDAllocator()
+"""
+Process wide ID allocator used when subscans are created without a schedule
+"""
+
 class Subscan(Persistent):
     """
     Generic subscan. Contains common subscan attributes and is meant to be
     override by specific subscan classes
     """
-    ID = 1 #static counter attribute 
     def __init__(self, _target, duration=0.0, is_tsys=False,
-            is_cal=False):
+            is_cal=False, allocator=None):
         """
         Constructor.
         Give the subscan a unique ID.
+        @param allocator: the ID allocator, defaults to L{DEFAULT_ALLOCATOR}
+        @type allocator: L{id_allocator.IDAllocator}
         """
-        self.ID = Subscan.ID #This value will be the same found in the lis file
-        Subscan.ID += 1
+        if allocator is None:
+            allocator = DEFAULT_ALLOCATOR
+        self.ID = allocator.allocate() #This value will be the same found in the lis file
         self.target = _target
         self.is_tsys = is_tsys
         self.duration = duration
@@ -98,6 +105,14 @@ class Subscan(Persistent):
         else:
             self.pre_procedure = self.pre_procedure + proc
 
+    def shift_id(self, delta):
+        """
+        Renumber the subscan, used when merging subscans generated with a
+        different allocator
+        @param delta: quantity added to the subscan ID
+        """
+        self.ID += delta
+
     def __hash__(self):
         return self.ID
 
@@ -112,18 +127,24 @@ class OTFSubscan(Subscan):
     On the flight sunbscan class
     """
     def __init__(self, _target, lon2, lat2, descr, scan_frame,
-                 geom, direction, duration, is_tsys=False, is_cal=False):
+                 geom, direction, duration, is_tsys=False, is_cal=False,
+                 allocator=None):
         """
         Constructor.
         @type lon2: VAngle
         @type lat2: VAngle
         """
-        Subscan.__init__(self, _target, duration, is_tsys, is_cal)
+        Subscan.__init__(self, _target, duration, is_tsys, is_cal, allocator)
         self.typename = "OTF"
         self.scan_frame = scan_frame
         #check that offset frame and scan frame are equal
         if self.target.offset_coord.frame == frame.NULL:#default behaviour
-            self.target.offset_coord.frame = self.scan_frame
+            #offsets can be shared, a new Coord is created
+            _offset = self.target.offset_coord
+            self.target.offset_coord = Coord(self.scan_frame,
+                                             _offset.lon,
+                                             _offset.lat,
+                                             _offset.epoch)
         if not self.target.offset_coord.frame == self.scan_frame:
             msg = "offset frame %s different from scan frame %s" % (self.target.offset_coord.frame.name, self.scan_frame)
             logger.debug(msg)
@@ -173,13 +194,18 @@ class SkydipSubscan(Subscan):
                  offset = frame.Coord(frame.HOR, 
                                       VAngle(1),
                                       VAngle(0)),
-                 is_tsys=False, is_cal=False):
-        Subscan.__init__(self, _target, duration, is_tsys, is_cal)
+                 is_tsys=False, is_cal=False, allocator=None):
+        Subscan.__init__(self, _target, duration, is_tsys, is_cal, allocator)
         self.typename = "SKYDIP"
         self.offset = offset
         self.start_elevation = start_elevation
         self.stop_elevation = stop_elevation
 
+    def shift_id(self, delta):
+        #the target of a skydip is the ID of its sidereal subscan
+        Subscan.shift_id(self, delta)
+        self.target += delta
+
     def __str__(self):
         return templates.skydip_subscan.substitute(
             dict(ID = self.ID,
@@ -193,8 +219,9 @@ class SkydipSubscan(Subscan):
                 ))
 
 class SiderealSubscan(Subscan):
-    def __init__(self, _target, duration=0.0, is_tsys=False, is_cal=False):
-        Subscan.__init__(self, _target, duration, is_tsys, is_cal)
+    def __init__(self, _target, duration=0.0, is_tsys=False, is_cal=False,
+                 allocator=None):
+        Subscan.__init__(self, _target, duration, is_tsys, is_cal, allocator)
         self.typename = "SID"
 
     def __str__(self):
@@ -222,9 +249,11 @@ def get_skydip_tsys(target_id,_target, duration=30.0,
                     stop_elevation = VAngle(15),
                     offset = frame.Coord(frame.HOR, 
                                          VAngle(1),
-                                         VAngle(0))):
-    ss = SkydipSubscan(target_id, duration, start_elevation, stop_elevation, offset)
-    st = get_tsys(_target, offset)
+                                         VAngle(0)),
+                    allocator=None):
+    ss = SkydipSubscan(target_id, duration, start_elevation, stop_elevation,
+                       offset, allocator=allocator)
+    st = get_tsys(_target, offset, allocator=allocator)
     return ss, st
 
 def get_cen_otf(_target, 
@@ -233,21 +262,29 @@ def get_cen_otf(_target,
                 offset, 
                 const_axis, 
                 direction,
-                scan_frame):
+                scan_frame,
+                allocator=None):
     """
     Get an I{OTF} subscan with description I{CEN}.
     @type length: VAngle
     @type offset: VAngle
+    @param allocator: subscan ID allocator
     @return: an L{OTFSubscan} instance
     """
-    __target = copy.deepcopy(_target)
+    _offset = _target.offset_coord
     if const_axis == "LON":
-        __target.offset_coord.lon = _target.offset_coord.lon + offset
+        __target = _target.derive(offset_coord=Coord(_offset.frame,
+                                                     _offset.lon + offset,
+                                                     _offset.lat,
+                                                     _offset.epoch))
         logger.debug("offset lon: %f" % (__target.offset_coord.lon.deg,))
         lon2 = VAngle(0.0)
         lat2 = length
     elif const_axis == "LAT":
-        __target.offset_coord.lat = _target.offset_coord.lat + offset
+        __target = _target.derive(offset_coord=Coord(_offset.frame,
+                                                     _offset.lon,
+                                                     _offset.lat + offset,
+                                                     _offset.epoch))
         logger.debug("offset lat: %f" % (__target.offset_coord.lat.deg,))
         lon2 = length
         lat2 = VAngle(0.0)
@@ -259,6 +296,7 @@ def get_cen_otf(_target,
                 geom = const_axis,
                 direction = direction,
                 scan_frame = scan_frame,
+                allocator = allocator,
                )
     return OTFSubscan(**attr)
 
@@ -270,7 +308,7 @@ def get_ss_otf(*args, **kwargs):
     raise NotImplementedError("is there any useful case for implementing this?")
 
 def get_sidereal(_target, offset=NULL_COORD, duration=0.0,
-        is_tsys=False, is_cal=False):
+        is_tsys=False, is_cal=False, allocator=None):
     """
     @param _target: the subscan target
     @type _target: target.Target
@@ -278,13 +316,12 @@ def get_sidereal(_target, offset=NULL_COORD, duration=0.0,
     @type offset_lon: VAngle
     @param offset_lat: additional latitude offset
     @type offset_lat: VAngle
+    @param allocator: subscan ID allocator
     """
-    __target = copy.deepcopy(_target)
-    #import ipdb;ipdb.set_trace()
-    __target.offset_coord += offset
-    return SiderealSubscan(__target, duration, is_tsys, is_cal)
+    __target = _target.derive(offset_coord=_target.offset_coord + offset)
+    return SiderealSubscan(__target, duration, is_tsys, is_cal, allocator)
 
-def get_tsys(_target, offset, duration=0.0):
+def get_tsys(_target, offset, duration=0.0, allocator=None):
     """
     Get a Tsys subscan.
     This basically returns a SIDEREAL subscan where source name is I{Tsys} and
@@ -292,10 +329,9 @@ def get_tsys(_target, offset, duration=0.0):
     @type offset_lon: VAngle
     @type offset_lat: VAngle
     """
-    __target = copy.deepcopy(_target)
-    __target.label = "Tsys"
+    __target = _target.derive(label="Tsys")
     st = get_sidereal(__target, offset, duration=0.0,
-                              is_tsys=True)
+                              is_tsys=True, allocator=allocator)
     st.post_procedure = procedures.TSYS
     return st
 
@@ -306,7 +342,8 @@ def get_cen_otf_tsys(_target,
                      const_axis, 
                      direction,
                      scan_frame, 
-                     beamsize):
+                     beamsize,
+                     allocator=None):
     """
     Get a couple composed of a CEN_OTF subscan and its relative SIDEREAL TSYS
     subscan.
@@ -332,15 +369,17 @@ def get_cen_otf_tsys(_target,
             _offset_lat = positive_offset
     _offset = Coord(scan_frame, _offset_lon, _offset_lat)
     ss = get_cen_otf(_target, duration, length, offset, const_axis, direction,
-                    scan_frame)
-    st = get_tsys(_target, _offset)
+                    scan_frame, allocator)
+    st = get_tsys(_target, _offset, allocator=allocator)
     return ss, st
 
 def get_sid_tsys(_target, 
                  offset,
                  extremes, 
                  duration,
-                 beamsize):
+                 beamsize,
+                 allocator=None,
+                 tsys_offset=None):
     """
     Get a couple of sidereal subscans, where the first is an actual subscan and the
     second is a tsys subscan obtained pointing the antenna out of a rectangular
@@ -358,31 +397,41 @@ def get_sid_tsys(_target,
     @type duration: float
     @param beamsize: beam size used to calculated tsys subscan offsets
     @type beamsize: VAngle
+    @param tsys_offset: (lon, lat) offsets of the tsys subscan (deg) if
+    already computed with L{utils.extrude_from_rectangle_array}
     """
-    ss = get_sidereal(_target, offset, duration)
-    tsys_offsets = utils.extrude_from_rectangle(offset.lon.deg, 
-                                                offset.lat.deg,
-                                                extremes, 
-                                                beamsize.deg * TSYS_SIGMA)
+    ss = get_sidereal(_target, offset, duration, allocator=allocator)
+    if tsys_offset is None:
+        tsys_offsets = utils.extrude_from_rectangle(offset.lon.deg, 
+                                                    offset.lat.deg,
+                                                    extremes, 
+                                                    beamsize.deg * TSYS_SIGMA)
+    else:
+        tsys_offsets = tsys_offset
     _offsets = Coord(offset.frame,
                      VAngle(tsys_offsets[0]),
                      VAngle(tsys_offsets[1]))
-    st = get_tsys(_target, _offsets)
+    st = get_tsys(_target, _offsets, allocator=allocator)
     return ss, st
 
 def get_off_tsys(_target,
                  offset,
                  extremes,
                  duration,
-                 beamsize):
-    extremes_offsets = utils.extrude_from_rectangle(offset.lon.deg, 
-                                                offset.lat.deg,
-                                                extremes, 
-                                                beamsize.deg * TSYS_SIGMA)
+                 beamsize,
+                 allocator=None,
+                 tsys_offset=None):
+    if tsys_offset is None:
+        extremes_offsets = utils.extrude_from_rectangle(offset.lon.deg, 
+                                                    offset.lat.deg,
+                                                    extremes, 
+                                                    beamsize.deg * TSYS_SIGMA)
+    else:
+        extremes_offsets = tsys_offset
     _offsets = Coord(offset.frame,
                      VAngle(extremes_offsets[0]),
                      VAngle(extremes_offsets[1]))
-    ss = get_sidereal(_target, _offsets, duration)
-    st = get_tsys(_target, _offsets)
+    ss = get_sidereal(_target, _offsets, duration, allocator=allocator)
+    st = get_tsys(_target, _offsets, allocator=allocator)
     return ss, st
 
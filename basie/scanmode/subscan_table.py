@@ -0,0 +1,321 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Columnar representation of subscans.
+A L{SubscanTable} stores one row per subscan occurrence in a numpy structured
+array, targets, frames, procedures and symbols (geometry, description and
+direction names) are stored once in side lists and referenced by index.
+Tables are written to .scd and .lis files formatting whole columns, giving
+the same output of the subscan objects they are built from.
+
+exported classes:
+    - SubscanTable
+exported constants:
+    - SUBSCAN_DTYPE
+    - SID, OTF, SKYDIP
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import numpy as np
+
+from .. import frame
+from ..errors import ScheduleError
+from ..valid_angles import FMT_DEC, format_deg
+from .subscan import SiderealSubscan, OTFSubscan, SkydipSubscan
+
+SID, OTF, SKYDIP = 0, 1, 2
+"""
+CONSTANTS. Subscan kind codes
+"""
+
+SUBSCAN_DTYPE = np.dtype([
+    ("ID", np.int64),
+    ("scan", np.int32), #scan number in the schedule, 0 if not set
+    ("subscan", np.int32), #subscan number in the scan, 0 if not set
+    ("kind", np.uint8),
+    ("target", np.int32), #index in SubscanTable.targets
+    ("target_subscan", np.int64), #skydip subscans only
+    ("duration", np.float64),
+    ("int_duration", np.bool_),
+    ("pre_procedure", np.int32), #index in SubscanTable.procedures
+    ("post_procedure", np.int32),
+    ("is_tsys", np.bool_),
+    ("is_cal", np.bool_),
+    ("offset_frame", np.uint8), #index in FRAMES
+    ("offset_lon", np.float64),
+    ("offset_lat", np.float64),
+    ("offset_lon_fmt", np.uint8),
+    ("offset_lat_fmt", np.uint8),
+    ("lon2", np.float64), #OTF end point or skydip start elevation
+    ("lat2", np.float64), #OTF end point or skydip stop elevation
+    ("lon2_fmt", np.uint8),
+    ("lat2_fmt", np.uint8),
+    ("scan_frame", np.uint8),
+    ("geom", np.uint8), #index in SubscanTable.symbols
+    ("descr", np.uint8),
+    ("direction", np.uint8),
+])
+"""
+CONSTANT. Row layout of a L{SubscanTable}
+"""
+
+FRAMES = (frame.NULL, frame.EQ, frame.GAL, frame.HOR)
+_FRAME_CODES = dict((_frame.name, code) for code, _frame in enumerate(FRAMES))
+
+def _duration(value, is_int):
+    if is_int:
+        return str(int(value))
+    return str(value)
+
+class SubscanTable(object):
+    """
+    Growable table of subscans
+    """
+    def __init__(self, capacity=1024):
+        """
+        Constructor
+        @param capacity: number of rows initially allocated
+        """
+        self._rows = np.zeros(max(capacity, 1), dtype=SUBSCAN_DTYPE)
+        self._size = 0
+        self.targets = [] #(label, coord, velocity)
+        self.procedures = []
+        self.symbols = []
+        self.scans = [] #(scd scan header, lis scan label)
+        self._index = {}
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def rows(self):
+        """
+        The structured array of the table rows
+        """
+        return self._rows[:self._size]
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the table rows
+        """
+        return self.rows.nbytes
+
+    def _intern(self, values, key, value):
+        try:
+            return self._index[key]
+        except KeyError:
+            values.append(value)
+            self._index[key] = len(values) - 1
+            return len(values) - 1
+
+    def _target_index(self, _target):
+        _coord = _target.coord
+        _velocity = _target.velocity
+        return self._intern(self.targets,
+                            ("target", _target.label, id(_coord), id(_velocity)),
+                            (_target.label, _coord, _velocity))
+
+    def _procedure_index(self, proc):
+        return self._intern(self.procedures, ("procedure", proc), proc)
+
+    def _symbol_index(self, symbol):
+        return self._intern(self.symbols, ("symbol", symbol), symbol)
+
+    def add_scan(self, header, label):
+        """
+        Start a new scan, following subscans are appended to it
+        @param header: scan header written in the .scd file
+        @param label: scan label written in the .lis file
+        @return: the scan number
+        """
+        self.scans.append((header, label))
+        return len(self.scans)
+
+    def append(self, _subscan, scan_number=0, subscan_number=0):
+        """
+        Append a subscan to the table
+        @param _subscan: the subscan
+        @type _subscan: L{subscan.Subscan}
+        @return: the row index
+        """
+        if self._size == len(self._rows):
+            _rows = np.zeros(2 * len(self._rows), dtype=SUBSCAN_DTYPE)
+            _rows[:self._size] = self._rows
+            self._rows = _rows
+        row = self._rows[self._size]
+        row["ID"] = _subscan.ID
+        row["scan"] = scan_number
+        row["subscan"] = subscan_number
+        row["duration"] = _subscan.duration
+        row["int_duration"] = isinstance(_subscan.duration, int)
+        row["pre_procedure"] = self._procedure_index(_subscan.pre_procedure)
+        row["post_procedure"] = self._procedure_index(_subscan.post_procedure)
+        row["is_tsys"] = _subscan.is_tsys
+        row["is_cal"] = _subscan.is_cal
+        if isinstance(_subscan, SkydipSubscan):
+            row["kind"] = SKYDIP
+            row["target_subscan"] = _subscan.target
+            _offset = _subscan.offset
+            row["lon2"] = _subscan.start_elevation.deg
+            row["lat2"] = _subscan.stop_elevation.deg
+            row["lon2_fmt"] = FMT_DEC
+            row["lat2_fmt"] = FMT_DEC
+        elif isinstance(_subscan, (SiderealSubscan, OTFSubscan)):
+            row["target"] = self._target_index(_subscan.target)
+            _offset = _subscan.target.offset_coord
+            if isinstance(_subscan, OTFSubscan):
+                row["kind"] = OTF
+                row["lon2"] = _subscan.lon2.deg
+                row["lat2"] = _subscan.lat2.deg
+                row["lon2_fmt"] = _subscan.lon2.fmt_code()
+                row["lat2_fmt"] = _subscan.lat2.fmt_code()
+                row["scan_frame"] = _FRAME_CODES[_subscan.scan_frame.name]
+                row["geom"] = self._symbol_index(_subscan.geom)
+                row["descr"] = self._symbol_index(_subscan.descr)
+                row["direction"] = self._symbol_index(_subscan.direction)
+            else:
+                row["kind"] = SID
+        else:
+            raise ScheduleError("cannot store subscan type %s" %
+                                (_subscan.__class__.__name__,))
+        row["offset_frame"] = _FRAME_CODES[_offset.frame.name]
+        row["offset_lon"] = _offset.lon.deg
+        row["offset_lat"] = _offset.lat.deg
+        row["offset_lon_fmt"] = _offset.lon.fmt_code()
+        row["offset_lat_fmt"] = _offset.lat.fmt_code()
+        self._size += 1
+        return self._size - 1
+
+    def extend(self, subscans, scan_number=0):
+        """
+        Append subscans numbering them from 1 within scan_number
+        """
+        for subscan_number, _subscan in enumerate(subscans, 1):
+            self.append(_subscan, scan_number, subscan_number)
+
+    def _formatted_targets(self):
+        """
+        Target fields of .lis lines, formatted once per target
+        @return: list of (label, frame, lon, lat, epoch, velocity) strings
+        """
+        result = []
+        for label, _coord, _velocity in self.targets:
+            if _coord.frame == frame.EQ:
+                _epoch = str(_coord.epoch) + '\t'
+            else:
+                _epoch = ""
+            result.append((label, _coord.frame.name, _coord.lon.fmt(),
+                           _coord.lat.fmt(), _epoch, str(_velocity)))
+        return result
+
+    def lis_lines(self, rows=None):
+        """
+        Format rows as subscan lines of the .lis file
+        @param rows: a selection of L{rows}, defaults to the whole table
+        @return: the list of lines, without line terminators
+        """
+        if rows is None:
+            rows = self.rows
+        targets = self._formatted_targets()
+        columns = dict((name, rows[name].tolist())
+                       for name in SUBSCAN_DTYPE.names)
+        offset_lon = [format_deg(*v) for v in zip(columns["offset_lon"],
+                                                  columns["offset_lon_fmt"])]
+        offset_lat = [format_deg(*v) for v in zip(columns["offset_lat"],
+                                                  columns["offset_lat_fmt"])]
+        lines = []
+        for i, kind in enumerate(columns["kind"]):
+            offset_frame = FRAMES[columns["offset_frame"][i]].offset_name
+            if kind == SID:
+                label, _frame, lon, lat, epoch, vel = \
+                        targets[columns["target"][i]]
+                lines.append("%d\tSIDEREAL\t%s\t%s\t%s\t%s\t%s%s\t%s\t%s\t%s" %
+                             (columns["ID"][i], label, _frame, lon, lat,
+                              epoch, offset_frame, offset_lon[i],
+                              offset_lat[i], vel))
+            elif kind == OTF:
+                label, _frame, lon, lat, epoch, vel = \
+                        targets[columns["target"][i]]
+                lines.append("\t".join((
+                    str(columns["ID"][i]), "OTF", label, lon, lat,
+                    format_deg(columns["lon2"][i], columns["lon2_fmt"][i]),
+                    format_deg(columns["lat2"][i], columns["lat2_fmt"][i]),
+                    _frame,
+                    FRAMES[columns["scan_frame"][i]].name,
+                    self.symbols[columns["geom"][i]],
+                    self.symbols[columns["descr"][i]],
+                    self.symbols[columns["direction"][i]],
+                    _duration(columns["duration"][i],
+                              columns["int_duration"][i]),
+                    offset_frame, offset_lon[i], offset_lat[i], vel)))
+            else:
+                lines.append("\t".join((
+                    str(columns["ID"][i]), "SKYDIP",
+                    str(columns["target_subscan"][i]),
+                    format_deg(columns["lon2"][i], FMT_DEC),
+                    format_deg(columns["lat2"][i], FMT_DEC),
+                    _duration(columns["duration"][i],
+                              columns["int_duration"][i]),
+                    offset_frame, offset_lon[i], offset_lat[i])))
+        return lines
+
+    def _scan_slices(self):
+        """
+        @return: iterator of (scan number, rows) couples
+        """
+        rows = self.rows
+        bounds = np.searchsorted(rows["scan"],
+                                 np.arange(1, len(self.scans) + 2))
+        for scan_number in range(1, len(self.scans) + 1):
+            yield scan_number, rows[bounds[scan_number - 1]:bounds[scan_number]]
+
+    def write_scd(self, scdfile):
+        """
+        Write scans and subscans to an open .scd file
+        """
+        executed = [proc.execute() for proc in self.procedures]
+        for scan_number, rows in self._scan_slices():
+            scdfile.write(self.scans[scan_number - 1][0])
+            scdfile.writelines(
+                "%d_%d\t%f\t%d\t%s\t%s\n" % (scan_number, subscan_number,
+                                            duration, _id,
+                                            executed[pre], executed[post])
+                for subscan_number, duration, _id, pre, post in zip(
+                    rows["subscan"].tolist(),
+                    rows["duration"].tolist(),
+                    rows["ID"].tolist(),
+                    rows["pre_procedure"].tolist(),
+                    rows["post_procedure"].tolist()))
+
+    def write_lis(self, lisfile):
+        """
+        Write the subscans of each scan to an open .lis file, each subscan
+        is written once, sorted by ID
+        """
+        for scan_number, rows in self._scan_slices():
+            lisfile.write("#%s\n" % (self.scans[scan_number - 1][1],))
+            _, first = np.unique(rows["ID"], return_index=True)
+            for line in self.lis_lines(rows[first]):
+                lisfile.write(line)
+                lisfile.write("\n")
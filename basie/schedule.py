@@ -25,15 +25,20 @@ __all__ = ['Schedule']
 import logging
 logger = logging.getLogger(__name__)
 import os
+import collections
+import time
+from concurrent.futures import ProcessPoolExecutor
 from copy import copy
 from astropy import units as u
 from persistent import Persistent
+from persistent.list import PersistentList
 
 from . import templates
 from . import procedures
 from . import utils
 from .errors import *
 from . import layout
+from .id_allocator import IDAllocator
 from . import VERSION, DISCOS_TAG
 import datetime 
 
@@ -41,6 +46,27 @@ from . import scan
 from . import backend
 from .radiotelescopes import radiotelescopes
 from .scanmode import OnOffScan, NoddingScan, MapScan, PointScan
+from .scanmode.cache import ScanCache
+from .scanmode.subscan_table import SubscanTable
+from .fragment_cache import ScanFragment
+
+WRITE_BUFFER_SIZE = 2**20
+"""
+CONSTANT. Buffer size (bytes) of the .scd and .lis file writers
+"""
+
+def _generate_scan(scanmode, target, receiver, frequency):
+    """
+    Worker function of parallel schedule generation. Subscans are numbered
+    starting from 1 and renumbered when merged into the schedule.
+    @return: (base subscans, number of allocated IDs, (wall, CPU) time of
+    do_scan)
+    """
+    allocator = IDAllocator()
+    wall, cpu = time.perf_counter(), time.process_time()
+    base_subscans = scanmode.do_scan(target, receiver, frequency, allocator)
+    elapsed = (time.perf_counter() - wall, time.process_time() - cpu)
+    return base_subscans, allocator.next_id - 1, elapsed
 
 class Schedule(Persistent):
     def __init__(self,
@@ -74,7 +100,7 @@ class Schedule(Persistent):
             raise ScheduleError("receiver does not belong to telescope")
         self.receiver = self.radiotelescope.receivers[receiver]
         self.base_dir = os.path.abspath('.') #default 
-        self.scans = []
+        self.scans = PersistentList()
         logger.info("Scheduling %s radiotelescope using receiver %s" %
                 (self.radiotelescope.name, self.receiver.name))
         self.outputFormat = outputFormat
@@ -85,16 +111,18 @@ class Schedule(Persistent):
         self.ftrack = ftrack
         self.creation_date = datetime.datetime.now()
         self.last_modified = self.creation_date
+        self.id_allocator = IDAllocator()
 
     def _configure_totalpower_sections(self):
         for name, bck in self.backends.items():
             if isinstance(bck, backend.TotalPowerBackend):
-                if ((self.radiotelescope is radiotelescopes["SRT"]) and
-                   (self.receiver is radiotelescopes["SRT"].receivers["K"])):
+                #stored schedules hold copies of the radiotelescopes
+                if ((self.radiotelescope.name == "SRT") and
+                   (self.receiver is self.radiotelescope.receivers["K"])):
                     logger.debug("adding empty sections to the backend")
                     bck._empty_sections = 12
-                if ((self.radiotelescope is radiotelescopes["MED"]) and
-                   (self.receiver is radiotelescopes["MED"].receivers["K"])):
+                if ((self.radiotelescope.name == "MED") and
+                   (self.receiver is self.radiotelescope.receivers["K"])):
                     logger.debug("adding empty sections to the backend")
                     bck._empty_sections = 2
                 bck.set_sections(self.receiver.nifs)
@@ -166,9 +194,14 @@ class Schedule(Persistent):
     def _get_filename(self, extension):
         return os.path.join(self.base_dir, "%s.%s" % (self.label, extension))
 
-    def _write_schedule_files(self):
+    def _write_schedule_files(self, jobs=1, columnar=False):
         """
         Method including the logics of schedule file creation.
+        @param jobs: number of processes generating scans in parallel, the
+        resulting files do not depend on it
+        @param columnar: if True subscans are collected in a
+        L{SubscanTable<scanmode.subscan_table.SubscanTable>} and the .scd and
+        .lis files are written from its columns
         """
         # we do this here as it is the only obvious point where everything is
         # configured
@@ -179,9 +212,36 @@ class Schedule(Persistent):
         cfgfilename = self._get_filename("cfg") 
         #datfilename = self._get_filename("dat") 
         bckfilename = self._get_filename("bck")
-        scdfile = open(scdfilename, "wt")
-        lisfile = open(lisfilename, "wt")
-        #datfile = open(datfilename, "wt")
+        with open(scdfilename, "wt", buffering=WRITE_BUFFER_SIZE) as scdfile, \
+             open(lisfilename, "wt", buffering=WRITE_BUFFER_SIZE) as lisfile:
+            if columnar:
+                table = SubscanTable()
+            else:
+                table = None
+            _used_procedures, _used_backends = self._write_scd_lis(scdfile,
+                                                                   lisfile,
+                                                                   jobs,
+                                                                   table)
+        #datfile.close()
+        #write to file used procedures
+        with open(cfgfilename, "wt") as cfgfile:
+            for _p in _used_procedures:
+                cfgfile.write(str(_p))
+        #write to file used backends
+        with open(bckfilename, "wt") as bckfile:
+            for _b in _used_backends:
+                bckfile.write(str(_b))
+
+    def _write_scd_lis(self, scdfile, lisfile, jobs=1, table=None):
+        """
+        Stream scans and subscans to the .scd and .lis files. Subscans are
+        generated lazily scan by scan, so that memory usage is bounded by the
+        size of a single scan (of a few scans per process if jobs > 1).
+        @param table: if not None subscans are appended to the table, which
+        is written to the files once all the scans are generated
+        @type table: L{SubscanTable<scanmode.subscan_table.SubscanTable>}
+        @return: (used procedures, used backends) sets
+        """
         #WRITE VERSION INFO IN SCD COMMENT
         scdfile.write("# Generated with basie version %s\n" % VERSION)
         scdfile.write("# Compatible with control software version: %s\n" % DISCOS_TAG)
@@ -197,15 +257,15 @@ class Schedule(Persistent):
             logger.warning("no rest frequency specified, ftrack will not be used")
         if restFrequency and self.ftrack:
             freqstring = ";".join([str(x.value) for x in self.restFrequency])
-            rst_procedure = procedures.Procedure("restFrequency", 0,
+            rst_procedure = procedures.get_procedure("restFrequency", 0,
                     "\trestFrequency=%s\n" % freqstring, True)
             init_procedure = init_procedure + rst_procedure
         scdfile.write(templates.scd_header.substitute(dict(
             projectID = self.projectID,
             observer = self.observer,
-            lisfilename = os.path.basename(lisfilename),
-            cfgfilename = os.path.basename(cfgfilename),
-            bckfilename = os.path.basename(bckfilename),
+            lisfilename = os.path.basename(self._get_filename("lis")),
+            cfgfilename = os.path.basename(self._get_filename("cfg")),
+            bckfilename = os.path.basename(self._get_filename("bck")),
             initproc = init_procedure.execute(),
             minElevation = self.minElevation,
             maxElevation = self.maxElevation,
@@ -217,65 +277,78 @@ class Schedule(Persistent):
             )))
 
         #WRITE SCAN AND SUBSCANS INFORMATIONS SEQUENTIALLY
+        #subscan IDs restart at each write so that files are reproducible
+        self.id_allocator = IDAllocator()
+        if table is None:
+            fragments = self._get_fragment_cache()
+        else:
+            fragments = None
+        profiler = self._get_profiler()
         scan_number = 1
         _used_procedures = set() #stores every used procedure without repetitions
         _used_procedures.add(init_procedure) #default procedure
         _used_backends = set()
         #BEGIN SCANS LOOP
-        for _scan in self.scans:
+        for _scan, base_subscans, first_id, fragment_key in \
+                self._iter_base_subscans(jobs, fragments, restFrequency):
             logger.info("writing {0} on {1}".format(_scan.scanmode.name,
                                                     _scan.target.label))
-            subscan_number = 1
+            if profiler is not None:
+                profiler.start_scan(scan_number, _scan,
+                                    isinstance(base_subscans, ScanFragment))
             #WRITE SCD SCAN HEADER
-            scdfile.write(templates.scd_scan_header.substitute(dict(scan_number=scan_number,
-                                                                    target_label=_scan.target.label)))
+            scan_header = templates.scd_scan_header.substitute(dict(scan_number=scan_number,
+                                                                    target_label=_scan.target.label))
             scanlayout = "scanlayout_%d_%s" % (scan_number, _scan.target.label)
+            _backend = _scan.backend
             if(isinstance(_scan.scanmode, PointScan)):
                 data_writer = "MANAGEMENT/CalibrationTool"
                 #create a new backend configuration with different name
-                _scan.backend = copy(_scan.backend)
-                _scan.backend.name += "CT"
+                _backend = copy(_backend)
+                _backend.name += "CT"
             else:
                 data_writer = "MANAGEMENT/FitsZilla"
             #scdfile.write("%s:%s\t%s\n" %
-            #              (_scan.backend.name, data_writer, scanlayout,))
-            scdfile.write("%s:%s\n" %
-                          (_scan.backend.name, data_writer,))
-            _used_backends.add(_scan.backend)
+            #              (_backend.name, data_writer, scanlayout,))
+            scan_header += "%s:%s\n" % (_backend.name, data_writer,)
+            if table is None:
+                scdfile.write(scan_header)
+            else:
+                table.add_scan(scan_header, _scan.target.label)
+            _used_backends.add(_backend)
+            if isinstance(base_subscans, ScanFragment):
+                #UNCHANGED SCAN, WRITE THE CACHED FRAGMENT
+                fragment = base_subscans
+                first_id = self.id_allocator.reserve(fragment.id_count).next_id
+                fragment.write(scdfile, lisfile, scan_number,
+                               _scan.target.label, first_id)
+                _used_procedures.update(fragment.procedures)
+                if profiler is not None:
+                    profiler.stop_scan(len(fragment.scd_lines))
+                scan_number += 1
+                continue
+            if fragments is not None:
+                fragment = ScanFragment(first_id)
+            else:
+                fragment = None
             #BEGIN SUBSCANS LOOP
-            subscans_set = set() #all subscans in this scan
+            lis_subscans = {} #all subscans in this scan, by ID
             if (_scan.target.velocity.is_zero() and 
                 restFrequency and
                 self.ftrack):
                 logger.warning("using ftrack with zero velocity")
-            for subscan_id, _subscan in enumerate(_scan.subscans):
-                #PRE SCAN procedures
-                print('Receiver:' + str(_scan.receiver.name))
-
-                if subscan_number == 1: 
-                    if restFrequency and self.ftrack:
-                        if isinstance(_scan.backend, backend.XBackend):
-                            #TODO: we need to test FTRACKALL before using it
-                            #_subscan.pre_procedure += procedures.FTRACKALL
-                            _subscan.pre_procedure += procedures.FTRACKLO
-                        else:
-                            _subscan.pre_procedure += procedures.FTRACKLO
-                    if (isinstance(_scan.scanmode, OnOffScan) and _scan.receiver.has_derotator):
-                        _subscan.pre_procedure += procedures.DEROTATORFIXED
-
-                    if (isinstance(_scan.scanmode, NoddingScan) and _scan.receiver.has_derotator):
-                        _subscan.pre_procedure += _scan.scanmode._getProcedure(_scan.receiver,(_scan.scanmode.feed_a, _scan.scanmode.feed_b))
-                        
-                    if (isinstance(_scan.scanmode, MapScan) and
-                         _scan.receiver.has_derotator):
-                        _subscan.pre_procedure += procedures.DEROTATORBSC
-                    if(isinstance(_scan.scanmode, PointScan)):
-                        _subscan.pre_procedure += procedures.ZEROOFF
+            subscan_number = 0
+            for subscan_number, _subscan in self._iter_scan_subscans(_scan,
+                                                              restFrequency,
+                                                              base_subscans):
                 #ADD SUBSCAN PROCEDURES TO THE SET OF USED ONES
                 _used_procedures.add(_subscan.pre_procedure)
                 _used_procedures.add(_subscan.post_procedure)
+                if table is not None:
+                    table.append(_subscan, scan_number, subscan_number)
+                    continue
                 #ADD THE SUBSCAN TO THE SET OF USED ONES
-                subscans_set.add(_subscan)
+                lis_subscans.setdefault(_subscan.ID, _subscan)
                 #WRITE SUBSCAN IN SCD FILE
                 scdfile.write("%d_%d\t%f\t%d\t%s\t%s\n" % (
                                                             scan_number,
@@ -285,30 +358,227 @@ class Schedule(Persistent):
                                                             _subscan.pre_procedure.execute(),
                                                             _subscan.post_procedure.execute(),
                                                             ))
-                subscan_number += 1
+                if fragment is not None:
+                    fragment.add_scd(subscan_number, _subscan)
                 #END SUBSCANS LOOP
             #WRITE SUBSCANS TO LIS FILE
-            subscans_list = list(subscans_set)
-            subscans_list.sort(key = lambda x: x.ID) #GET SUBSCANS SORTED BY ID
-            lisfile.write("#%s\n" % (_scan.target.label,))
-            for _subscan in subscans_list:
-                lisfile.write(str(_subscan))
-                lisfile.write("\n")
+            if table is None:
+                subscans_list = [lis_subscans[_id] for _id in sorted(lis_subscans)]
+                lisfile.write("#%s\n" % (_scan.target.label,))
+                for _subscan in subscans_list:
+                    line = str(_subscan)
+                    lisfile.write(line)
+                    lisfile.write("\n")
+                    if fragment is not None:
+                        fragment.add_lis(_subscan, line)
+            if fragment is not None:
+                fragment.close(self.id_allocator.next_id)
+                fragments.put(fragment_key, fragment)
             # WRITE DAT FILE
             #_layout = layout.get_layout_params(_scan, subscans_list)
             #datfile.write(templates.format_layout(scanlayout, _layout))
+            if profiler is not None:
+                profiler.stop_scan(subscan_number)
             # GO TO NEXT SCAN
             scan_number += 1
             #END SCANS LOOP
-        scdfile.close()
-        lisfile.close()
-        #datfile.close()
-        #write to file used procedures
-        with open(cfgfilename, "wt") as cfgfile:
-            for _p in _used_procedures:
-                cfgfile.write(str(_p))
-        #write to file used backends
-        with open(bckfilename, "wt") as bckfile:
-            for _b in _used_backends:
-                bckfile.write(str(_b))
+        if table is not None:
+            table.write_scd(scdfile)
+            table.write_lis(lisfile)
+        return _used_procedures, _used_backends
+
+    def set_fragment_cache(self, cache):
+        """
+        Enable incremental generation: rendered scans are stored in the
+        fragment cache and scans whose contents did not change since a
+        previous write are copied from it. Fragments are not used when
+        writing through a subscan table.
+        @param cache: the cache, None to disable incremental generation
+        @type cache: L{fragment_cache.FragmentCache}
+        """
+        self._v_fragment_cache = cache
+
+    def _get_fragment_cache(self):
+        return getattr(self, "_v_fragment_cache", None)
+
+    def _get_fragment(self, _scan, fragments, restFrequency):
+        """
+        Look up the cached fragment of a scan
+        @return: (fragment key, fragment or None)
+        """
+        if fragments is None:
+            return None, None
+        key = fragments.key(_scan, bool(restFrequency), self.ftrack)
+        return key, fragments.get(key)
+
+    def set_scan_cache(self, cache):
+        """
+        Set the cache of scan results used when writing schedule files. By
+        default each schedule has its own cache, the same cache can be shared
+        among schedules (i.e. L{scanmode.cache.PROCESS_CACHE}).
+        @param cache: the cache, None to disable caching
+        @type cache: L{scanmode.cache.ScanCache}
+        """
+        self._v_scan_cache = cache
+
+    def _get_scan_cache(self):
+        try:
+            return self._v_scan_cache
+        except AttributeError:
+            self._v_scan_cache = ScanCache()
+            return self._v_scan_cache
+
+    def set_profiler(self, profiler):
+        """
+        Measure the generation and formatting of each scan when writing
+        schedule files.
+        @param profiler: the profiler, None to disable profiling
+        @type profiler: L{profiling.Profiler}
+        """
+        self._v_profiler = profiler
+
+    def _get_profiler(self):
+        return getattr(self, "_v_profiler", None)
+
+    def _scan_key(self, _scan, cache):
+        if cache is None:
+            return None
+        return cache.key(_scan.scanmode, _scan.target, _scan.receiver,
+                         _scan.frequency)
+
+    def _do_scan(self, _scan, cache, key):
+        """
+        Get the base subscans of a scan from the cache or from its scanmode
+        """
+        if cache is not None:
+            base_subscans = cache.get(key, self.id_allocator)
+            if base_subscans is not None:
+                return base_subscans
+        first_id = self.id_allocator.next_id
+        profiler = self._get_profiler()
+        if profiler is None:
+            base_subscans = _scan.scanmode.do_scan(_scan.target,
+                                                   _scan.receiver,
+                                                   _scan.frequency,
+                                                   self.id_allocator)
+        else:
+            with profiler.expansion(_scan):
+                base_subscans = _scan.scanmode.do_scan(_scan.target,
+                                                       _scan.receiver,
+                                                       _scan.frequency,
+                                                       self.id_allocator)
+        if cache is not None:
+            cache.put(key, base_subscans, first_id,
+                      self.id_allocator.next_id - first_id)
+        return base_subscans
+
+    def _iter_base_subscans(self, jobs=1, fragments=None,
+                            restFrequency=False):
+        """
+        Generate the base subscans of each scan, in scan order.
+        With jobs > 1 scans are generated by a pool of processes and their
+        subscans are renumbered as if they were generated sequentially.
+        Scans found in the fragment cache are not generated, their fragment
+        is returned in place of the base subscans and their IDs must be
+        reserved by the caller.
+        @param fragments: the fragment cache, None to generate every scan
+        @type fragments: L{fragment_cache.FragmentCache}
+        @return: iterator of (scan, base subscans or fragment, first subscan
+        ID, fragment key)
+        """
+        cache = self._get_scan_cache()
+        if jobs <= 1:
+            for _scan in self.scans:
+                fragment_key, fragment = self._get_fragment(_scan, fragments,
+                                                            restFrequency)
+                if fragment is not None:
+                    yield _scan, fragment, None, fragment_key
+                    continue
+                first_id = self.id_allocator.next_id
+                base_subscans = self._do_scan(_scan, cache,
+                                              self._scan_key(_scan, cache))
+                yield _scan, base_subscans, first_id, fragment_key
+            return
+        #do_scan does not change scan modes, scans are independent
+        pending = collections.deque()
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for _scan in self.scans:
+                while len(pending) >= 2 * jobs:
+                    yield self._merge_scan(cache, *pending.popleft())
+                fragment_key, fragment = self._get_fragment(_scan, fragments,
+                                                            restFrequency)
+                if fragment is not None:
+                    pending.append((_scan, fragment_key, fragment, None, None))
+                    continue
+                key = self._scan_key(_scan, cache)
+                if cache is not None and key in cache:
+                    #cache hit, scan is generated while merging
+                    pending.append((_scan, fragment_key, None, key, None))
+                    continue
+                future = executor.submit(_generate_scan,
+                                         _scan.scanmode,
+                                         _scan.target,
+                                         _scan.receiver,
+                                         _scan.frequency)
+                pending.append((_scan, fragment_key, None, key, future))
+            while pending:
+                yield self._merge_scan(cache, *pending.popleft())
+
+    def _merge_scan(self, cache, _scan, fragment_key, fragment, key, future):
+        """
+        Get the base subscans generated by a worker process and give them
+        the IDs they would get in sequential generation.
+        """
+        if fragment is not None:
+            return _scan, fragment, None, fragment_key
+        first_id = self.id_allocator.next_id
+        if future is None:
+            return (_scan, self._do_scan(_scan, cache, key), first_id,
+                    fragment_key)
+        base_subscans, id_count, elapsed = future.result()
+        profiler = self._get_profiler()
+        if profiler is not None:
+            profiler.add_expansion(_scan, *elapsed)
+        delta = self.id_allocator.reserve(id_count).next_id - 1
+        renumbered = set()
+        for couple in base_subscans:
+            for _subscan in couple:
+                if not id(_subscan) in renumbered:
+                    renumbered.add(id(_subscan))
+                    _subscan.shift_id(delta)
+        if cache is not None:
+            cache.put(key, base_subscans, delta + 1, id_count)
+        return _scan, base_subscans, first_id, fragment_key
+
+    def _iter_scan_subscans(self, _scan, restFrequency, base_subscans=None):
+        """
+        Generate the subscans of a scan with their pre scan procedures.
+        @return: iterator of (subscan_number, subscan) couples
+        """
+        for subscan_number, _subscan in enumerate(
+                _scan.iter_subscans(self.id_allocator, base_subscans), 1):
+            #PRE SCAN procedures
+            print('Receiver:' + str(_scan.receiver.name))
+
+            if subscan_number == 1: 
+                #subscans are shared among repetitions
+                _subscan = copy(_subscan)
+                if restFrequency and self.ftrack:
+                    if isinstance(_scan.backend, backend.XBackend):
+                        #TODO: we need to test FTRACKALL before using it
+                        #_subscan.pre_procedure += procedures.FTRACKALL
+                        _subscan.pre_procedure += procedures.FTRACKLO
+                    else:
+                        _subscan.pre_procedure += procedures.FTRACKLO
+                if (isinstance(_scan.scanmode, OnOffScan) and _scan.receiver.has_derotator):
+                    _subscan.pre_procedure += procedures.DEROTATORFIXED
 
+                if (isinstance(_scan.scanmode, NoddingScan) and _scan.receiver.has_derotator):
+                    _subscan.pre_procedure += _scan.scanmode._getProcedure(_scan.receiver,(_scan.scanmode.feed_a, _scan.scanmode.feed_b))
+                    
+                if (isinstance(_scan.scanmode, MapScan) and
+                     _scan.receiver.has_derotator):
+                    _subscan.pre_procedure += procedures.DEROTATORBSC
+                if(isinstance(_scan.scanmode, PointScan)):
+                    _subscan.pre_procedure += procedures.ZEROOFF
+            yield subscan_number, _subscan
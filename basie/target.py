@@ -23,6 +23,9 @@ Module containig target objects definitions
 exposed classes: 
     - Target 
     - ObservedTarget
+    - DerivedTarget
+exposed functions:
+    - transform_targets
 """
 from __future__ import absolute_import
 
@@ -60,6 +63,17 @@ class Target(Persistent):
         res = "target %s lon: %s lat: %s" % (self.label, _lon, _lat)
         return res
 
+    def derive(self, label=None, offset_coord=None):
+        """
+        Get a view of this target with a different label or offset, used by
+        subscans instead of copying the target.
+        @param label: label override
+        @param offset_coord: offset override
+        @type offset_coord: frame.Coord
+        @rtype: L{DerivedTarget}
+        """
+        return DerivedTarget(self, label, offset_coord)
+
     def transform(self, dest_frame):
         """
         Tries to change coordinate frame
@@ -81,7 +95,7 @@ class Target(Persistent):
         if FRAME = HOR ==> 0 < deg < 360 per AZ && 0 < deg < 90 per EL
         """
         if self.coord.frame == fr.HOR:
-            if self.coord.lon.fmt == "hms":
+            if self.coord.lon.is_hour_angle():
                 raise ScheduleError("Horizontal frame does not accept longitude hours")
         if not (0 <= self.coord.lon.deg <= 360):
             raise ScheduleError("Longitude must be 0 <= lon <= 360")
@@ -106,3 +120,81 @@ class ObservedTarget(Target):
         self.tsys = tsys
         self.offset_coord = offset
 
+class DerivedTarget(object):
+    """
+    Read only view of a shared target, storing only label and offset
+    overrides. Many subscans can reference the same target without copying
+    it.
+    """
+    __slots__ = ("base", "_label", "_offset_coord")
+
+    def __init__(self, base, label=None, offset_coord=None):
+        """
+        Constructor
+        @param base: the referenced target
+        @type base: L{Target}
+        @param label: label override, None to use the target label
+        @param offset_coord: offset override, None to use the target offset
+        """
+        self.base = base
+        self._label = label
+        self._offset_coord = offset_coord
+
+    def derive(self, label=None, offset_coord=None):
+        """
+        Get a new view of the same target adding more overrides
+        @rtype: L{DerivedTarget}
+        """
+        if label is None:
+            label = self._label
+        if offset_coord is None:
+            offset_coord = self._offset_coord
+        return DerivedTarget(self.base, label, offset_coord)
+
+    @property
+    def label(self):
+        if self._label is None:
+            return self.base.label
+        return self._label
+
+    @property
+    def offset_coord(self):
+        if self._offset_coord is None:
+            return self.base.offset_coord
+        return self._offset_coord
+
+    @offset_coord.setter
+    def offset_coord(self, value):
+        self._offset_coord = value
+
+    @property
+    def coord(self):
+        return self.base.coord
+
+    @property
+    def velocity(self):
+        return self.base.velocity
+
+    @property
+    def repetitions(self):
+        return self.base.repetitions
+
+    @property
+    def tsys(self):
+        return self.base.tsys
+
+    def __str__(self):
+        return "target %s %s" % (self.label, self.coord)
+
+def transform_targets(targets, dest_frame, fast=False):
+    """
+    Change the coordinate frame of a whole list of targets with one
+    vectorized conversion, see L{frame.transform_coords}
+    @param targets: Target instances
+    @param dest_frame: the frame we want to change into
+    @type dest_frame: frame.Frame or frame name as a string
+    @param fast: use the numpy rotation matrix instead of astropy
+    """
+    if not isinstance(dest_frame, fr.Frame):
+        dest_frame = fr.frames[dest_frame.upper()]
+    fr.transform_coords([t.coord for t in targets], dest_frame, fast)
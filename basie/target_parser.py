@@ -2,9 +2,13 @@
 
 from __future__ import absolute_import
 import re
+import itertools
+import collections
 import logging
 logger = logging.getLogger(__name__)
 
+from astropy import units as u
+
 from . import valid_angles
 from .valid_angles import VAngle
 from . import angle_parser
@@ -12,6 +16,7 @@ from . import rich_validator
 from .target import ObservedTarget
 from . import frame
 from .velocity import Velocity, ZERO_VELOCITY
+from .errors import ScheduleError
 
 """
 string pattern identifying an option.
@@ -35,6 +40,11 @@ TARGET_RE = "^(?P<label>\S+)\s+" + \
 TARGET_PATTERN = re.compile(TARGET_RE, re.I)
 OPTION_PATTERN = re.compile(OPTION_RE)
 
+"""
+Number of target lines parsed by a worker process at a time
+"""
+CHUNK_SIZE = 2000
+
 def _parse_options(line):
     """
     parse optional parameters from target line. 
@@ -72,7 +82,7 @@ def _parse_target_line(line):
     matches = TARGET_PATTERN.match(line)
     if not matches:
         logger.warning("invalid target line: " + line)
-        return None, None
+        return None, None, None
     else:
         logger.debug("parsing target line: " + line)
         target_args = matches.groupdict()
@@ -108,23 +118,149 @@ def _parse_target_line(line):
                                )
         return target_args['scanmode'], target_args['backend'], obs_target
 
-def parse_file(filename, check_values=True):
+def _numbered_lines(_file):
+    """
+    Strip lines, skipping comments and empty lines
+    @return: iterator of (line number, line) couples
+    """
+    for number, line in enumerate(_file, 1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield number, line
+
+def _parse_numbered_lines(numbered_lines, check_values, name):
+    """
+    Parse target lines, errors are reported with the line number
+    @return: iterator of (target, scanmode, backend, line)
+    @raise ScheduleError: if a line contains invalid values
+    """
+    for number, line in numbered_lines:
+        try:
+            scanmode, backend, target = _parse_target_line(line)
+            if target and check_values:
+                target.check_consistency()
+        except Exception as e:
+            raise ScheduleError("%s line %d: %s" % (name, number, e))
+        if target: # not None
+            yield target, scanmode, backend, line
+
+def _angle_record(angle):
+    return angle.deg, angle.original_unit is u.hour, angle.sexa
+
+def _record_angle(record):
+    deg, hour, sexa = record
+    return VAngle._from_deg(deg, u.hour if hour else u.deg, sexa)
+
+def _coord_record(_coord):
+    return (_coord.frame.name, _angle_record(_coord.lon),
+            _angle_record(_coord.lat), _coord.epoch)
+
+def _record_coord(record):
+    frame_name, lon, lat, epoch = record
+    return frame.Coord(frame.frames[frame_name], _record_angle(lon),
+                       _record_angle(lat), epoch)
+
+def _parse_chunk(chunk, check_values, name):
+    """
+    Parse target lines in a worker process. Targets are returned as tuples
+    of plain values, which are much cheaper to transfer than the objects.
+    @return: (records, error) where error is the exception raised after the
+    returned records, or None
+    """
+    records = []
+    try:
+        for target, scanmode, backend, line in _parse_numbered_lines(
+                chunk, check_values, name):
+            if target.velocity is ZERO_VELOCITY:
+                _velocity = None
+            else:
+                _velocity = (target.velocity.val, target.velocity.vdef,
+                             target.velocity.vref)
+            records.append((target.label, _coord_record(target.coord),
+                            _coord_record(target.offset_coord), _velocity,
+                            target.repetitions, target.tsys,
+                            scanmode, backend, line))
+    except ScheduleError as e:
+        return records, e
+    return records, None
+
+def _record_target(record):
+    """
+    Build a parsed target from a L{_parse_chunk} record
+    @return: (target, scanmode, backend, line)
+    """
+    label, _coord, offset, _velocity, repetitions, tsys, \
+            scanmode, backend, line = record
+    if _velocity is None:
+        _velocity = ZERO_VELOCITY
+    else:
+        _velocity = Velocity(*_velocity)
+    #targets are validated and warned about by the worker, __init__ is
+    #bypassed to avoid logging warnings twice
+    target = ObservedTarget.__new__(ObservedTarget)
+    target.label = label
+    target.coord = _record_coord(_coord)
+    target.velocity = _velocity
+    target.repetitions = repetitions
+    target.tsys = tsys
+    target.offset_coord = _record_coord(offset)
+    return target, scanmode, backend, line
+
+def _iter_parallel(numbered_lines, check_values, name, jobs, chunk_size):
+    from concurrent.futures import ProcessPoolExecutor
+    chunks = iter(lambda: list(itertools.islice(numbered_lines, chunk_size)),
+                  [])
+    head = list(itertools.islice(chunks, 2))
+    if len(head) < 2:
+        #a single chunk is not worth starting worker processes
+        for chunk in head:
+            for result in _parse_numbered_lines(chunk, check_values, name):
+                yield result
+        return
+    chunks = itertools.chain(head, chunks)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = collections.deque()
+        try:
+            for chunk in itertools.chain(chunks, [None]):
+                #a bounded number of chunks is read ahead of the results
+                if chunk is not None:
+                    pending.append(executor.submit(_parse_chunk, chunk,
+                                                   check_values, name))
+                while pending and (chunk is None or
+                                   len(pending) >= 2 * jobs):
+                    records, error = pending.popleft().result()
+                    for record in records:
+                        yield _record_target(record)
+                    if error is not None:
+                        raise error
+        finally:
+            for future in pending:
+                future.cancel()
+
+def iter_targets(_file, check_values=True, jobs=1, chunk_size=CHUNK_SIZE):
+    """
+    Parse targets lazily from an open file or any iterable of lines.
+    With more than one job the lines are parsed in chunks by worker
+    processes, targets are yielded in file order in any case.
+    @param jobs: number of processes parsing lines
+    @param chunk_size: lines parsed by a worker at a time
+    @return: iterator of (target, scanmode, backend, line)
+    @raise ScheduleError: if a line contains invalid values, the message
+    reports the line number
+    """
+    name = getattr(_file, "name", "<targets>")
+    numbered_lines = _numbered_lines(_file)
+    if jobs <= 1:
+        return _parse_numbered_lines(numbered_lines, check_values, name)
+    return _iter_parallel(numbered_lines, check_values, name, jobs,
+                          chunk_size)
+
+def parse_file(filename, check_values=True, jobs=1):
     """
     Parse a target txt file into a list of ObservedTarget objects associated to
     their corresponding scan type.
+    @param jobs: number of processes parsing lines, see L{iter_targets}
+    @return: list of (target, scanmode, backend, line), in file order
     """
     with open(filename, "r") as _file:
-        lines = _file.readlines()
-    #escapes whitespaces and special chars
-    lines = [l.strip() for l in lines]
-    #remove commented and empty lines
-    lines = [l for l in lines if ((not l.startswith("#")) and (not l == ""))]
-    targets = [] #targets is a list so that it mantains the same ordering as in the file lines
-    for l in lines:
-        scanmode, backend, target = _parse_target_line(l)
-        if target: # not None
-            if check_values:
-                target.check_consistency()
-            targets.append((target, scanmode, backend, l))
-    return targets
-
+        return list(iter_targets(_file, check_values, jobs))
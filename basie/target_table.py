@@ -0,0 +1,367 @@
+#coding=utf-8
+
+#
+#
+#    Copyright (C) 2013  INAF -IRA Italian institute of radioastronomy, bartolini@ira.inaf.it
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Target catalogues in table formats.
+Tables are read with astropy.table from CSV, FITS binary tables or VOTables
+and must contain the columns of a target line: label, scanmode, backend,
+frame, longitude and latitude. The optional columns repetitions, tsys,
+offset_frame, offset_lon, offset_lat, rvel, vdef and vref correspond to the
+target line options, masked values take the option default. Column names
+are case insensitive.
+
+Coordinates are given as numbers in degrees, or in the column unit if any,
+columns in hours give hour angles. String columns are parsed as target line
+angles. Values are validated column by column, errors report the first
+invalid row, counted from 0.
+
+exported classes:
+    - TargetColumns
+exported functions:
+    - is_table_file
+    - read_table
+    - parse_table
+exported constants:
+    - TABLE_FORMATS
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+import os
+
+import numpy as np
+from astropy import units as u
+from astropy.table import Table
+
+from . import angle_parser
+from . import frame
+from .errors import ScheduleError
+from .target import ObservedTarget
+from .valid_angles import VAngle
+from .velocity import Velocity, ZERO_VELOCITY, VDEFS, VREFS
+
+TABLE_FORMATS = {
+    ".csv" : "ascii.csv",
+    ".ecsv" : "ascii.ecsv",
+    ".fits" : "fits",
+    ".fit" : "fits",
+    ".fts" : "fits",
+    ".vot" : "votable",
+    ".xml" : "votable",
+}
+"""
+CONSTANT. astropy table formats by file extension
+"""
+
+REQUIRED_COLUMNS = ("label", "scanmode", "backend", "frame", "longitude",
+                    "latitude")
+
+TARGET_FRAMES = ("EQ", "GAL", "HOR")
+"""
+Frames accepted for target coordinates, as in target lines
+"""
+
+_HOUR_UNITS = (u.hour, u.hourangle)
+
+def is_table_file(filename):
+    """
+    @return: True if the file extension is one of L{TABLE_FORMATS}
+    """
+    return os.path.splitext(filename)[1].lower() in TABLE_FORMATS
+
+def read_table(filename, format=None):
+    """
+    Read a target table
+    @param format: astropy table format, guessed from the file extension if
+    None
+    @rtype: astropy.table.Table
+    """
+    if format is None:
+        format = TABLE_FORMATS.get(os.path.splitext(filename)[1].lower())
+    return Table.read(filename, format=format)
+
+class TargetColumns(object):
+    """
+    Validated target table, stored as one array per target attribute
+    """
+    def __init__(self, table, name="<table>"):
+        """
+        Constructor. Validates the table columns.
+        @param table: the target table
+        @type table: astropy.table.Table
+        @param name: table name used in error messages
+        @raise ScheduleError: if a column is missing or contains invalid
+        values
+        """
+        self.name = name
+        self._columns = dict((colname.lower(), table[colname])
+                             for colname in table.colnames)
+        for colname in REQUIRED_COLUMNS:
+            if not colname in self._columns:
+                raise ScheduleError("%s: missing column %s" % (name, colname))
+        self.size = len(table)
+        self.label = self._strings("label")
+        self.scanmode = self._strings("scanmode")
+        self.backend = self._strings("backend")
+        self.frame = self._frames("frame", TARGET_FRAMES)
+        self.lon, self.lon_hour, self.lon_sexa = self._angles("longitude")
+        self.lat, self.lat_hour, self.lat_sexa = self._angles("latitude")
+        self._check_coordinates()
+        if "offset_frame" in self._columns:
+            self.offset_frame = self._frames("offset_frame",
+                                             tuple(frame.frames), self.frame)
+        else:
+            self.offset_frame = self.frame
+        self.offset_lon = self._offsets("offset_lon")
+        self.offset_lat = self._offsets("offset_lat")
+        self.repetitions = self._integers("repetitions")
+        self.tsys = self._integers("tsys")
+        self._velocities()
+
+    def __len__(self):
+        return self.size
+
+    def _error(self, invalid, message):
+        """
+        @param invalid: boolean array of the invalid rows
+        @raise ScheduleError: if any row is invalid
+        """
+        if np.any(invalid):
+            row = np.flatnonzero(invalid)[0]
+            raise ScheduleError("%s row %d: %s" % (self.name, row, message))
+
+    def _mask(self, colname):
+        return np.ma.getmaskarray(self._columns[colname])
+
+    def _strings(self, colname, required=True):
+        """
+        @return: array of stripped strings, masked values are empty
+        """
+        column = self._columns[colname]
+        values = np.ma.getdata(column)
+        if values.dtype.kind == "S":
+            values = np.char.decode(values, "ascii")
+        values = np.char.strip(values.astype(str))
+        values[self._mask(colname)] = ""
+        if required:
+            self._error(values == "", "empty %s" % (colname,))
+        return values
+
+    def _frames(self, colname, valid, default=None):
+        """
+        @return: object array of L{frame.Frame}
+        """
+        names = np.char.upper(self._strings(colname, default is None))
+        missing = names == ""
+        self._error(~missing & ~np.isin(names, valid),
+                    "%s must be one of %s" % (colname, ", ".join(valid)))
+        result = np.empty(self.size, dtype=object)
+        for name in np.unique(names[~missing]):
+            result[names == name] = frame.frames[name]
+        if default is not None:
+            result[missing] = default[missing]
+        return result
+
+    def _parse_strings(self, colname, check):
+        """
+        Parse the distinct values of a string column
+        @param check: the angle parsing function
+        @return: (deg, hour, sexa) arrays
+        """
+        values = self._strings(colname, False)
+        unique, inverse = np.unique(values, return_inverse=True)
+        deg = np.zeros(len(unique))
+        hour = np.zeros(len(unique), dtype=bool)
+        sexa = np.zeros(len(unique), dtype=bool)
+        for i, value in enumerate(unique.tolist()):
+            if value == "":
+                continue
+            try:
+                a = check(value)
+            except Exception as e:
+                self._error(values == value, str(e))
+            deg[i], hour[i], sexa[i] = a.deg, a.is_hour_angle(), a.sexa
+        return deg[inverse], hour[inverse], sexa[inverse]
+
+    def _angles(self, colname, check=angle_parser.check_angle):
+        """
+        @return: (deg, hour, sexa) arrays
+        """
+        column = self._columns[colname]
+        self._error(self._mask(colname), "missing %s" % (colname,))
+        if column.dtype.kind in "SU":
+            self._strings(colname)
+            return self._parse_strings(colname, check)
+        if not column.dtype.kind in "iuf":
+            raise ScheduleError("%s: %s must be angles" % (self.name, colname))
+        values = np.asarray(np.ma.getdata(column), dtype=float)
+        unit = column.unit or u.deg
+        hour = unit in _HOUR_UNITS
+        try:
+            deg = values * (u.hourangle if hour else unit).to(u.deg)
+        except u.UnitsError:
+            raise ScheduleError("%s: %s unit %s is not an angle unit" %
+                                (self.name, colname, unit))
+        self._error(~np.isfinite(deg), "invalid %s" % (colname,))
+        flags = np.full(self.size, hour)
+        return deg, flags, flags.copy()
+
+    def _check_coordinates(self):
+        """
+        Column-wise version of L{target.Target.check_consistency}
+        """
+        hor = self.frame == frame.HOR
+        self._error(hor & self.lon_hour,
+                    "Horizontal frame does not accept longitude hours")
+        self._error((self.lon < 0) | (self.lon > 360),
+                    "Longitude must be 0 <= lon <= 360")
+        self._error(~hor & ((self.lat < -90) | (self.lat > 90)),
+                    "Latitude must be -90 <= lat <= 90")
+        self._error(hor & ((self.lat < 0) | (self.lat > 90)),
+                    "Latitude must be 0 <= lat <= 90")
+
+    def _offsets(self, colname):
+        """
+        @return: offsets in decimal degrees, 0 where not given
+        """
+        if not colname in self._columns:
+            return np.zeros(self.size)
+        column = self._columns[colname]
+        missing = self._mask(colname)
+        if column.dtype.kind in "SU":
+            deg = self._parse_strings(colname,
+                                      angle_parser.check_dec_angle)[0]
+        else:
+            unit = column.unit or u.deg
+            try:
+                deg = np.asarray(np.ma.getdata(column), dtype=float) * \
+                      unit.to(u.deg)
+            except u.UnitsError:
+                raise ScheduleError("%s: %s unit %s is not an angle unit" %
+                                    (self.name, colname, unit))
+            self._error(~missing & ~np.isfinite(deg),
+                        "invalid %s" % (colname,))
+        deg[missing] = 0.0
+        return deg
+
+    def _numbers(self, colname):
+        """
+        @return: (values, given) arrays, values are NaN where not given
+        """
+        column = self._columns[colname]
+        given = ~self._mask(colname)
+        if column.dtype.kind in "SU":
+            strings = self._strings(colname, False)
+            given &= strings != ""
+            values = np.full(self.size, np.nan)
+            for i in np.flatnonzero(given).tolist():
+                try:
+                    values[i] = float(strings[i])
+                except ValueError:
+                    self._error(strings == strings[i],
+                                "%s must be a number" % (colname,))
+        else:
+            values = np.asarray(np.ma.getdata(column), dtype=float)
+            values[~given] = np.nan
+        self._error(given & ~np.isfinite(values), "invalid %s" % (colname,))
+        return values, given
+
+    def _integers(self, colname):
+        """
+        @return: object array of ints, None where not given
+        """
+        result = np.full(self.size, None, dtype=object)
+        if not colname in self._columns:
+            return result
+        values, given = self._numbers(colname)
+        self._error(given & (values != np.floor(values)),
+                    "%s must be an integer" % (colname,))
+        result[given] = values[given].astype(int).tolist()
+        return result
+
+    def _velocities(self):
+        """
+        Targets have a velocity when rvel, vdef and vref are all given
+        """
+        self.rvel = np.zeros(self.size)
+        self.has_velocity = np.zeros(self.size, dtype=bool)
+        self.vdef = np.full(self.size, "")
+        self.vref = np.full(self.size, "")
+        if not all(c in self._columns for c in ("rvel", "vdef", "vref")):
+            return
+        self.vdef = np.char.upper(self._strings("vdef", False))
+        self.vref = np.char.upper(self._strings("vref", False))
+        self._error((self.vdef != "") & ~np.isin(self.vdef, VDEFS),
+                    "vdef must be one of %s" % (", ".join(VDEFS),))
+        self._error((self.vref != "") & ~np.isin(self.vref, VREFS),
+                    "vref must be one of %s" % (", ".join(VREFS),))
+        self.rvel, given = self._numbers("rvel")
+        self.has_velocity = given & (self.vdef != "") & (self.vref != "")
+
+    def targets(self):
+        """
+        Build the targets, as L{target_parser.parse_file} does
+        @return: iterator of (target, scanmode, backend, source) where
+        source names the table row
+        """
+        zero = VAngle(0.0)
+        lon_units = [u.hour if h else u.deg for h in self.lon_hour.tolist()]
+        lat_units = [u.hour if h else u.deg for h in self.lat_hour.tolist()]
+        for row, (label, scanmode, backend, _frame, lon, lon_unit, lon_sexa,
+                  lat, lat_unit, lat_sexa, offset_frame, offset_lon,
+                  offset_lat, repetitions, tsys, has_velocity, rvel, vdef,
+                  vref) in enumerate(zip(
+                      self.label.tolist(), self.scanmode.tolist(),
+                      self.backend.tolist(), self.frame,
+                      self.lon.tolist(), lon_units, self.lon_sexa.tolist(),
+                      self.lat.tolist(), lat_units, self.lat_sexa.tolist(),
+                      self.offset_frame, self.offset_lon.tolist(),
+                      self.offset_lat.tolist(), self.repetitions,
+                      self.tsys, self.has_velocity.tolist(),
+                      self.rvel.tolist(), self.vdef.tolist(),
+                      self.vref.tolist())):
+            if has_velocity:
+                _velocity = Velocity(rvel, vdef, vref)
+            else:
+                _velocity = ZERO_VELOCITY
+            _coord = frame.Coord(_frame,
+                                 VAngle._from_deg(lon, lon_unit, lon_sexa),
+                                 VAngle._from_deg(lat, lat_unit, lat_sexa))
+            _offset = frame.Coord(offset_frame, zero.with_value(offset_lon),
+                                  zero.with_value(offset_lat))
+            target = ObservedTarget(label=label,
+                                    coord=_coord,
+                                    offset=_offset,
+                                    velocity=_velocity,
+                                    repetitions=repetitions,
+                                    tsys=tsys)
+            yield target, scanmode, backend, "%s row %d" % (self.name, row)
+
+def parse_table(filename, format=None):
+    """
+    Read and validate a target table
+    @param format: astropy table format, see L{read_table}
+    @return: list of (target, scanmode, backend, source), in table order
+    @raise ScheduleError: if the table contains invalid values
+    """
+    columns = TargetColumns(read_table(filename, format),
+                            os.path.basename(filename))
+    logger.info("read %d targets from %s" % (len(columns), filename))
+    return list(columns.targets())
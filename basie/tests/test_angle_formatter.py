@@ -0,0 +1,61 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import numpy as np
+from astropy import units as u
+from astropy.coordinates import Angle
+
+from basie.valid_angles import VAngle, ANGLE_DECIMALS, SEXA_SEPARATOR
+from basie.angle_formatter import format_dec, format_sexagesimal
+
+
+class TestAngleFormatter(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(42)
+        edges = [0.0, -0.0, 1e-9, -1e-9, 59.99999 / 3600, -59.99999 / 3600,
+                 0.99999999, -0.99999999, 15.0, -15.0, 359.999999999,
+                 0.5 / 3600 * 1e-4, 1.0 / 3 , -2.0 / 3, 1e-4, -1e-4]
+        self.values = (edges +
+                       list(rng.uniform(-360, 360, 2000)) +
+                       list(rng.uniform(-0.1, 0.1, 2000)) +
+                       list(np.round(rng.uniform(-5, 5, 1000), 7)))
+
+    def test_dec_golden(self):
+        for value in self.values:
+            expected = Angle(value, unit=u.deg).to_string(unit=u.deg,
+                                                          decimal=True,
+                                                          precision=ANGLE_DECIMALS)
+            self.assertEqual(format_dec(value, ANGLE_DECIMALS), expected)
+
+    def test_dms_golden(self):
+        for value in self.values:
+            expected = Angle(value, unit=u.deg).to_string(unit=u.deg,
+                                                          sep=SEXA_SEPARATOR,
+                                                          precision=ANGLE_DECIMALS,
+                                                          pad=True)
+            self.assertEqual(format_sexagesimal(value, ANGLE_DECIMALS,
+                                                SEXA_SEPARATOR),
+                             expected)
+
+    def test_hms_golden(self):
+        for value in self.values:
+            angle = VAngle(value)
+            expected = angle.to_angle().to_string(unit=u.hour,
+                                                  sep=SEXA_SEPARATOR,
+                                                  precision=ANGLE_DECIMALS,
+                                                  pad=True) + "h"
+            self.assertEqual(angle.fmt_hms(), expected)
+
+    def test_negative_zero(self):
+        self.assertEqual(format_dec(0.0, 4), "0.0000")
+        self.assertEqual(format_dec(-0.0, 4), "-0.0000")
+        self.assertEqual(format_dec(0.0, 4), "0.0000")
+        self.assertEqual(format_sexagesimal(-0.0, 4, ":"), "-00:00:00.0000")
+
+
+if __name__ == "__main__":
+    unittest.main()
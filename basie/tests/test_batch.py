@@ -0,0 +1,72 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+import os
+import shutil
+import sys
+from unittest import mock
+
+import basie
+from basie import batch
+from basie.errors import ScheduleError
+
+BASE_PATH = os.path.abspath(".basie_test_batch")
+curdir = os.path.abspath(os.path.dirname(__file__))
+TEMPLATE_PATH = os.path.join(curdir, "..", "user_templates")
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        shutil.rmtree(BASE_PATH, True)
+        os.makedirs(BASE_PATH)
+
+    def tearDown(self):
+        shutil.rmtree(BASE_PATH, True)
+
+    def test_read_manifest(self):
+        manifest = os.path.join(BASE_PATH, "manifest.txt")
+        with open(manifest, "wt") as f:
+            f.write("# comment\n\na.txt\nsub/b.txt out\n")
+        entries = batch.read_manifest(manifest, "default")
+        self.assertEqual(entries,
+                         [(os.path.join(BASE_PATH, "a.txt"), "default"),
+                          (os.path.join(BASE_PATH, "sub/b.txt"),
+                           os.path.join(BASE_PATH, "out"))])
+        with open(manifest, "wt") as f:
+            f.write("a.txt out extra\n")
+        with self.assertRaises(ScheduleError):
+            batch.read_manifest(manifest)
+
+    def test_failures_are_isolated(self):
+        entries = [(os.path.join(TEMPLATE_PATH, "configuration_SR.txt"),
+                    os.path.join(BASE_PATH, "sr")),
+                   (os.path.join(BASE_PATH, "missing.txt"), BASE_PATH),
+                   (os.path.join(TEMPLATE_PATH, "configuration.txt"),
+                    os.path.join(BASE_PATH, "default"))]
+        results = list(batch.run_batch(entries))
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertIn("missing.txt", results[1].error)
+        for result in (results[0], results[2]):
+            lis = os.path.join(result.directory, result.label + ".lis")
+            self.assertTrue(os.path.exists(lis))
+
+    def test_store_with_workers(self):
+        entries = [(os.path.join(TEMPLATE_PATH, "configuration_SR.txt"),
+                    BASE_PATH)]
+        store = os.path.join(BASE_PATH, "store.fs")
+        with self.assertRaises(ScheduleError):
+            list(batch.run_batch(entries, 2, store=store))
+        argv = ["basie", "-b", entries[0][0], "-w", "2", "--store", store,
+                BASE_PATH]
+        with mock.patch.object(sys, "argv", argv), \
+             mock.patch("sys.stderr"):
+            with self.assertRaises(SystemExit) as exit:
+                basie.cmd_line()
+        self.assertEqual(exit.exception.code, 2)
+        self.assertFalse(os.path.exists(store))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import os
+
+from astropy import units as u
+
+from basie import target_parser
+from basie.rich_validator import validate_configuration
+from basie.frame import EQ
+from basie.id_allocator import IDAllocator
+from basie.receiver import Receiver
+from basie.scanmode.cache import ScanCache
+from basie.scanmode.onoff import OnOffScan
+from basie.valid_angles import VAngle
+
+curdir = os.path.abspath(os.path.dirname(__file__))
+TEMPLATE_PATH = os.path.join(curdir, "..", "user_templates")
+
+class TestScanCache(unittest.TestCase):
+    def setUp(self):
+        self.recv = Receiver("TEST", 0, 100,
+                             [[0.0, 100.0], [5.0, 5.0]])
+        self.freq = [20.0 * u.MHz]
+        self.scanmode = OnOffScan(10.0, VAngle(1.0), VAngle(0.0), EQ,
+                                  [(2, "on", False), (1, "off", False)])
+        LINE = "3C386 OnOff TP EQ 10.0d 1:00:00.0h"
+        _, _, self.target = target_parser._parse_target_line(LINE)
+        self.cache = ScanCache()
+
+    def _scan(self, allocator):
+        key = self.cache.key(self.scanmode, self.target, self.recv, self.freq)
+        cached = self.cache.get(key, allocator)
+        if cached is not None:
+            return cached
+        first_id = allocator.next_id
+        base = self.scanmode.do_scan(self.target, self.recv, self.freq,
+                                     allocator)
+        self.cache.put(key, base, first_id, allocator.next_id - first_id)
+        return base
+
+    def test_hit_reassigns_ids(self):
+        allocator = IDAllocator()
+        first = self._scan(allocator)
+        second = self._scan(allocator)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(len(first), len(second))
+        first_ids = set(_ss.ID for couple in first for _ss in couple)
+        second_ids = set(_ss.ID for couple in second for _ss in couple)
+        self.assertEqual(len(first_ids), len(second_ids))
+        self.assertFalse(first_ids & second_ids)
+        self.assertEqual(min(second_ids), max(first_ids) + 1)
+        self.assertEqual(allocator.next_id, max(second_ids) + 1)
+
+    def test_hit_copies_subscans(self):
+        allocator = IDAllocator()
+        first = self._scan(allocator)
+        second = self._scan(allocator)
+        self.assertIsNot(first[0][0], second[0][0])
+        #repetitions still share the same subscan
+        self.assertIs(second[0][0], second[1][0])
+        self.assertEqual(first[0][0].typename, second[0][0].typename)
+
+    def test_content_key(self):
+        key = self.cache.key(self.scanmode, self.target, self.recv, self.freq)
+        LINE = "3C386 OnOff TP EQ 10.0d 1:00:00.0h"
+        _, _, other = target_parser._parse_target_line(LINE)
+        self.assertEqual(self.cache.key(self.scanmode, other, self.recv,
+                                        self.freq), key)
+        LINE = "3C387 OnOff TP EQ 10.0d 1:00:00.0h"
+        _, _, other = target_parser._parse_target_line(LINE)
+        self.assertNotEqual(self.cache.key(self.scanmode, other, self.recv,
+                                           self.freq), key)
+
+    def test_frequency_key(self):
+        key = self.cache.key(self.scanmode, self.target, self.recv, self.freq)
+        self.assertNotEqual(self.cache.key(self.scanmode, self.target,
+                                           self.recv, [30.0 * u.MHz]), key)
+
+    def test_key_shared_by_validated_scantypes(self):
+        configuration = os.path.join(TEMPLATE_PATH, "configuration_SR.txt")
+        first = validate_configuration(configuration)["scantypes"]["EqCross1_3"]
+        second = validate_configuration(configuration)["scantypes"]["EqCross1_3"]
+        self.assertNotEqual(first.ID, second.ID)
+        key = self.cache.key(first, self.target, self.recv, self.freq)
+        self.assertEqual(self.cache.key(second, self.target, self.recv,
+                                        self.freq), key)
+        allocator = IDAllocator()
+        base = first.do_scan(self.target, self.recv, self.freq, allocator)
+        self.cache.put(key, base, 1, allocator.next_id - 1)
+        self.assertIsNotNone(self.cache.get(
+            self.cache.key(second, self.target, self.recv, self.freq),
+            allocator))
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_lru_eviction(self):
+        cache = ScanCache(maxsize=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, [], 1, 0)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a", cache)
+        cache.get("b", IDAllocator())
+        cache.put("d", [], 1, 0)
+        self.assertIn("b", cache)
+        self.assertNotIn("c", cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+import io
+import os
+import shutil
+
+from basie.fragment_cache import FragmentCache, ScanFragment
+from basie.scanmode import subscan
+from basie.rich_validator import validate_configuration
+from basie import schedule, target_parser
+
+BASE_PATH = ".basie_test_fragments"
+curdir = os.path.abspath(os.path.dirname(__file__))
+TEMPLATE_PATH = os.path.join(curdir, "..", "user_templates")
+
+def cross_and_point_schedule():
+    """
+    A schedule with a cross scan and a point scan sharing their parameters,
+    on the same target
+    """
+    conf = validate_configuration(os.path.join(TEMPLATE_PATH,
+                                               "configuration_SR.txt"))
+    conf.pop("targetsFile")
+    backends = conf.pop("backends")
+    scantypes = conf.pop("scantypes")
+    _schedule = schedule.Schedule(**conf)
+    _schedule.backends = backends
+    _schedule.scantypes = scantypes
+    for scantype in ("HorCross1_3", "HorPoint"):
+        LINE = "3C386 %s TP EQ 10.0d 1:00:00.0h" % (scantype,)
+        _scantype, _backend, _target = target_parser._parse_target_line(LINE)
+        _schedule.add_scan(_target, _scantype, _backend)
+    _schedule.set_base_dir(BASE_PATH)
+    return _schedule
+
+def read_schedule_files(_schedule):
+    files = {}
+    for ext in ("scd", "lis"):
+        with open(_schedule._get_filename(ext), "rt") as f:
+            files[ext] = f.read()
+    return files
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        shutil.rmtree(BASE_PATH, True)
+        LINE = "3C386 otfmap1 TP EQ 10.0d 1:00:00.0h"
+        _, _, self.TARGET = target_parser._parse_target_line(LINE)
+        self.cache = FragmentCache(BASE_PATH)
+
+    def tearDown(self):
+        shutil.rmtree(BASE_PATH, True)
+
+    def _fragment(self):
+        ss, st = subscan.get_skydip_tsys(0, self.TARGET)
+        ss.target = st.ID
+        fragment = ScanFragment(ss.ID)
+        for n, _subscan in enumerate((st, ss), 1):
+            fragment.add_scd(n, _subscan)
+            fragment.add_lis(_subscan, str(_subscan))
+        fragment.close(st.ID + 1)
+        return fragment, (ss, st)
+
+    def test_write_renumbers_ids(self):
+        fragment, (ss, st) = self._fragment()
+        scd, lis = io.StringIO(), io.StringIO()
+        fragment.write(scd, lis, 3, "label", 101)
+        ss.shift_id(101 - ss.ID)
+        st.shift_id(101 - st.ID + 1)
+        self.assertEqual(lis.getvalue(),
+                         "#label\n%s\n%s\n" % (str(st), str(ss)))
+        self.assertEqual(scd.getvalue().splitlines()[1].split("\t")[:3],
+                         ["3_2", "30.000000", "101"])
+
+    def test_put_get(self):
+        fragment, _ = self._fragment()
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.put("key", fragment)
+        self.assertEqual(self.cache.get("key").lis_lines, fragment.lis_lines)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_corrupted_fragment(self):
+        os.makedirs(BASE_PATH)
+        with open(os.path.join(BASE_PATH, "key.pkl"), "wb") as f:
+            f.write(b"not a fragment")
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_scan_mode_class_is_keyed(self):
+        _schedule = cross_and_point_schedule()
+        cross, point = _schedule.scans
+        self.assertEqual(cross.scanmode.__class__.__name__, "CrossScan")
+        self.assertEqual(point.scanmode.__class__.__name__, "PointScan")
+        _schedule._write_schedule_files()
+        expected = read_schedule_files(_schedule)
+        _schedule.set_fragment_cache(self.cache)
+        _schedule._write_schedule_files()
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(read_schedule_files(_schedule), expected)
+        cross_key, cross_fragment = _schedule._get_fragment(cross, self.cache,
+                                                            False)
+        point_key, point_fragment = _schedule._get_fragment(point, self.cache,
+                                                            False)
+        self.assertNotEqual(cross_key, point_key)
+        self.assertNotEqual(cross_fragment.scd_lines, point_fragment.scd_lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,8 @@ try:
 except ImportError:
     import unittest
 import copy
-from astropy.coordinates import Angle
+import numpy as np
+from astropy.coordinates import Angle, SkyCoord
 from astropy import units as u
 
 from basie import frame
@@ -47,6 +48,73 @@ class TestCoord(unittest.TestCase):
         self.assertEqual(c.lon, va.VAngle(6.0))
         self.assertEqual(c.lat, va.VAngle(7.0))
 
+    def test_sum_mixed_frames(self):
+        c = frame.Coord(frame.EQ, 83.633, 22.0145)
+        d = frame.Coord(frame.GAL, 1.0, 2.0)
+        expected = copy.deepcopy(d)
+        expected.transform(frame.EQ)
+        for res, sign in ((c + d, 1), (c - d, -1)):
+            self.assertEqual(res.frame, frame.EQ)
+            self.assertAlmostEqual(res.lon.deg,
+                                   c.lon.deg + sign * expected.lon.deg, 9)
+            self.assertAlmostEqual(res.lat.deg,
+                                   c.lat.deg + sign * expected.lat.deg, 9)
+        #the operand is not converted in place
+        self.assertEqual(d.frame, frame.GAL)
+        self.assertEqual((d.lon.deg, d.lat.deg), (1.0, 2.0))
+        with self.assertRaises(frame.CoordinateError):
+            c + frame.Coord(frame.HOR, 1.0, 1.0)
+
+    def test_transform(self):
+        c = frame.Coord(frame.EQ, 83.633, 22.0145)
+        c.transform(frame.GAL)
+        expected = SkyCoord(83.633, 22.0145, unit="deg", frame="icrs").galactic
+        self.assertEqual(c.frame, frame.GAL)
+        self.assertEqual(c.lon.deg, expected.l.deg)
+        self.assertEqual(c.lat.deg, expected.b.deg)
+
+    def test_transform_hor(self):
+        c = frame.Coord(frame.HOR, 10.0, 20.0)
+        with self.assertRaises(frame.CoordinateError):
+            c.transform(frame.EQ)
+
+
+class TestBatchTransform(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.lon = rng.uniform(0, 360, 500)
+        self.lat = rng.uniform(-90, 90, 500)
+
+    def test_batch_equals_single(self):
+        coords = [frame.Coord(frame.GAL, lon, lat)
+                  for lon, lat in zip(self.lon[:20], self.lat[:20])]
+        singles = copy.deepcopy(coords)
+        frame.transform_coords(coords, frame.EQ)
+        for c, s in zip(coords, singles):
+            s.transform(frame.EQ)
+            self.assertEqual(c.frame, frame.EQ)
+            self.assertEqual(c.lon.deg, s.lon.deg)
+            self.assertEqual(c.lat.deg, s.lat.deg)
+
+    def test_fast_path(self):
+        for src, dest in ((frame.EQ, frame.GAL), (frame.GAL, frame.EQ)):
+            lon, lat = frame.transform_arrays(self.lon, self.lat, src, dest)
+            flon, flat = frame.transform_arrays(self.lon, self.lat, src, dest,
+                                                fast=True)
+            dlon = (flon - lon + 180.0) % 360.0 - 180.0
+            self.assertTrue(np.all(np.abs(dlon * np.cos(np.radians(lat))) < 1e-9))
+            self.assertTrue(np.all(np.abs(flat - lat) < 1e-9))
+            self.assertTrue(np.all((flon >= 0) & (flon < 360)))
+
+    def test_mixed_frames(self):
+        coords = [frame.Coord(frame.EQ, 10.0, 20.0),
+                  frame.Coord(frame.GAL, 10.0, 20.0)]
+        frame.transform_coords(coords, frame.GAL, fast=True)
+        self.assertEqual(coords[1].lon, va.VAngle(10.0))
+        self.assertTrue(all(c.frame == frame.GAL for c in coords))
+        with self.assertRaises(frame.CoordinateError):
+            frame.transform_coords([frame.Coord(frame.HOR, 1.0, 1.0)], frame.EQ)
+
 
 if __name__ == "__main__":
     unittest.main()
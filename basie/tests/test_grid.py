@@ -0,0 +1,66 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import numpy as np
+
+from basie.scanmode import grid
+from basie.errors import ScanError
+
+
+class TestGrid(unittest.TestCase):
+    def test_centered_axis(self):
+        offsets = grid.centered_axis(0.4, 0.05)
+        self.assertEqual(len(offsets), 9)
+        self.assertEqual(offsets[len(offsets) // 2], 0.0)
+        self.assertAlmostEqual(offsets[0], -offsets[-1])
+
+    def test_interleaved_axis_matches_loop(self):
+        length, extent, spacing, spi = 0.4, 0.037545204, 0.004, 3
+        major = extent * 2 + extent / 3.0 + spacing
+        expected = []
+        _offset = (-1 * (length / 2)) + extent
+        while _offset <= (length / 2 + extent):
+            for i in range(spi):
+                expected.append(_offset + i * spacing)
+            _offset = _offset + major
+        offsets = grid.interleaved_axis(length, extent, spacing, major, spi)
+        self.assertEqual(list(offsets), expected)
+
+    def test_interleaved_stepped_axis_matches_loop(self):
+        length, extent, spacing, spi = 0.1, 0.037545204, 0.004, 3
+        expected = []
+        _offset = (-1 * (length / 2)) + extent
+        while _offset <= (length / 2 + extent):
+            for i in range(spi):
+                expected.append(_offset)
+                _offset = _offset + spacing
+            _offset = _offset + extent * 2
+        offsets = grid.interleaved_stepped_axis(length, extent, spacing,
+                                                extent * 2, spi)
+        self.assertEqual(list(offsets), expected)
+
+    def test_stepped_axis_bounds(self):
+        offsets = grid.stepped_axis(1.0, 0.5, 0.25)
+        self.assertEqual(offsets[0], -1.0)
+        self.assertEqual(offsets[-1], 1.0)
+        self.assertEqual(len(offsets), 9)
+
+    def test_null_spacing(self):
+        with self.assertRaises(ScanError):
+            grid.stepped_axis(1.0, 0.5, 0.0)
+
+    def test_raster_order(self):
+        res = grid.raster_order([0, 1, 2], [10, 20], True)
+        self.assertEqual(res.tolist(), [[0, 10], [1, 10], [2, 10],
+                                        [2, 20], [1, 20], [0, 20]])
+        res = grid.raster_order([0, 1], [10, 20, 30], False)
+        self.assertEqual(res.tolist(), [[0, 10], [0, 20], [0, 30],
+                                        [1, 30], [1, 20], [1, 10]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from basie.id_allocator import IDAllocator
+from basie.errors import ScheduleError
+from basie import target_parser
+from basie.scanmode import subscan
+
+
+class TestIDAllocator(unittest.TestCase):
+    def test_allocate(self):
+        allocator = IDAllocator()
+        self.assertEqual([allocator.allocate() for i in range(3)], [1, 2, 3])
+        self.assertEqual(allocator.remaining, None)
+
+    def test_reserve(self):
+        allocator = IDAllocator()
+        allocator.allocate()
+        reserved = allocator.reserve(2)
+        self.assertEqual(allocator.allocate(), 4)
+        self.assertEqual(reserved.remaining, 2)
+        self.assertEqual([reserved.allocate(), reserved.allocate()], [2, 3])
+        with self.assertRaises(ScheduleError):
+            reserved.allocate()
+        with self.assertRaises(ScheduleError):
+            IDAllocator(1, 3).reserve(3)
+
+    def test_subscan_ids(self):
+        LINE = "3C386 otfmap1 TP EQ 10.0d 1:00:00.0h"
+        _, _, target = target_parser._parse_target_line(LINE)
+        allocator = IDAllocator(100)
+        ss = subscan.get_sidereal(target, allocator=allocator)
+        st = subscan.get_tsys(target, ss.target.offset_coord,
+                              allocator=allocator)
+        self.assertEqual((ss.ID, st.ID), (100, 101))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,3 +16,62 @@ class TestInstallation(unittest.TestCase):
         assert int(av[0]) >= 1
         # self.assertEqual(av[0], '1')
         #self.assertEqual(av[1], '0')
+
+class TestStartup(unittest.TestCase):
+    """
+    Importing the package and running the commands not generating schedules
+    must not load astropy, numpy, scan modes or radiotelescopes
+    """
+    HEAVY_MODULES = ("astropy", "numpy", "basie.scanmode",
+                     "basie.radiotelescopes", "basie.rich_validator")
+    #environment variable setting the import time budget (sec.)
+    IMPORT_TIME_BUDGET = "BASIE_IMPORT_TIME_BUDGET"
+
+    def _run(self, code, *options):
+        import os
+        import subprocess
+        import sys
+        env = dict(os.environ)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(basie.__file__)))
+        env["PYTHONPATH"] = os.pathsep.join(
+            [root] + [p for p in env.get("PYTHONPATH", "").split(os.pathsep)
+                      if p])
+        return subprocess.run([sys.executable] + list(options) + ["-c", code],
+                              env=env, capture_output=True, text=True,
+                              check=True)
+
+    def _loaded(self, argv):
+        code = ("import atexit, sys; sys.argv = %r; import basie; "
+                "atexit.register(lambda: print(' '.join(sys.modules))); "
+                "basie.cmd_line()" % (["basie"] + argv,))
+        modules = self._run(code).stdout.split()
+        return [m for m in modules if m.startswith(self.HEAVY_MODULES)]
+
+    def test_version_is_light(self):
+        self.assertEqual(self._loaded(["--version"]), [])
+
+    def test_templates_are_light(self):
+        import shutil
+        import tempfile
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.assertEqual(self._loaded(["-t", directory]), [])
+
+    def test_import_time(self):
+        #modules imported by the package import and their cumulative time,
+        #in microseconds
+        import os
+        stderr = self._run("import basie", "-X", "importtime").stderr
+        imported = {}
+        for line in stderr.splitlines():
+            fields = [f.strip() for f in line.split("|")]
+            if len(fields) == 3 and fields[1].isdigit():
+                imported[fields[2]] = int(fields[1]) / 1e6
+        if not "basie" in imported:
+            self.fail("no -X importtime line for basie in:\n%s" % (stderr,))
+        self.assertEqual([m for m in imported
+                          if m.startswith(self.HEAVY_MODULES)], [])
+        #timing depends on the machine load, it is checked on request
+        budget = os.environ.get(self.IMPORT_TIME_BUDGET)
+        if budget:
+            self.assertLess(imported["basie"], float(budget))
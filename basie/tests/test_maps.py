@@ -12,6 +12,9 @@ from basie.radiotelescopes import SRT
 from basie.scanmode import subscan, maps
 from basie.valid_angles import VAngle
 from basie.receiver import Receiver
+from basie.id_allocator import IDAllocator
+from basie.scanmode.scanmode import ScanResult
+from basie import target_parser
 
 class TestMapScan(unittest.TestCase):
 
@@ -42,78 +45,107 @@ class TestMapScan(unittest.TestCase):
                                         self._scans_per_beam)
 
     def test_single_feed_fixed_spacing(self):
-        self._scan_fixed._get_spacing(self._srecv, [18 * MHz])
-        scan_length_x = self._scan_fixed.offset_x[-1] - \
-                        self._scan_fixed.offset_x[0]
-        scan_length_y = self._scan_fixed.offset_y[-1] - \
-                        self._scan_fixed.offset_y[0]
-        self.assertGreaterEqual(scan_length_x, self._length_x)
-        self.assertGreaterEqual(scan_length_y, self._length_y)
-        for i in range(len(self._scan_fixed.offset_x) - 1):
+        geometry = self._scan_fixed.get_geometry(self._srecv, [18 * MHz])
+        scan_length_x = geometry.offset_x[-1] - \
+                        geometry.offset_x[0]
+        scan_length_y = geometry.offset_y[-1] - \
+                        geometry.offset_y[0]
+        self.assertGreaterEqual(scan_length_x, self._length_x.deg)
+        self.assertGreaterEqual(scan_length_y, self._length_y.deg)
+        for i in range(len(geometry.offset_x) - 1):
             self.assertAlmostEqual(self._spacing.deg,
-                                   self._scan_fixed.offset_x[i+1].deg -\
-                                   self._scan_fixed.offset_x[i].deg)
-        for i in range(len(self._scan_fixed.offset_y) - 1):
+                                   geometry.offset_x[i+1] -\
+                                   geometry.offset_x[i])
+        for i in range(len(geometry.offset_y) - 1):
             self.assertAlmostEqual(self._spacing.deg,
-                                   self._scan_fixed.offset_y[i+1].deg -\
-                                   self._scan_fixed.offset_y[i].deg)
+                                   geometry.offset_y[i+1] -\
+                                   geometry.offset_y[i])
 
     def test_multi_feed_fixed_spacing(self):
-        self._scan_fixed._get_spacing(self._recv, [18 * MHz])
-        scan_length_x = self._scan_fixed.offset_x[-1] - \
-                        self._scan_fixed.offset_x[0]
-        scan_length_y = self._scan_fixed.offset_y[-1] - \
-                        self._scan_fixed.offset_y[0]
-        self.assertGreaterEqual(scan_length_x + self._recv.feed_extent * 2, self._length_x)
-        self.assertGreaterEqual(scan_length_y + self._recv.feed_extent * 2, self._length_y)
+        geometry = self._scan_fixed.get_geometry(self._recv, [18 * MHz])
+        scan_length_x = geometry.offset_x[-1] - \
+                        geometry.offset_x[0]
+        scan_length_y = geometry.offset_y[-1] - \
+                        geometry.offset_y[0]
+        self.assertGreaterEqual(scan_length_x + self._recv.feed_extent.deg * 2, self._length_x.deg)
+        self.assertGreaterEqual(scan_length_y + self._recv.feed_extent.deg * 2, self._length_y.deg)
 
     def test_single_feed_dynamic_spacing(self):
-        self._scan_dynamic._get_spacing(self._srecv, [18 * MHz])
-        scan_length_x = self._scan_dynamic.offset_x[-1] - \
-                        self._scan_dynamic.offset_x[0]
-        scan_length_y = self._scan_dynamic.offset_y[-1] - \
-                        self._scan_dynamic.offset_y[0]
-        self.assertGreaterEqual(scan_length_x, self._length_x)
-        self.assertGreaterEqual(scan_length_y, self._length_y)
+        geometry = self._scan_dynamic.get_geometry(self._srecv, [18 * MHz])
+        scan_length_x = geometry.offset_x[-1] - \
+                        geometry.offset_x[0]
+        scan_length_y = geometry.offset_y[-1] - \
+                        geometry.offset_y[0]
+        self.assertGreaterEqual(scan_length_x, self._length_x.deg)
+        self.assertGreaterEqual(scan_length_y, self._length_y.deg)
 
     def test_multi_feed_dynamic_spacing(self):
         rec = self._recv
-        self._scan_dynamic._get_spacing(rec, [18 * MHz])
-        scan_length_x = self._scan_dynamic.offset_x[-1] - \
-                        self._scan_dynamic.offset_x[0]
-        scan_length_y = self._scan_dynamic.offset_y[-1] - \
-                        self._scan_dynamic.offset_y[0]
-        self.assertGreaterEqual(scan_length_x + rec.feed_extent * 2, self._length_x)
-        self.assertGreaterEqual(scan_length_y + rec.feed_extent * 2, self._length_y)
+        geometry = self._scan_dynamic.get_geometry(rec, [18 * MHz])
+        scan_length_x = geometry.offset_x[-1] - \
+                        geometry.offset_x[0]
+        scan_length_y = geometry.offset_y[-1] - \
+                        geometry.offset_y[0]
+        self.assertGreaterEqual(scan_length_x + rec.feed_extent.deg * 2, self._length_x.deg)
+        self.assertGreaterEqual(scan_length_y + rec.feed_extent.deg * 2, self._length_y.deg)
         #check uniform sampling within receiver extent
-        spb = int(rec.interleave / self._scan_dynamic.spacing)
-        for j in range(self._scan_dynamic.dimension_x // spb):
+        spb = int(rec.interleave / geometry.spacing)
+        for j in range(geometry.dimension_x // spb):
             for i in range(spb - 2):
-                self.assertAlmostEqual(self._scan_dynamic.offset_x[j*spb + i+1].deg - \
-                                       self._scan_dynamic.offset_x[j*spb + i].deg,
-                                       self._scan_dynamic.offset_x[j*spb + i+2].deg - \
-                                       self._scan_dynamic.offset_x[j*spb + i+1].deg,
+                self.assertAlmostEqual(geometry.offset_x[j*spb + i+1] - \
+                                       geometry.offset_x[j*spb + i],
+                                       geometry.offset_x[j*spb + i+2] - \
+                                       geometry.offset_x[j*spb + i+1],
                                        msg = "j: {0} i: {1}".format(j,i))
-        for j in range(self._scan_dynamic.dimension_y // spb):
+        for j in range(geometry.dimension_y // spb):
             for i in range(spb - 2):
-                self.assertAlmostEqual(self._scan_dynamic.offset_y[j*spb + i+1].deg - \
-                                       self._scan_dynamic.offset_y[j*spb + i].deg,
-                                       self._scan_dynamic.offset_y[j*spb + i+2].deg - \
-                                       self._scan_dynamic.offset_y[j*spb + i+1].deg)
+                self.assertAlmostEqual(geometry.offset_y[j*spb + i+1] - \
+                                       geometry.offset_y[j*spb + i],
+                                       geometry.offset_y[j*spb + i+2] - \
+                                       geometry.offset_y[j*spb + i+1])
         #check uniform sampling accross receiver positions
-        for j in range(self._scan_dynamic.dimension_x // spb - 1):
+        for j in range(geometry.dimension_x // spb - 1):
             pre = j * spb
             fol = pre + spb
-            self.assertAlmostEqual(self._scan_dynamic.offset_x[fol].deg,
-                                   self._scan_dynamic.offset_x[pre].deg +\
+            self.assertAlmostEqual(geometry.offset_x[fol],
+                                   geometry.offset_x[pre] +\
                                    rec.feed_extent.deg * 2 +\
                                    rec.interleave.deg + \
-                                   self._scan_dynamic.spacing.deg)
-        for j in range(self._scan_dynamic.dimension_y // spb - 1):
+                                   geometry.spacing.deg)
+        for j in range(geometry.dimension_y // spb - 1):
             pre = j * spb
             fol = pre + spb
-            self.assertAlmostEqual(self._scan_dynamic.offset_y[fol].deg,
-                                   self._scan_dynamic.offset_y[pre].deg +\
+            self.assertAlmostEqual(geometry.offset_y[fol],
+                                   geometry.offset_y[pre] +\
                                    rec.feed_extent.deg * 2 +\
                                    rec.interleave.deg + \
-                                   self._scan_dynamic.spacing.deg)
+                                   geometry.spacing.deg)
+
+    def test_do_scan_does_not_change_scanmode(self):
+        LINE = "3C386 EQMap1x1S TP EQ 10.0d 1:00:00.0h"
+        _, _, target = target_parser._parse_target_line(LINE)
+        scan = maps.OTFMapScan(EQ, "TL", "LON", VAngle(1), VAngle(1),
+                               self._scans_per_beam, 10)
+        state = scan.__getstate__()
+        first = scan.do_scan(target, self._recv, [18 * MHz], IDAllocator())
+        self.assertEqual(scan.__getstate__(), state)
+        second = scan.do_scan(target, self._recv, [18 * MHz], IDAllocator())
+        self.assertIsInstance(first, ScanResult)
+        self.assertEqual(len(first), len(second))
+        self.assertEqual(first.geometry.spacing, second.geometry.spacing)
+        self.assertEqual(list(first.geometry.offset_x),
+                         list(second.geometry.offset_x))
+        self.assertEqual(first.unit_subscans, second.unit_subscans)
+
+    def test_geometry_cache(self):
+        scan = maps.RasterMapScan(EQ, "TL", "LON", VAngle(1), VAngle(1),
+                                  self._scans_per_beam, 2)
+        geometry = scan.get_geometry(self._srecv, [18 * MHz, 10 * MHz])
+        self.assertIs(scan.get_geometry(self._srecv, [18 * MHz]), geometry)
+        self.assertEqual(len(geometry.points),
+                         geometry.dimension_x * geometry.dimension_y)
+        self.assertIsNot(scan.get_geometry(self._recv, [18 * MHz]), geometry)
+        scan.length_x = VAngle(10)
+        other = scan.get_geometry(self._srecv, [18 * MHz])
+        self.assertIsNot(other, geometry)
+        self.assertGreater(other.dimension_x, geometry.dimension_x)
@@ -6,7 +6,12 @@ try:
 except ImportError:
     import unittest
 
-from basie.procedures import Procedure, PROC_PREFIX, FTRACKALL
+import functools
+import pickle
+
+from basie.errors import ProcedureError
+from basie.procedures import Procedure, PROC_PREFIX, FTRACKALL, FTRACKLO, \
+                             DEROTATORFIXED, NULL, WAIT, get_procedure
 
 class TestProcedures(unittest.TestCase):
     def setUp(self):
@@ -59,6 +64,44 @@ class TestProcedures(unittest.TestCase):
                          "%sSIMPLE_ONE_PARAM=test" % (PROC_PREFIX,))
     #MLA add test derotator
 
+    def test_sums_are_interned(self):
+        first = self.simple_procedure + self.one_param_procedure
+        second = Procedure("SIMPLE", 0, "\tnop\n") + \
+                 Procedure("ONE_PARAM", 1, "\tparam=$1\n", True)
+        self.assertIs(first, second)
+        self.assertIs(first, get_procedure("SIMPLE_ONE_PARAM", 1,
+                                           "\tnop\n\tparam=$1\n", True))
+        self.assertIs(self.simple_procedure + NULL, self.simple_procedure)
+        self.assertIs(FTRACKLO + DEROTATORFIXED, FTRACKLO + DEROTATORFIXED)
+        self.assertEqual(len(set([first, second, first("a")])), 1)
+
+    def test_specialization(self):
+        one_param = self.one_param_procedure("test")
+        self.assertIs(one_param, self.one_param_procedure("test"))
+        self.assertIsNot(one_param, self.one_param_procedure("other"))
+        self.assertEqual(self.one_param_procedure("other").execute(),
+                         "%sONE_PARAM=other" % (PROC_PREFIX,))
+        self.assertEqual(self.one_param_procedure.execute(3),
+                         "%sONE_PARAM=3" % (PROC_PREFIX,))
+        with self.assertRaises(TypeError):
+            self.one_param_procedure.execute()
+        with self.assertRaises(ProcedureError):
+            one_param("again")
+
+    def test_pickle(self):
+        _sum = FTRACKLO + DEROTATORFIXED
+        self.assertIs(pickle.loads(pickle.dumps(_sum)), _sum)
+        one_param = pickle.loads(pickle.dumps(WAIT(5)))
+        self.assertIs(one_param, WAIT(5))
+        self.assertEqual(one_param.execute(), "%sWAIT=5" % (PROC_PREFIX,))
+        #state of procedures pickled by previous versions
+        old = Procedure.__new__(Procedure)
+        old.__setstate__(dict(name="WAIT", nparams=1, body="\twait=$1\n",
+                              _spec=False,
+                              execute=functools.partial(WAIT.execute, 5)))
+        self.assertEqual(old, WAIT)
+        self.assertEqual(old.execute(), "%sWAIT=5" % (PROC_PREFIX,))
+
 
 
 if __name__ == '__main__':
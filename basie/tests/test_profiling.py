@@ -0,0 +1,70 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+import json
+import os
+import re
+import shutil
+
+from basie import batch
+from basie.profiling import Profiler
+
+BASE_PATH = os.path.abspath(".basie_test_profiling")
+curdir = os.path.abspath(os.path.dirname(__file__))
+TEMPLATE_PATH = os.path.join(curdir, "..", "user_templates")
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        shutil.rmtree(BASE_PATH, True)
+        os.makedirs(BASE_PATH)
+
+    def tearDown(self):
+        shutil.rmtree(BASE_PATH, True)
+
+    def test_nested_peak_memory(self):
+        with Profiler() as profiler:
+            with profiler.measure() as outer:
+                with profiler.measure() as inner:
+                    data = bytearray(10**6)
+                del data
+                with profiler.measure() as after:
+                    pass
+        self.assertGreaterEqual(inner.peak_memory, 10**6)
+        self.assertGreaterEqual(outer.peak_memory, inner.peak_memory)
+        self.assertLess(after.peak_memory, 10**6)
+        self.assertGreaterEqual(outer.wall, inner.wall + after.wall)
+
+    def test_schedule_report(self):
+        profiler = Profiler(cprofile=True)
+        with profiler:
+            _schedule = batch.generate_schedule(
+                            os.path.join(TEMPLATE_PATH, "configuration_SR.txt"),
+                            BASE_PATH, profiler=profiler)
+        report_file = os.path.join(BASE_PATH, "report.json")
+        profiler.write_report(report_file)
+        with open(report_file) as f:
+            report = json.load(f)
+        self.assertEqual([p["name"] for p in report["phases"]],
+                         ["imports", "validation", "parsing", "scans",
+                          "writing"])
+        self.assertEqual(len(report["scans"]), len(_schedule.scans))
+        scan = report["scans"][0]
+        self.assertEqual(scan["number"], 1)
+        self.assertEqual(scan["target"], _schedule.scans[0].target.label)
+        self.assertEqual(scan["type"],
+                         _schedule.scans[0].scanmode.__class__.__name__)
+        self.assertEqual(scan["source"], "do_scan")
+        self.assertGreater(scan["do_scan"]["cpu"], 0)
+        self.assertGreater(scan["formatting"]["peak_memory"], 0)
+        with open(os.path.join(BASE_PATH, _schedule.label + ".scd")) as scd:
+            subscans = len([l for l in scd if re.match(r"\d+_\d+\t", l)])
+        self.assertEqual(report["totals"]["subscans"], subscans)
+        profiler.dump_stats(os.path.join(BASE_PATH, "stats.prof"))
+        self.assertTrue(os.path.exists(os.path.join(BASE_PATH, "stats.prof")))
+
+
+if __name__ == "__main__":
+    unittest.main()
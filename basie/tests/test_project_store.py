@@ -0,0 +1,110 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+import os
+import shutil
+
+from basie import schedule, target_parser
+from basie.errors import ScheduleError
+from basie.project_store import ProjectStore
+from basie.rich_validator import validate_configuration
+
+BASE_PATH = ".basie_test_store"
+curdir = os.path.abspath(os.path.dirname(__file__))
+TEMPLATE_PATH = os.path.join(curdir, "..", "user_templates")
+
+class TestProjectStore(unittest.TestCase):
+    def setUp(self):
+        shutil.rmtree(BASE_PATH, True)
+        os.makedirs(BASE_PATH)
+        self.conf = validate_configuration(os.path.join(TEMPLATE_PATH, "configuration_SR.txt"))
+        targetsFile = os.path.join(TEMPLATE_PATH, self.conf.pop('targetsFile'))
+        parsed_targets = target_parser.parse_file(targetsFile)
+        backends = self.conf.pop("backends")
+        scantypes = self.conf.pop("scantypes")
+        self.sched = schedule.Schedule(**self.conf)
+        self.sched.backends = backends
+        self.sched.scantypes = scantypes
+        for _target, _scanmode, _backend, _  in parsed_targets:
+            self.sched.add_scan(_target, _scanmode, _backend)
+        self.sched.set_base_dir(BASE_PATH)
+        self.filename = os.path.join(BASE_PATH, "projects.fs")
+
+    def tearDown(self):
+        shutil.rmtree(BASE_PATH, True)
+
+    def _read_lis(self):
+        with open(self.sched._get_filename("lis"), "rt") as lis:
+            return lis.read()
+
+    def test_save_and_load(self):
+        with ProjectStore(self.filename) as store:
+            store.save("SR", self.sched, dict(self.conf))
+        with ProjectStore(self.filename) as store:
+            self.assertEqual(store.names(), ["SR"])
+            project = store.load("SR")
+            self.assertEqual(project.configuration["projectID"],
+                             self.conf["projectID"])
+            self.assertEqual([_scan.target.label
+                              for _scan in project.schedule.scans],
+                             [_scan.target.label
+                              for _scan in self.sched.scans])
+            with self.assertRaises(ScheduleError):
+                store.load("missing")
+
+    def test_write_regenerates_changed_scans(self):
+        self.sched._write_schedule_files()
+        expected = self._read_lis()
+        with ProjectStore(self.filename) as store:
+            store.save("SR", self.sched)
+            fragments = store.write("SR")
+            self.assertEqual(fragments.misses, len(self.sched.scans))
+            self.assertEqual(self._read_lis(), expected)
+        with ProjectStore(self.filename) as store:
+            with store.edit("SR") as _schedule:
+                _schedule.scans[0].target.label = "CHANGED"
+            fragments = store.write("SR")
+            self.assertEqual(fragments.misses, 1)
+            self.assertEqual(fragments.hits, len(self.sched.scans) - 1)
+            self.assertEqual(len(store.load("SR").fragments),
+                             len(self.sched.scans))
+            self.assertIn("\tCHANGED\t", self._read_lis())
+
+    def test_edit_is_transactional(self):
+        with ProjectStore(self.filename) as store:
+            store.save("SR", self.sched)
+            with self.assertRaises(ValueError):
+                with store.edit("SR") as _schedule:
+                    _schedule.scans[0].target.label = "CHANGED"
+                    raise ValueError("abort")
+            label = store.load("SR").schedule.scans[0].target.label
+            self.assertEqual(label, self.sched.scans[0].target.label)
+            self.assertNotEqual(label, "CHANGED")
+
+    def test_write_cross_and_point_scans(self):
+        #cross and point scans sharing their parameters on the same target
+        self.sched.scans = []
+        for scantype in ("HorCross1_3", "HorPoint", "HorCross1_3"):
+            LINE = "3C386 %s TP EQ 10.0d 1:00:00.0h" % (scantype,)
+            _scantype, _backend, _target = \
+                target_parser._parse_target_line(LINE)
+            self.sched.add_scan(_target, _scantype, _backend)
+        self.sched._write_schedule_files()
+        expected = {}
+        for ext in ("scd", "lis"):
+            with open(self.sched._get_filename(ext), "rt") as f:
+                expected[ext] = f.read()
+        with ProjectStore(self.filename) as store:
+            store.save("SR", self.sched)
+            for run in range(2):
+                store.write("SR")
+                for ext in ("scd", "lis"):
+                    with open(self.sched._get_filename(ext), "rt") as f:
+                        self.assertEqual(f.read(), expected[ext])
+
+
+if __name__ == "__main__":
+    unittest.main()
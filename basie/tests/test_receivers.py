@@ -1,8 +1,15 @@
 #coding=utf-8
 
 import unittest
+import pickle
+
+import numpy
+from astropy import units as u
 
 from basie.radiotelescopes import SRT
+from basie.errors import ReceiverError
+from basie.frame import Coord, HOR
+from basie.receiver import Receiver
 from basie.valid_angles import VAngle
 
 class TestReceiver(unittest.TestCase):
@@ -13,6 +20,52 @@ class TestReceiver(unittest.TestCase):
         beamsize = VAngle(self.receiver.beamsize)
         self.assertTrue(beamsize >= VAngle(0))
 
+    def test_beamsize_interpolation(self):
+        receiver = Receiver("TEST", 1000.0, 3000.0,
+                            [[1000.0, 2000.0, 3000.0], [0.3, 0.2, 0.15]])
+        self.assertAlmostEqual(receiver.get_beamsize(1500 * u.MHz), 0.25)
+        self.assertAlmostEqual(receiver.get_beamsize(2.5 * u.GHz), 0.175)
+        self.assertIs(receiver.get_beamsize(1500 * u.MHz),
+                      receiver.get_beamsize(1.5 * u.GHz))
+        beamsizes = receiver.get_beamsize([1000.0, 1500.0, 4000.0] * u.MHz)
+        numpy.testing.assert_allclose(beamsizes, [0.3, 0.25, 0.15])
+        receiver.beamsize_table = [[1000.0, 3000.0], [0.4, 0.2]]
+        self.assertAlmostEqual(receiver.get_beamsize(1500 * u.MHz), 0.35)
+        restored = pickle.loads(pickle.dumps(receiver))
+        self.assertNotIn("_v_beamsize_interpolation", restored.__getstate__())
+        self.assertAlmostEqual(restored.get_beamsize(1500 * u.MHz), 0.35)
+
+    def test_feed_pairs_table(self):
+        receiver = Receiver("TEST", 1000.0, 3000.0, nfeed=3,
+                            feed_offsets=[Coord(HOR, VAngle(0), VAngle(0))])
+        receiver.set_feed_offsets(1, (VAngle(1.0), VAngle(0.0)))
+        receiver.set_feed_offsets(2, (VAngle(0.0), VAngle(1.0)))
+        receiver.set_valid_pairs({'0': [(0, 1)], '90': [(2, 1)]})
+        self.assertTrue(receiver.is_valid_pair((1, 2)))
+        self.assertFalse(receiver.is_valid_pair((2, 1)))
+        self.assertFalse(receiver.is_valid_pair((0, 2)))
+        offset = receiver.get_feed_offset(1, (1, 2))
+        self.assertAlmostEqual(offset.lon.deg, 0.0)
+        self.assertAlmostEqual(offset.lat.deg, -1.0)
+        offset = receiver.get_feed_offset(2, (1, 2))
+        self.assertAlmostEqual(offset.lon.deg, 1.0)
+        self.assertAlmostEqual(offset.lat.deg, 0.0)
+        self.assertIs(receiver.getDerotatorProcedure((1, 2)),
+                      receiver.getDerotatorProcedure((1, 2)))
+        self.assertEqual(receiver.getDerotatorProcedure((0, 1)).name,
+                         "DEROTATORFIXED_00")
+        with self.assertRaises(ReceiverError):
+            receiver.get_feed_offset(0, (0, 2))
+        with self.assertRaises(ReceiverError):
+            receiver.getDerotatorProcedure((2, 1))
+        #offsets follow the feed offsets and the pairs table
+        receiver.set_feed_offsets(2, (VAngle(0.0), VAngle(2.0)))
+        self.assertAlmostEqual(receiver.get_feed_offset(2, (1, 2)).lon.deg,
+                               2.0)
+        receiver.feeds_valid_pairs = {'-90': [(1, 2)]}
+        self.assertAlmostEqual(receiver.get_feed_offset(2, (1, 2)).lon.deg,
+                               -2.0)
+
     def test_valid_pairs(self):
         self.assertTrue(self.receiver.is_valid_pair((1,5)))
         self.assertFalse(self.receiver.is_valid_pair((5,1)))
@@ -8,6 +8,8 @@ from basie import schedule
 from basie.radiotelescopes import radiotelescopes
 from basie.rich_validator import validate_configuration
 from basie import target_parser
+from basie.scanmode.cache import ScanCache
+from basie.fragment_cache import FragmentCache
 
 BASE_PATH = ".basie_test"
 curdir = os.path.abspath(os.path.dirname(__file__))
@@ -17,18 +19,22 @@ class TestSchedule(unittest.TestCase):
     def setUp(self):
         shutil.rmtree(BASE_PATH, True) #ignores errors
         os.makedirs(BASE_PATH)
+        self.sched = self._new_schedule()
+
+    def _new_schedule(self):
         self.conf = validate_configuration(os.path.join(TEMPLATE_PATH, "configuration_SR.txt"))
 
         targetsFile = os.path.join(TEMPLATE_PATH, self.conf.pop('targetsFile'))
         parsed_targets = target_parser.parse_file(targetsFile)
         backends = self.conf.pop("backends")
         scantypes = self.conf.pop("scantypes")
-        self.sched = schedule.Schedule(**self.conf)
-        self.sched.backends = backends
-        self.sched.scantypes = scantypes
+        sched = schedule.Schedule(**self.conf)
+        sched.backends = backends
+        sched.scantypes = scantypes
         for _target, _scanmode, _backend, _  in parsed_targets:
-            self.sched.add_scan(_target, _scanmode, _backend)
-        self.sched.set_base_dir(BASE_PATH)
+            sched.add_scan(_target, _scanmode, _backend)
+        sched.set_base_dir(BASE_PATH)
+        return sched
 
     def tearDown(self):
         shutil.rmtree(BASE_PATH, True) #ignores errors
@@ -62,3 +68,117 @@ class TestSchedule(unittest.TestCase):
                 if not line.startswith("#"):
                     self.assertNotIn(" ", line)
 
+
+    def test_iter_subscans_is_lazy(self):
+        _scan = self.sched.scans[0]
+        _iter = _scan.iter_subscans()
+        self.assertFalse(isinstance(_iter, list))
+        self.assertEqual(len(list(_iter)), len(_scan.subscans))
+
+    def test_lis_subscans_sorted_and_unique(self):
+        self.sched._write_schedule_files()
+        with open(self.sched._get_filename("lis"), "rt") as lis:
+            blocks = lis.read().split("#")[1:]
+        self.assertEqual(len(blocks), len(self.sched.scans))
+        for block in blocks:
+            ids = [int(line.split("\t")[0])
+                   for line in block.splitlines()[1:]]
+            self.assertEqual(ids, sorted(set(ids)))
+
+    def test_write_schedule_files_is_reproducible(self):
+        self.sched._write_schedule_files()
+        with open(self.sched._get_filename("lis"), "rt") as lis:
+            first = lis.read()
+        self.sched._write_schedule_files()
+        with open(self.sched._get_filename("lis"), "rt") as lis:
+            self.assertEqual(lis.read(), first)
+
+    def test_parallel_write_is_identical(self):
+        self.sched._write_schedule_files()
+        serial = {}
+        for ext in ("scd", "lis"):
+            with open(self.sched._get_filename(ext), "rt") as f:
+                serial[ext] = f.read()
+        self.sched._write_schedule_files(jobs=2)
+        for ext in ("scd", "lis"):
+            with open(self.sched._get_filename(ext), "rt") as f:
+                self.assertEqual(f.read(), serial[ext])
+
+    def test_cached_write_is_identical(self):
+        self.sched.set_scan_cache(None)
+        self.sched._write_schedule_files()
+        uncached = {}
+        for ext in ("scd", "lis"):
+            with open(self.sched._get_filename(ext), "rt") as f:
+                uncached[ext] = f.read()
+        cache = ScanCache()
+        self.sched.set_scan_cache(cache)
+        self.sched._write_schedule_files()
+        self.sched._write_schedule_files()
+        self.assertTrue(cache.hits >= len(self.sched.scans))
+        for ext in ("scd", "lis"):
+            with open(self.sched._get_filename(ext), "rt") as f:
+                self.assertEqual(f.read(), uncached[ext])
+
+    def test_columnar_write_is_identical(self):
+        self.sched._write_schedule_files()
+        objects = {}
+        for ext in ("scd", "lis"):
+            with open(self.sched._get_filename(ext), "rt") as f:
+                objects[ext] = f.read()
+        self.sched._write_schedule_files(columnar=True)
+        for ext in ("scd", "lis"):
+            with open(self.sched._get_filename(ext), "rt") as f:
+                self.assertEqual(f.read(), objects[ext])
+
+    def _read_files(self):
+        files = {}
+        for ext in ("scd", "lis", "cfg"):
+            with open(self.sched._get_filename(ext), "rt") as f:
+                files[ext] = f.read()
+        return files
+
+    def test_incremental_write_is_identical(self):
+        self.sched._write_schedule_files()
+        expected = self._read_files()
+        fragments = FragmentCache(os.path.join(BASE_PATH, "fragments"))
+        self.sched.set_fragment_cache(fragments)
+        for jobs in (1, 1, 2):
+            self.sched._write_schedule_files(jobs)
+            files = self._read_files()
+            self.assertEqual(files["scd"], expected["scd"])
+            self.assertEqual(files["lis"], expected["lis"])
+            self.assertEqual(sorted(files["cfg"].split("\n")),
+                             sorted(expected["cfg"].split("\n")))
+        self.assertEqual(fragments.misses, len(self.sched.scans))
+        self.assertEqual(fragments.hits, 2 * len(self.sched.scans))
+
+    def test_incremental_write_regenerates_changed_scans(self):
+        fragments = FragmentCache(os.path.join(BASE_PATH, "fragments"))
+        self.sched.set_fragment_cache(fragments)
+        self.sched._write_schedule_files()
+        self.sched.scans[0].target.label = "CHANGED"
+        self.sched._write_schedule_files()
+        self.assertEqual(fragments.misses, len(self.sched.scans) + 1)
+        with open(self.sched._get_filename("lis"), "rt") as lis:
+            self.assertIn("\tCHANGED\t", lis.read())
+
+    def test_incremental_write_after_other_configuration(self):
+        fragments = FragmentCache(os.path.join(BASE_PATH, "fragments"))
+        self.sched.set_fragment_cache(fragments)
+        self.sched._write_schedule_files()
+        expected = self._read_files()
+        #scan modes of the new schedule get different IDs
+        validate_configuration(os.path.join(TEMPLATE_PATH, "configuration.txt"))
+        self.sched = self._new_schedule()
+        self.sched.set_fragment_cache(fragments)
+        self.sched._write_schedule_files()
+        self.assertEqual(fragments.misses, len(self.sched.scans))
+        self.assertEqual(fragments.hits, len(self.sched.scans))
+        self.assertEqual(self._read_files()["scd"], expected["scd"])
+
+    def test_repetitions_share_subscans(self):
+        for _scan in self.sched.scans:
+            by_id = {}
+            for _subscan in _scan.iter_subscans():
+                self.assertIs(by_id.setdefault(_subscan.ID, _subscan), _subscan)
@@ -53,5 +53,20 @@ class TestSubscan(unittest.TestCase):
         self.assertAlmostEqual(_ss.target.offset_coord.lon.deg,
                                offset.deg, delta=self.DELTA)
 
+    def test_subscans_share_target(self):
+        offset = frame.Coord(frame.EQ, VAngle(0.5), VAngle(0.5))
+        _ss = subscan.get_sidereal(self.TARGET, offset)
+        _st = subscan.get_tsys(self.TARGET, offset)
+        self.assertIs(_ss.target.coord, self.TARGET.coord)
+        self.assertEqual(_st.target.label, "Tsys")
+        self.assertEqual(self.TARGET.label, "3C386")
+        self.assertTrue(self.TARGET.offset_coord.is_null())
+        self.assertEqual(_ss.target.offset_coord.lon.deg, 0.5)
 
+    def test_cen_otf_does_not_modify_target(self):
+        _ss = subscan.get_cen_otf(self.TARGET, 10.0, VAngle(3.0), VAngle(0.2),
+                                  "LAT", "INC", frame.EQ)
+        self.assertEqual(_ss.target.offset_coord.lat.deg, 0.2)
+        self.assertEqual(_ss.target.offset_coord.frame, frame.EQ)
+        self.assertTrue(self.TARGET.offset_coord.is_null())
 
@@ -0,0 +1,64 @@
+#coding=utf-8
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from basie import frame, target_parser, procedures
+from basie.scanmode import subscan
+from basie.scanmode.subscan_table import SubscanTable, SID, OTF, SKYDIP
+from basie.valid_angles import VAngle
+
+
+class TestSubscanTable(unittest.TestCase):
+    def setUp(self):
+        LINE = "3C386 otfmap1 TP EQ 10.0d 1:00:00.0h"
+        _, _, self.TARGET = target_parser._parse_target_line(LINE)
+        offset = frame.Coord(frame.EQ, VAngle(0.5), VAngle((0, 30, 0)))
+        otf, otf_tsys = subscan.get_cen_otf_tsys(self.TARGET, 10.0,
+                                                 VAngle(3.0), VAngle(0.2),
+                                                 "LON", "INC", frame.EQ,
+                                                 VAngle(0.01))
+        sid, sid_tsys = subscan.get_sid_tsys(self.TARGET, offset,
+                                             [(-1, -1), (1, -1),
+                                              (1, 1), (-1, 1)],
+                                             5.0, VAngle(0.01))
+        sid.is_cal = True
+        sid.pre_procedure = procedures.CALON
+        skydip, skydip_tsys = subscan.get_skydip_tsys(sid.ID, self.TARGET, 30)
+        self.subscans = [otf, otf_tsys, sid, sid_tsys, skydip, skydip_tsys]
+
+    def test_lis_lines(self):
+        table = SubscanTable()
+        table.extend(self.subscans)
+        self.assertEqual(len(table), len(self.subscans))
+        self.assertEqual(table.lis_lines(),
+                         [str(_ss) for _ss in self.subscans])
+
+    def test_columns(self):
+        table = SubscanTable()
+        table.extend(self.subscans, 3)
+        self.assertEqual(table.rows["kind"].tolist(),
+                         [OTF, SID, SID, SID, SKYDIP, SID])
+        self.assertEqual(table.rows["ID"].tolist(),
+                         [_ss.ID for _ss in self.subscans])
+        self.assertEqual(table.rows["subscan"].tolist(), [1, 2, 3, 4, 5, 6])
+        self.assertTrue((table.rows["scan"] == 3).all())
+        #targets and procedures are stored once
+        self.assertEqual(len(table.targets), 2)
+        self.assertEqual(table.procedures[table.rows["pre_procedure"][2]],
+                         procedures.CALON)
+
+    def test_growth(self):
+        table = SubscanTable(capacity=2)
+        for i in range(10):
+            table.append(self.subscans[i % len(self.subscans)])
+        self.assertEqual(len(table), 10)
+        self.assertEqual(table.nbytes, 10 * table.rows.dtype.itemsize)
+        self.assertEqual(table.lis_lines()[7],
+                         str(self.subscans[7 % len(self.subscans)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 #coding=utf-8
 
+import io
 import os
 try:
     import unittest2 as unittest
@@ -9,6 +10,7 @@ except ImportError:
 from basie import target_parser
 from basie import frame
 from basie.valid_angles import VAngle
+from basie.errors import ScheduleError
 
 LINE = "3C386 otfmap1 TP EQ 10.0d 1:00:00.0h repetitions=3 tsys=4 offset_lon=0.0d offset_lat=0.3d offset_frame=eq"
 # TARGETS_PATH = "basie/user_templates/targets.txt"
@@ -50,6 +52,39 @@ class TestTarget(unittest.TestCase):
         self.assertEqual(t_zero.coord.lon.fmt(), "00:00:02.0000h")
         self.assertEqual(t_zero.coord.lat.fmt(), "-00:03:00.0000")
 
+    def test_iter_targets(self):
+        _file = io.StringIO(u"# comment\n\n" + LINE + "\n" + LINE + "\n")
+        targets = target_parser.iter_targets(_file)
+        _target, _scantype, _, _line = next(targets)
+        self.assertEqual(_target.label, "3C386")
+        self.assertEqual(_line, LINE)
+        self.assertEqual(len(list(targets)), 1)
+
+    def test_error_line_number(self):
+        _file = io.StringIO(u"# comment\n" + LINE + "\n" +
+                            u"Bad otfmap1 TP EQ 10.0d 95.0d\n")
+        targets = target_parser.iter_targets(_file)
+        next(targets)
+        with self.assertRaisesRegex(ScheduleError, "line 3"):
+            next(targets)
+
+    def test_parallel_parse(self):
+        with open(TARGETS_PATH) as _file:
+            serial = list(target_parser.iter_targets(_file))
+        with open(TARGETS_PATH) as _file:
+            parallel = list(target_parser.iter_targets(_file, jobs=2,
+                                                       chunk_size=3))
+        self.assertEqual(len(serial), len(parallel))
+        for (t1, s1, b1, l1), (t2, s2, b2, l2) in zip(serial, parallel):
+            self.assertEqual((s1, b1, l1), (s2, b2, l2))
+            self.assertEqual(t1.label, t2.label)
+            self.assertEqual(t1.coord, t2.coord)
+            self.assertEqual((t1.coord.lon.fmt(), t1.coord.lat.fmt()),
+                             (t2.coord.lon.fmt(), t2.coord.lat.fmt()))
+            self.assertEqual(t1.offset_coord, t2.offset_coord)
+            self.assertEqual((t1.repetitions, t1.tsys),
+                             (t2.repetitions, t2.tsys))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,121 @@
+#coding=utf-8
+
+import os
+import shutil
+import tempfile
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from astropy import units as u
+from astropy.table import Table
+
+from basie import target_parser, target_table
+from basie.errors import ScheduleError
+from basie.velocity import ZERO_VELOCITY
+
+LINES = ["Alpha EqCross1_3 TP EQ 12:00:00h +45:00:00",
+         "Beta HorPoint TP HOR 124.5d 38.2d tsys=2 repetitions=4",
+         "Gamma EqCross1_5 TP GAL 13.5d -0.5d offset_lon=-0.5d offset_frame=hor",
+         "Delta OnOff TP EQ 10.0d 1.0d rvel=12.5 vdef=rd vref=lsrk"]
+
+def _rows():
+    return {"label" : ["Alpha", "Beta", "Gamma", "Delta"],
+            "scanmode" : ["EqCross1_3", "HorPoint", "EqCross1_5", "OnOff"],
+            "backend" : ["TP", "TP", "TP", "TP"],
+            "frame" : ["EQ", "HOR", "gal", "EQ"],
+            "longitude" : ["12:00:00h", "124.5d", "13.5d", "10.0d"],
+            "latitude" : ["+45:00:00", "38.2d", "-0.5d", "1.0d"],
+            "tsys" : ["", "2", "", ""],
+            "repetitions" : ["", "4", "", ""],
+            "offset_lon" : ["", "", "-0.5d", ""],
+            "offset_frame" : ["", "", "hor", ""],
+            "rvel" : ["", "", "", "12.5"],
+            "vdef" : ["", "", "", "rd"],
+            "vref" : ["", "", "", "lsrk"]}
+
+class TestTargetTable(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.expected = list(target_parser.iter_targets(LINES))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, filename, content):
+        filename = os.path.join(self.directory, filename)
+        with open(filename, "w") as _file:
+            _file.write(content)
+        return filename
+
+    def assertSameTargets(self, targets):
+        self.assertEqual(len(targets), len(self.expected))
+        for (t1, s1, b1, _), (t2, s2, b2, _) in zip(self.expected, targets):
+            self.assertEqual((s1, b1), (s2, b2))
+            self.assertEqual(t1.label, t2.label)
+            for c1, c2 in ((t1.coord, t2.coord),
+                           (t1.offset_coord, t2.offset_coord)):
+                self.assertEqual(c1.frame, c2.frame)
+                for a1, a2 in ((c1.lon, c2.lon), (c1.lat, c2.lat)):
+                    self.assertAlmostEqual(a1.deg, a2.deg)
+                    self.assertEqual(a1.fmt(), a2.fmt())
+            self.assertEqual((t1.repetitions, t1.tsys),
+                             (t2.repetitions, t2.tsys))
+            if t1.velocity is ZERO_VELOCITY:
+                self.assertIs(t2.velocity, ZERO_VELOCITY)
+            else:
+                self.assertEqual(str(t1.velocity), str(t2.velocity))
+
+    def test_csv(self):
+        rows = _rows()
+        content = ",".join(rows) + "\n" + \
+                  "\n".join(",".join(row) for row in zip(*rows.values()))
+        filename = self._write("targets.csv", content + "\n")
+        self.assertTrue(target_table.is_table_file(filename))
+        self.assertSameTargets(target_table.parse_table(filename))
+
+    def test_numeric_columns(self):
+        rows = _rows()
+        for fmt, ext in (("fits", ".fits"), ("votable", ".vot")):
+            table = Table(rows)
+            table["longitude"] = [12.0, 124.5, 13.5, 10.0]
+            table["latitude"] = [45.0, 38.2, -0.5, 1.0]
+            table["longitude"].unit = u.deg
+            table.write(os.path.join(self.directory, "targets" + ext),
+                        format=fmt)
+            targets = target_table.parse_table(
+                os.path.join(self.directory, "targets" + ext))
+            alpha = targets[0][0]
+            self.assertEqual(alpha.coord.lon.fmt(), "12.0000d")
+            self.assertEqual(alpha.coord.lat.fmt(), "45.0000d")
+            self.assertEqual(targets[1][0].tsys, 2)
+            self.assertEqual(targets[2][0].offset_coord.lon.deg, -0.5)
+
+    def test_hour_column(self):
+        table = Table({"label" : ["Alpha"], "scanmode" : ["EqCross1_3"],
+                       "backend" : ["TP"], "frame" : ["EQ"],
+                       "longitude" : [12.0], "latitude" : [45.0]})
+        table["longitude"].unit = u.hour
+        _target = list(target_table.TargetColumns(table).targets())[0][0]
+        self.assertEqual(_target.coord.lon.fmt(), "12:00:00.0000h")
+        self.assertAlmostEqual(_target.coord.lon.deg, 180.0)
+
+    def test_invalid_row(self):
+        table = Table(_rows())
+        table["latitude"][2] = "95.0d"
+        with self.assertRaisesRegex(ScheduleError, "row 2: Latitude"):
+            target_table.TargetColumns(table)
+        table = Table(_rows())
+        table["frame"][1] = "XY"
+        with self.assertRaisesRegex(ScheduleError, "row 1: frame"):
+            target_table.TargetColumns(table)
+        table = Table(_rows())
+        table["longitude"][0] = "10:00:00h"
+        table["frame"][0] = "HOR"
+        with self.assertRaisesRegex(ScheduleError, "row 0: Horizontal"):
+            target_table.TargetColumns(table)
+
+
+if __name__ == "__main__":
+    unittest.main()
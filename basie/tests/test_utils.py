@@ -23,6 +23,16 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(_x, 1)
         self.assertEqual(_y, -10)
 
+    def test_extrude_from_rectangle_array(self):
+        extremes = [(0,0), (0,3), (5,0), (5,3)]
+        points = [(x * 0.5, y * 0.5) for x in range(11) for y in range(7)]
+        xs, ys = utils.extrude_from_rectangle_array([p[0] for p in points],
+                                                    [p[1] for p in points],
+                                                    extremes, 10)
+        for (x, y), _x, _y in zip(points, xs, ys):
+            self.assertEqual([_x, _y],
+                             utils.extrude_from_rectangle(x, y, extremes, 10))
+
     def test_ceil_to_odd_valid_angle(self):
         a = VAngle(4.2)
         b = utils.ceil_to_odd(a)
@@ -3,6 +3,8 @@ try:
 except ImportError:
     import unittest
 
+import pickle
+
 from basie.valid_angles import VAngle
 from basie import angle_parser
 from astropy import units as u
@@ -44,6 +46,22 @@ class TestAngles(unittest.TestCase):
         dms_neg_zero = angle_parser.check_angle("-00:00:03.0")
         assert(dms_neg_zero.radian < 0)
 
+    def test_parsing_memoized(self):
+        a = angle_parser.check_angle("-00:00:03.0")
+        b = angle_parser.check_angle("-00:00:03.0")
+        self.assertIsNot(a, b)
+        self.assertEqual((a.deg, a.original_unit, a.sexa),
+                         (b.deg, b.original_unit, b.sexa))
+
+    def test_parsing_errors(self):
+        for value in ("12:30d", "00:60:00", "abc"):
+            self.assertRaisesRegex(angle_parser.VdtAngleError,
+                                   "not a valid hour angle",
+                                   angle_parser.check_angle, value)
+        self.assertRaisesRegex(angle_parser.VdtAngleError,
+                               "not a valid value for minutes",
+                               angle_parser.check_angle, "12:61:00h")
+
     def test_fmt_dec(self):
         ang = VAngle(15.0)
         self.assertEqual(ang.fmt_dec(), u"15.0000d")
@@ -105,6 +123,28 @@ class TestAngles(unittest.TestCase):
         a = check_angle("10:00:00")
         self.assertFalse(a.is_hour_angle())
 
+    def test_to_angle(self):
+        a = VAngle(1, unit=u.hour)
+        self.assertAlmostEqual(a.to_angle().deg, 15.0)
+        b = VAngle(a.to_angle())
+        self.assertEqual(a.deg, b.deg)
+        self.assertEqual(b.original_unit, u.degree)
+
+    def test_with_value_keeps_attributes(self):
+        a = check_angle("-00:00:03.0")
+        b = a.with_value(0.2)
+        self.assertEqual(b.deg, 0.2)
+        self.assertEqual(b.fmt(), u"00:12:00.0000")
+
+    def test_ratio_is_float(self):
+        self.assertEqual(VAngle(10.0) / VAngle(4.0), 2.5)
+
+    def test_pickle(self):
+        a = VAngle(1, unit=u.hour)
+        b = pickle.loads(pickle.dumps(a))
+        self.assertEqual(a, b)
+        self.assertEqual(a.fmt(), b.fmt())
+
 
 if __name__ == "__main__":
     unittest.main()
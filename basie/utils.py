@@ -27,6 +27,8 @@ functions:
     - ceil_to_odd(dec): returns the nearest bigger odd int
     - ceil_to_half(dec): nearest bigger half unit
     - extrude_from_rectange: get a point outside of a rectangle, used for tsys 
+    - extrude_from_rectangle_array: same as extrude_from_rectangle for arrays
+    of points
 """
 
 import logging
@@ -34,8 +36,8 @@ import os
 import shutil
 logger = logging.getLogger(__name__)
 
-import numpy as np
-from basie.valid_angles import VAngle
+#numpy and astropy are imported by the functions using them, so that copying
+#user templates does not load them
 
 PACKAGE_DIR = os.path.abspath(os.path.dirname(__file__))
 USER_TEMPLATES_DIR = os.path.join(PACKAGE_DIR, "user_templates/")
@@ -75,20 +77,13 @@ def ceil_to_odd(dec):
     @type dec: VAngle or float
     @return: the minor integer odd number greater then dec.
     """
-    _ceil = np.ceil(dec)
-    #TODO: there must be a better way for broadcasting divmod operations to all
-    #types 
+    import numpy as np
+    from basie.valid_angles import VAngle
     if isinstance(dec, VAngle):
-        _is_angle = True
-        _is_even = (_ceil.value % 2 == 0)
-    else:
-        _is_angle = False
-        _is_even = (_ceil % 2 == 0)
-    if _is_even:
-        if _is_angle:
-            return _ceil + VAngle(1)
-        else:
-            return _ceil + 1
+        return dec.with_value(ceil_to_odd(dec.deg))
+    _ceil = np.ceil(dec)
+    if _ceil % 2 == 0:
+        return _ceil + 1
     else:
         return _ceil
 
@@ -98,6 +93,7 @@ def ceil_to_half(dec):
     @type dec: float
     @return: the minor half unit bigger then dec
     """
+    import numpy as np
     _ceil = np.ceil(dec)
     if (_ceil - 0.5) >= dec:
         return _ceil - 0.5
@@ -154,3 +150,36 @@ def extrude_from_rectangle(x, y, extremes, delta):
         ext = [x, _y]
     return ext
 
+def extrude_from_rectangle_array(x, y, extremes, delta):
+    """
+    project many points to the nearest side of a containing rectangle, with
+    the same rules of L{extrude_from_rectangle}
+    @param x: x coordinates of the inner points
+    @type x: array of floats
+    @param y: y coordinates of the inner points
+    @type y: array of floats
+    @param extremes: [[x0, y0], ... [x3,y3]] coordinates of the extremes of a
+    rectangle containing the points
+    @param delta: how much to extrude the points from the polygon
+    @return: (x, y) arrays of the extruded points
+    """
+    import numpy as np
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    extremes = np.asarray(extremes, dtype=float)
+    ex, ey = extremes[:, 0], extremes[:, 1]
+    #nearest extreme on each axis, ties go to the first extreme
+    ix = np.argmin(np.abs(x[:, np.newaxis] - ex), axis=1)
+    iy = np.argmin(np.abs(y[:, np.newaxis] - ey), axis=1)
+    minx = np.abs(x - ex[ix])
+    miny = np.abs(y - ey[iy])
+    _x = ex[ix]
+    _y = ey[iy]
+    #points on a side move away from the opposite side
+    on_left = ~np.any(ex[np.newaxis, :] < _x[:, np.newaxis], axis=1)
+    on_bottom = ~np.any(ey[np.newaxis, :] < _y[:, np.newaxis], axis=1)
+    _x = np.where((_x < x) | ((_x == x) & on_left), _x - delta, _x + delta)
+    _y = np.where((_y < y) | ((_y == y) & on_bottom), _y - delta, _y + delta)
+    along_x = minx <= miny
+    return np.where(along_x, _x, x), np.where(along_x, y, _y)
+
@@ -21,16 +21,23 @@
 """
 This module implements logics related to angle representations and calculation
 inside the schedule creator.
-It enriches the Angle class defined in astropy.coordinates.Angle adding validating
-options to the validate module and conversions from and to string.
+VAngle is a lightweight angle value storing decimal degrees as a float together
+with the formatting hints of its original representation, it is converted to
+an astropy.coordinates.Angle only when needed.
+This module also adds validating options to the validate module and
+conversions from and to string.
 """
 
 import logging
 logger = logging.getLogger(__name__)
 
+import math
+
 from astropy import units as u
 from astropy.coordinates import Angle
 
+from .angle_formatter import format_dec, format_sexagesimal
+
 ANGLE_DECIMALS = 4
 """
 CONSTANT. Decimal angles digits used in string fomratting
@@ -41,75 +48,280 @@ SEXA_SEPARATOR = ':'
 CONSTANT. separator used in angle hour and sexagesimal representation
 """
 
-class VAngle(Angle):
-    def __new__(cls, angle, unit=u.deg, wrap_angle=360 * u.deg, **kwargs):
-        was_tuple=False
-        if isinstance(angle, tuple) and unit in (u.deg, u.hour):
-            # The tuple of values does not work with astropy Angle, due to
-            # its ambiguous behavior when the degree value is 0.
+FMT_DEC, FMT_DMS, FMT_HMS = 0, 1, 2
+"""
+CONSTANTS. Codes of the angle string representations, see L{VAngle.fmt_code}
+"""
+
+_DEG_SCALES = {}
+
+def _deg_scale(unit):
+    """
+    Get the factor converting values in unit into degrees, as astropy would
+    compute it. Results are cached per unit.
+    """
+    try:
+        return _DEG_SCALES[unit]
+    except KeyError:
+        if unit == u.hour:
+            _scale = u.hourangle.to(u.deg)
+        else:
+            _scale = u.Unit(unit).to(u.deg)
+        _DEG_SCALES[unit] = _scale
+        return _scale
+
+_HOURS_PER_DEG = u.deg.to(u.hourangle)
+
+def _is_hour(unit):
+    """
+    Check unit identity before falling back to the slower unit comparison
+    """
+    if unit is u.hour:
+        return True
+    if unit is u.deg or unit is None:
+        return False
+    return unit == u.hour
+
+def format_deg(value, code):
+    """
+    Format an angle value as L{VAngle.fmt} would do
+    @param value: angle in decimal degrees
+    @type value: float
+    @param code: one of L{FMT_DEC}, L{FMT_DMS}, L{FMT_HMS}
+    """
+    if code == FMT_HMS:
+        return format_sexagesimal(value * _HOURS_PER_DEG, ANGLE_DECIMALS,
+                                  SEXA_SEPARATOR) + "h"
+    elif code == FMT_DMS:
+        return format_sexagesimal(value, ANGLE_DECIMALS, SEXA_SEPARATOR)
+    else:
+        return format_dec(value, ANGLE_DECIMALS) + "d"
+
+def _to_deg(other):
+    """
+    Get the value in degrees of an angle-like object, or None if other is
+    not an angle.
+    """
+    if isinstance(other, VAngle):
+        return other._deg
+    if isinstance(other, u.Quantity):
+        return other.to_value(u.deg)
+    return None
+
+def _restore(deg, original_unit, sexa):
+    """
+    Unpickling helper
+    """
+    return VAngle._from_deg(deg, original_unit, sexa)
+
+class VAngle(object):
+    """
+    Angle value with formatting hints.
+    Arithmetic results keep the formatting hints of the first angle operand.
+    Instances should be treated as immutable values.
+    @param angle: the angle value, a number, a (deg, min, sec) tuple, an
+    astropy Angle or a VAngle
+    @param unit: unit of angle if it is a number or a tuple
+    """
+    __slots__ = ("_deg", "original_unit", "sexa")
+    __array_ufunc__ = None #makes numpy defer to reflected operators
+
+    def __init__(self, angle, unit=u.deg):
+        was_tuple = False
+        if isinstance(angle, tuple) and (unit is u.deg or unit is u.hour or
+                                         unit in (u.deg, u.hour)):
             final_angle = 0.
             for i, a in enumerate(angle[:3]):
                 final_angle += a * 60**(-i)
             angle = final_angle
             was_tuple = True
-        self = Angle.__new__(cls, angle, unit=unit, **kwargs)
-        self.original_unit = unit
-        if unit == u.hour or isinstance(angle, tuple) or was_tuple:
-            self.sexa = True
+        if isinstance(angle, VAngle):
+            self._deg = angle._deg
+        elif isinstance(angle, u.Quantity):
+            self._deg = float(Angle(angle, unit=unit).to_value(u.deg))
+        elif isinstance(angle, str):
+            self._deg = float(Angle(angle, unit=unit).deg)
+        elif unit is u.deg:
+            self._deg = float(angle)
         else:
-            self.sexa = False
-        return self
+            self._deg = float(angle) * _deg_scale(unit)
+        self.original_unit = unit
+        self.sexa = (_is_hour(unit) or was_tuple)
+
+    @classmethod
+    def _from_deg(cls, deg, original_unit, sexa):
+        res = cls.__new__(cls)
+        res._deg = deg
+        res.original_unit = original_unit
+        res.sexa = sexa
+        return res
+
+    def with_value(self, deg):
+        """
+        Get a new angle sharing the formatting hints of this one
+        @param deg: the new angle value (deg)
+        @type deg: float
+        """
+        return VAngle._from_deg(float(deg), self.original_unit, self.sexa)
+
+    def to_angle(self):
+        """
+        @return: the equivalent astropy.coordinates.Angle
+        """
+        return Angle(self._deg, unit=u.deg)
+
+    @property
+    def deg(self):
+        return self._deg
+
+    degree = deg
+
+    @property
+    def radian(self):
+        return math.radians(self._deg)
+
+    rad = radian
 
-    def __init__(self, *args, **kwargs):
-        Angle.__init__(*args, **kwargs)
+    @property
+    def hour(self):
+        return self._deg / _deg_scale(u.hour)
 
-    def __array_finalize__(self, obj):
-        Angle.__array_finalize__(self, obj)
-        if obj is None:return
-        self.original_unit = getattr(obj, "original_unit", None)
-        self.sexa = getattr(obj, "sexa", None)
+    hourangle = hour
 
     def __copy__(self):
-        res = VAngle(self.deg)
-        res.original_unit = self.original_unit
-        res.sexa = self.sexa
-        return res
+        return VAngle._from_deg(self._deg, self.original_unit, self.sexa)
 
     def __deepcopy__(self, *args):
         return self.__copy__()
 
+    def __reduce__(self):
+        return (_restore, (self._deg, self.original_unit, self.sexa))
+
+    def __add__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self.with_value(self._deg + _other)
+
+    def __radd__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self.with_value(_other + self._deg)
+
+    def __sub__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self.with_value(self._deg - _other)
+
+    def __rsub__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self.with_value(_other - self._deg)
+
+    def __mul__(self, other):
+        if isinstance(other, (VAngle, u.Quantity)):
+            return NotImplemented
+        return self.with_value(self._deg * other)
+
+    def __rmul__(self, other):
+        if isinstance(other, (VAngle, u.Quantity)):
+            return NotImplemented
+        return self.with_value(other * self._deg)
+
+    def __truediv__(self, other):
+        """
+        Dividing by a number gives an angle, dividing by an angle gives the
+        float ratio
+        """
+        _other = _to_deg(other)
+        if _other is not None:
+            return self._deg / _other
+        return self.with_value(self._deg / other)
+
+    __div__ = __truediv__
+
+    def __neg__(self):
+        return self.with_value(-self._deg)
+
+    def __pos__(self):
+        return self.with_value(self._deg)
+
+    def __abs__(self):
+        return self.with_value(abs(self._deg))
+
+    def __eq__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self._deg == _other
+
+    def __ne__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self._deg != _other
+
+    def __lt__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self._deg < _other
+
+    def __le__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self._deg <= _other
+
+    def __gt__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self._deg > _other
+
+    def __ge__(self, other):
+        _other = _to_deg(other)
+        if _other is None:
+            return NotImplemented
+        return self._deg >= _other
+
+    def __hash__(self):
+        return hash(self._deg)
+
     def __str__(self):
         return self.fmt()
 
+    def __repr__(self):
+        return "<VAngle %s>" % (self.fmt(),)
+
     def fmt_dec(self):
         """
         Return the decimal string representation of the angle
         """
-        _a_str = self.to_string(unit=u.deg, decimal=True, precision=ANGLE_DECIMALS)
-        return _a_str + "d"
+        return format_dec(self._deg, ANGLE_DECIMALS) + "d"
 
     def fmt_hms(self):
         """
         Return the sexagesimal string representation of the angle in hours
         """
-        _a_str = self.to_string(unit=u.hour, sep=SEXA_SEPARATOR, pad=True,
-                              precision=ANGLE_DECIMALS)
-        return _a_str + "h"
+        return format_sexagesimal(self._deg * _HOURS_PER_DEG, ANGLE_DECIMALS,
+                                  SEXA_SEPARATOR) + "h"
 
     def fmt_dms(self):
         """
         Return the sexagesimal string representation of the angle
         """
-        _a_str = self.to_string(unit=u.deg, sep=SEXA_SEPARATOR, precision=ANGLE_DECIMALS,
-                                pad=True)
-        return _a_str
+        return format_sexagesimal(self._deg, ANGLE_DECIMALS, SEXA_SEPARATOR)
 
     def fmt(self):
         """
         Return the string representation of the angle according to its original
         format
         """
-        if self.original_unit == u.hour:
+        if self.is_hour_angle():
             return self.fmt_hms()
         elif self.sexa:
             return self.fmt_dms()
@@ -117,7 +329,19 @@ class VAngle(Angle):
             return self.fmt_dec()
 
     def is_hour_angle(self):
-        return self.original_unit == u.hour
+        return _is_hour(self.original_unit)
+
+    def fmt_code(self):
+        """
+        Code of the representation used by L{fmt}
+        @return: one of L{FMT_DEC}, L{FMT_DMS}, L{FMT_HMS}
+        """
+        if self.is_hour_angle():
+            return FMT_HMS
+        elif self.sexa:
+            return FMT_DMS
+        else:
+            return FMT_DEC
 
 
 ZERO_ANGLE = VAngle(0.0)
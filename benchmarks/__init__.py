@@ -0,0 +1,16 @@
+#coding=utf-8
+
+"""
+Benchmark suite, run with airspeed velocity (asv) from the package directory:
+
+    $ pip install asv
+    $ asv run            # benchmark the current branch head
+    $ asv continuous master HEAD   # compare two commits, report regressions
+    $ asv publish; asv preview     # browse results history
+
+Results are stored in benchmarks/results, one file per machine and commit,
+so that runs on the same machine can be compared across commits.
+Workloads are synthetic and built by L{common}: target catalogues from 10 to
+100k lines, OTF and raster maps from a few to thousands of subscans,
+multifeed nodding on the KM receiver and long ON-OFF sequences.
+"""
@@ -0,0 +1,46 @@
+#coding=utf-8
+
+"""
+Configuration validation and target file parsing
+"""
+
+import os
+
+from basie import rich_validator, target_parser
+
+from . import common
+
+class TimeValidateConfiguration(object):
+    def setup(self):
+        common.quiet()
+
+    def time_validate_configuration(self):
+        rich_validator.validate_configuration(common.CONFIGURATION_TEMPLATE)
+
+
+class TimeParseTargets(object):
+    params = [10, 1000, 100000]
+    param_names = ["targets"]
+    timeout = 300
+
+    def setup_cache(self):
+        #files are written once per benchmark run
+        directory = os.path.abspath("targets")
+        for n in self.params:
+            common.write_project(os.path.join(directory, str(n)), n)
+        return directory
+
+    def setup(self, directory, n):
+        common.quiet()
+        self.filename = os.path.join(directory, str(n), "targets.txt")
+
+    def time_parse_file(self, directory, n):
+        target_parser.parse_file(self.filename)
+
+    def time_iter_targets(self, directory, n):
+        with open(self.filename) as _file:
+            for _ in target_parser.iter_targets(_file):
+                pass
+
+    def peakmem_parse_file(self, directory, n):
+        target_parser.parse_file(self.filename)
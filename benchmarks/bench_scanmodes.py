@@ -0,0 +1,84 @@
+#coding=utf-8
+
+"""
+Subscan generation of each scan mode, ScanMode.do_scan
+"""
+
+from astropy import units as u
+
+from basie import rich_validator, target_parser
+from basie.id_allocator import IDAllocator
+from basie.radiotelescopes import SRT
+
+from . import common
+
+TARGET_LINE = "SRC OnOff TP EQ 10.0d 45.0d"
+FREQUENCY = [22000 * u.MHz]
+
+class _ScanModeBenchmark(object):
+    """
+    Scan a target with the scan mode built from a configuration scan type
+    specification, params select the specification
+    """
+    receiver_name = "K"
+    scantypes = {}
+
+    def setup(self, size):
+        common.quiet()
+        _, _, self.target = target_parser._parse_target_line(TARGET_LINE)
+        self.receiver = SRT.receivers[self.receiver_name]
+        self.scanmode = rich_validator.check_scantype(self.scantypes[size])
+
+    def time_do_scan(self, size):
+        self.scanmode.do_scan(self.target, self.receiver, FREQUENCY,
+                              IDAllocator())
+
+
+class TimeOTFMap(_ScanModeBenchmark):
+    #11 to 10001 subscans
+    scantypes = {"small" : "OTFMAP EQ RA TL 0.1d 0.1d 5.0 0.01d",
+                 "medium" : "OTFMAP EQ RA TL 1.0d 1.0d 5.0 0.01d",
+                 "large" : "OTFMAP EQ RA TL 10.0d 10.0d 5.0 0.01d",
+                 "huge" : "OTFMAP EQ RA TL 10.0d 10.0d 5.0 0.001d"}
+    params = ["small", "medium", "large", "huge"]
+    param_names = ["map"]
+
+
+class TimeMultifeedOTFMap(_ScanModeBenchmark):
+    receiver_name = "KM"
+    scantypes = {"small" : "OTFMAP EQ RA TL 1.0d 1.0d 5.0 0.01d",
+                 "large" : "OTFMAP EQ RA TL 10.0d 10.0d 5.0 0.01d"}
+    params = ["small", "large"]
+    param_names = ["map"]
+
+
+class TimeRasterMap(_ScanModeBenchmark):
+    #121 to 10201 points
+    scantypes = {"small" : "RASTERMAP HOR LON TL 0.1d 0.1d 5.0 0.01d 0",
+                 "medium" : "RASTERMAP HOR LON TL 0.3d 0.3d 5.0 0.01d 0",
+                 "large" : "RASTERMAP HOR LON TL 1.0d 1.0d 5.0 0.01d 0"}
+    params = ["small", "medium", "large"]
+    param_names = ["map"]
+
+
+class TimeNodding(_ScanModeBenchmark):
+    receiver_name = "KM"
+    scantypes = {"short" : "NODDING 0 1 10.0 [2a,2a_cal,2b,2b_cal]",
+                 "long" : "NODDING 0 4 10.0 [200a,20a_cal,200b,20b_cal]"}
+    params = ["short", "long"]
+    param_names = ["sequence"]
+
+
+class TimeOnOff(_ScanModeBenchmark):
+    scantypes = {"short" : "ONOFF 4.0 EQ 1.0d 1.0d [4on,4off,2off_cal]",
+                 "long" : "ONOFF 4.0 EQ 1.0d 1.0d [1000on,1000off,20off_cal]"}
+    params = ["short", "long"]
+    param_names = ["sequence"]
+
+
+class TimeCrossAndSkydip(_ScanModeBenchmark):
+    scantypes = {"cross" : "CROSS EQ 0.4d 3.0",
+                 "point" : "POINT EQ 0.4d 3.0",
+                 "skydip" : "SKYDIP 87.0d 15.0d 290"}
+    params = ["cross", "point", "skydip"]
+    param_names = ["scantype"]
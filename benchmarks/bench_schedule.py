@@ -0,0 +1,61 @@
+#coding=utf-8
+
+"""
+Schedule generation and writing, Schedule._write_schedule_files
+"""
+
+import os
+import shutil
+import tempfile
+
+from basie import batch
+
+from . import common
+
+class TimeWriteSchedule(object):
+    params = ([10, 100, 1000], ["serial", "columnar"])
+    param_names = ["targets", "mode"]
+    timeout = 300
+    number = 1
+    repeat = 3
+
+    def setup(self, n, mode):
+        common.quiet()
+        self.directory = tempfile.mkdtemp()
+        configuration_file = common.write_project(
+            os.path.join(self.directory, "project"), n)
+        self.schedule = common.build_schedule(
+            configuration_file, os.path.join(self.directory, "out"))
+
+    def teardown(self, n, mode):
+        shutil.rmtree(self.directory, True)
+
+    def time_write_schedule_files(self, n, mode):
+        self.schedule._write_schedule_files(columnar=(mode == "columnar"))
+
+    def peakmem_write_schedule_files(self, n, mode):
+        self.schedule._write_schedule_files(columnar=(mode == "columnar"))
+
+
+class TimeGenerateSchedule(object):
+    """
+    The whole command line path: validation, parsing, generation and writing
+    """
+    params = [10, 1000]
+    param_names = ["targets"]
+    timeout = 300
+    number = 1
+    repeat = 3
+
+    def setup(self, n):
+        common.quiet()
+        self.directory = tempfile.mkdtemp()
+        self.configuration_file = common.write_project(
+            os.path.join(self.directory, "project"), n)
+
+    def teardown(self, n):
+        shutil.rmtree(self.directory, True)
+
+    def time_generate_schedule(self, n):
+        batch.generate_schedule(self.configuration_file,
+                                os.path.join(self.directory, "out"))
@@ -0,0 +1,106 @@
+#coding=utf-8
+
+"""
+Synthetic workloads shared by the benchmarks.
+
+functions:
+    - target_lines
+    - write_project
+    - build_schedule
+    - quiet
+"""
+
+import logging
+import os
+import shutil
+
+from basie import utils
+
+CONFIGURATION_TEMPLATE = os.path.join(utils.USER_TEMPLATES_DIR,
+                                      "configuration_SR.txt")
+
+SCANTYPES = ("EqCross1_3", "EqCross1_5", "DownSkydip", "EQMap1x1S",
+             "HorRasterTRS", "OnOff", "Nodding01")
+"""
+Scan types of the configuration template used by synthetic targets, one for
+each scan mode
+"""
+
+NO_OFFSET_SCANTYPES = ("DownSkydip", "HorRasterTRS", "Nodding01")
+"""
+Scan types not accepting targets with EQ offsets
+"""
+
+def quiet():
+    """
+    Silence the schedule generation log
+    """
+    logging.disable(logging.WARNING)
+
+def target_lines(n, scantypes=SCANTYPES):
+    """
+    Distinct target lines, alternating coordinate representations and options
+    @param n: number of lines
+    @return: list of lines
+    """
+    lines = []
+    for i in range(n):
+        ra = (i * 0.37) % 24
+        dec = ((i * 0.91) % 170) - 85
+        scantype = scantypes[i % len(scantypes)]
+        if i % 3 == 0:
+            coords = "%dd %.4fd" % (i % 360, dec)
+        elif i % 3 == 1:
+            minutes, seconds = divmod(int(ra * 3600), 60)
+            dec_minutes, dec_seconds = divmod(int(abs(dec) * 3600), 60)
+            coords = "%02d:%02d:%02d.%02dh %s%02d:%02d:%02d" % (
+                minutes // 60, minutes % 60, seconds, i % 100,
+                "-" if dec < 0 else "+", dec_minutes // 60, dec_minutes % 60,
+                dec_seconds)
+        else:
+            coords = "%.4fd %.4fd" % ((i * 1.3) % 360, dec)
+            if not scantype in NO_OFFSET_SCANTYPES:
+                coords += " offset_lon=0.1d offset_lat=-0.1d"
+        if i % 5 == 0:
+            coords += " rvel=%d vref=LSRK vdef=RD repetitions=2" % (i % 100,)
+        lines.append("SRC%06d %s TP EQ %s" % (i, scantype, coords))
+    return lines
+
+def write_project(directory, n, scantypes=SCANTYPES):
+    """
+    Write a configuration file and a targets file with n targets
+    @return: the configuration file path
+    """
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+    configuration_file = os.path.join(directory, "configuration.txt")
+    shutil.copyfile(CONFIGURATION_TEMPLATE, configuration_file)
+    with open(os.path.join(directory, "targets.txt"), "w") as targets:
+        targets.write("\n".join(target_lines(n, scantypes)))
+        targets.write("\n")
+    return configuration_file
+
+def build_schedule(configuration_file, output_directory):
+    """
+    Build the schedule of a project written by L{write_project}, as
+    L{basie.batch.generate_schedule} does, without writing it
+    @return: the schedule
+    """
+    from basie import schedule, rich_validator, target_parser
+    from basie.radiotelescopes import radiotelescopes
+    conf = rich_validator.validate_configuration(configuration_file)
+    targets = target_parser.parse_file(
+        os.path.join(os.path.dirname(configuration_file),
+                     conf.pop("targetsFile")))
+    radiotelescope = radiotelescopes[conf["radiotelescope"].upper()]
+    conf.receiver = radiotelescope.receivers[conf["receiver"]]
+    backends = conf.pop("backends")
+    scantypes = conf.pop("scantypes")
+    _schedule = schedule.Schedule(**conf)
+    _schedule.backends = backends
+    _schedule.scantypes = scantypes
+    for _target, _scanmode, _backend, _ in targets:
+        _schedule.add_scan(_target, _scanmode, _backend)
+    _schedule.set_base_dir(output_directory)
+    return _schedule